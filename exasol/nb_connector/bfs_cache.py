@@ -0,0 +1,251 @@
+"""
+Read-through cache of BucketFS files on the local disk, reusing downloaded
+files across cells and kernel restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import exasol.bucketfs as bfs
+
+from exasol.nb_connector.bfs_utils import read_manifest
+from exasol.nb_connector.chunked_transfer import DEFAULT_CHUNK_SIZE
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BFS_CACHE_DIR = Path.home() / ".cache" / "notebook-connector" / "bucketfs"
+
+# Max. number of bytes of all cached files.
+DEFAULT_MAX_BFS_CACHE_SIZE = 10 * 1024**3
+
+# Seconds after which a cached file expires if neither a manifest nor the
+# size of the file in a mounted bucket is available.
+DEFAULT_BFS_CACHE_TTL = 3600.0
+
+# Default number of files downloaded concurrently by download_many().
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+_SUFFIX = ".bin"
+
+
+def _remote_status(bfs_path: bfs.path.PathLike) -> list[Any] | None:
+    """
+    Returns the size and the modification time of a file in a mounted
+    bucket, or None for other buckets, whose API doesn't report them.
+    """
+    bucket = getattr(bfs_path, "bucket_api", None)
+    if not isinstance(bucket, bfs.MountedBucket):
+        return None
+    try:
+        status = (bucket.root / str(getattr(bfs_path, "path", ""))).stat()
+    except OSError:
+        return None
+    return [status.st_size, status.st_mtime_ns]
+
+
+class BucketFSCache:
+    """
+    Caches files downloaded from the BucketFS in a local directory,
+    surviving restarts of the kernel. The returned local paths can be
+    opened or memory-mapped, e.g. with pyarrow.memory_map() or
+    numpy.memmap().
+
+    The entries are keyed by the bucket, the path in the bucket, and the
+    SHA-256 hash and size in the manifest uploaded with the file, see
+    bfs_utils.upload_file(). Checking the manifest takes one small request
+    per lookup, and a changed file is downloaded again. In a bucket mounted
+    in the local file system, the key also includes the size and the
+    modification time of the file, detecting files replaced without
+    updating the manifest, or uploaded without manifest. In other buckets,
+    the cached copies of files without manifest are used until they expire.
+
+    Parameters:
+        cache_dir:
+            Directory of the cached files.
+        max_size:
+            Max. number of bytes of all cached files. If exceeded, then the
+            least recently used files are removed.
+        ttl:
+            Seconds after which a cached file expires if neither a manifest
+            nor the size of the file in a mounted bucket is available.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_size: int = DEFAULT_MAX_BFS_CACHE_SIZE,
+        ttl: float = DEFAULT_BFS_CACHE_TTL,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_BFS_CACHE_DIR
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _path(self, bfs_path: bfs.path.PathLike) -> tuple[Path, bool]:
+        """
+        Returns the path of the cached file and whether its key identifies
+        the version of the BucketFS file, i.e. by the manifest or the size
+        and modification time of the file in a mounted bucket.
+        """
+        manifest = read_manifest(bfs_path)
+        version: list[Any] | None
+        if manifest is not None:
+            # The status of a file in a mounted bucket also reveals if the
+            # file has been replaced without updating the manifest.
+            version = [
+                manifest.get("sha256"),
+                manifest.get("size"),
+                _remote_status(bfs_path),
+            ]
+        else:
+            version = _remote_status(bfs_path)
+        elements = [
+            str(getattr(bfs_path, "bucket_api", "")),
+            str(bfs_path),
+            manifest is not None,
+            version,
+        ]
+        key = hashlib.sha256(json.dumps(elements).encode()).hexdigest()
+        return self.cache_dir / f"{key}{_SUFFIX}", version is not None
+
+    def _is_valid(self, path: Path, versioned: bool) -> bool:
+        try:
+            modified = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if not versioned and modified + self.ttl <= time.time():
+            return False
+        # The access time tracks the usage, while the modification time is
+        # the time the file was cached.
+        os.utime(path, (time.time(), modified))
+        return True
+
+    def _download(self, bfs_path: bfs.path.PathLike, path: Path) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp.open("wb") as file:
+                for chunk in bfs_path.read(DEFAULT_CHUNK_SIZE):
+                    file.write(chunk)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._evict(keep=path)
+
+    def _evict(self, keep: Path) -> None:
+        """
+        Removes the least recently used files, except for the one to keep,
+        while the total size exceeds the limit. Expired files are replaced
+        on their next lookup.
+        """
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob(f"*{_SUFFIX}"):
+                try:
+                    entries.append((path, path.stat()))
+                except FileNotFoundError:
+                    pass
+            total = sum(st.st_size for _, st in entries)
+            for path, st in sorted(entries, key=lambda entry: entry[1].st_atime):
+                if total <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                    total -= st.st_size
+                except FileNotFoundError:
+                    pass
+                except OSError as ex:
+                    LOG.debug("Failed to remove cached file %s: %s", path, ex)
+
+    def get(self, bfs_path: bfs.path.PathLike, refresh: bool = False) -> Path:
+        """
+        Returns the local path of the cached copy of a file in the BucketFS,
+        downloading the file if it isn't cached yet or has changed.
+
+        Parameters:
+            bfs_path:
+                Path of the file, e.g. open_bucketfs_location(conf) / "my_model.pkl".
+            refresh:
+                If True then downloads the file even if it is cached.
+        """
+        path, versioned = self._path(bfs_path)
+        if not refresh and self._is_valid(path, versioned):
+            LOG.debug("Using cached file %s for %s", path.name, bfs_path)
+            return path
+        LOG.info("Downloading %s from the bucketfs", bfs_path)
+        self._download(bfs_path, path)
+        return path
+
+    def download_many(
+        self,
+        bfs_paths: Iterable[bfs.path.PathLike],
+        workers: int = DEFAULT_DOWNLOAD_WORKERS,
+        refresh: bool = False,
+    ) -> list[Path]:
+        """
+        Returns the local paths of the cached copies of several files in the
+        BucketFS, see get(). The files are looked up and downloaded by a
+        pool of threads.
+
+        Parameters:
+            bfs_paths:
+                Paths of the files.
+            workers:
+                Max. number of files downloaded concurrently.
+            refresh:
+                If True then downloads the files even if they are cached.
+        :return: Local paths in the order of bfs_paths.
+        """
+        if workers < 1:
+            raise ValueError(f"Invalid number of workers: {workers}")
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bfs-download"
+        ) as executor:
+            futures = [executor.submit(self.get, path, refresh) for path in bfs_paths]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+    def invalidate(self, bfs_path: bfs.path.PathLike) -> bool:
+        """
+        Removes the cached copy of the current version of a file. Returns
+        True if there was such a copy.
+        """
+        path, _ = self._path(bfs_path)
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> int:
+        """Removes all cached files and returns their number."""
+        removed = 0
+        for path in self.cache_dir.glob(f"*{_SUFFIX}"):
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+BFS_CACHE = BucketFSCache()
+"""
+Cache in the default directory. Applications can change its settings, e.g.
+BFS_CACHE.max_size = 50 * 1024**3.
+"""
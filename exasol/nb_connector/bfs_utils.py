@@ -2,47 +2,282 @@
 Bucketfs-related functions.
 """
 
+import hashlib
+import json
 import logging
+import os
 import pathlib
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from typing import Any
 
 import exasol.bucketfs as bfs
 
+from exasol.nb_connector.chunked_transfer import upload_to_bucketfs
+
 _logger = logging.getLogger(__name__)
 
+MANIFEST_SUFFIX = ".manifest.json"
+"""
+Suffix of the manifest uploaded next to each file, containing the SHA-256
+hash, the size, and the modification time of the local file.
+"""
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Default number of files uploaded concurrently by sync_dir().
+DEFAULT_SYNC_WORKERS = 8
+
+# Hashes of local files, keyed by the path, size, and modification time.
+_MAX_HASH_CACHE_SIZE = 256
+_HASH_CACHE: dict[tuple[str, int, int], str] = {}
+_HASH_CACHE_LOCK = threading.Lock()
 
-def _file_in_bucket(file_name: str, bucket: bfs.Bucket) -> bool:
+
+def _is_missing(error: Exception) -> bool:
+    """
+    Checks if the error raised by downloading a file from a bucket reports
+    that the file doesn't exist.
+    """
+    if isinstance(error, FileNotFoundError):
+        return True
+    if isinstance(error, bfs.BucketFsError):
+        # The SaaS bucket reports a missing file without a cause. Other
+        # causes without response, e.g. connection errors, are failures.
+        if error.__cause__ is None:
+            return True
+        response = getattr(error.__cause__, "response", None)
+        return response is not None and response.status_code == 404
+    return False
+
+
+def file_manifest(file_path: pathlib.Path) -> dict[str, Any]:
     """
-    Checks that given file name is present in bucket.
-    :param file_name: name to check
-    :param bucket: bucket object
-    :return: True if name is present, else False
+    Returns the manifest of a local file: its SHA-256 hash, size, and
+    modification time. The hash is computed only once per kernel, unless
+    the size or the modification time of the file change.
+    :param file_path: local file path
+    :return: manifest as dictionary
+    """
+    st = os.stat(file_path)
+    key = (str(pathlib.Path(file_path).resolve()), st.st_size, st.st_mtime_ns)
+    with _HASH_CACHE_LOCK:
+        sha256 = _HASH_CACHE.get(key)
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            while chunk := file.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with _HASH_CACHE_LOCK:
+            if len(_HASH_CACHE) >= _MAX_HASH_CACHE_SIZE:
+                _HASH_CACHE.pop(next(iter(_HASH_CACHE)))
+            _HASH_CACHE[key] = sha256
+    return {"sha256": sha256, "size": st.st_size, "mtime": st.st_mtime}
+
+
+def _manifest_path(bfs_path: bfs.path.PathLike) -> bfs.path.PathLike:
+    return bfs_path.parent / f"{bfs_path.name}{MANIFEST_SUFFIX}"
+
+
+def read_manifest(bfs_path: bfs.path.PathLike) -> dict[str, Any] | None:
+    """
+    Reads the manifest uploaded next to a file in the bucketfs.
+    :param bfs_path: path of the file in the bucketfs
+    :return: manifest, or None if there is no valid manifest
     """
     try:
-        return file_name in list(bucket)
-    except TypeError as e:
-        # SaaSBucket is not iterable, need to handle it here
-        if e.args[0].endswith("not iterable"):
-            return False
+        content = b"".join(_manifest_path(bfs_path).read())
+    except (bfs.BucketFsError, FileNotFoundError) as e:
+        if _is_missing(e):
+            return None
         raise e
+    try:
+        manifest = json.loads(content)
+    except ValueError:
+        _logger.warning("Ignoring invalid manifest of %s", bfs_path)
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def is_identical(bfs_path: bfs.path.PathLike, file_path: pathlib.Path) -> bool:
+    """
+    Checks that a file in the bucketfs has the same content as a local file,
+    comparing the hash in its manifest. Files uploaded without manifest are
+    never considered identical.
+    :param bfs_path: path of the file in the bucketfs
+    :param file_path: local file path
+    :return: True if the content is identical, else False
+    """
+    remote = read_manifest(bfs_path)
+    if remote is None:
+        return False
+    local = file_manifest(file_path)
+    return (
+        remote.get("sha256") == local["sha256"] and remote.get("size") == local["size"]
+    )
+
+
+def write_manifest(
+    bfs_path: bfs.path.PathLike,
+    file_path: pathlib.Path,
+    extra: dict[str, Any] | None = None,
+) -> None:
+    """
+    Uploads the manifest of a local file next to the file in the bucketfs.
+    :param bfs_path: path of the file in the bucketfs
+    :param file_path: local file path which has been uploaded to bfs_path.
+    :param extra: additional entries of the manifest, e.g. the source the
+        file has been downloaded from.
+    """
+    manifest = json.dumps({**file_manifest(file_path), **(extra or {})}).encode()
+    _manifest_path(bfs_path).write(manifest)
+
+
+def upload_file(
+    bfs_path: bfs.path.PathLike,
+    file_path: pathlib.Path,
+    skip_if_identical: bool = True,
+) -> bool:
+    """
+    Uploads a local file into bucketfs, followed by its manifest.
+    :param bfs_path: path of the file in the bucketfs
+    :param file_path: local file path to upload.
+    :param skip_if_identical: Do not upload if the file in the bucketfs has
+        the same content according to its manifest.
+    :return: True if the file has been uploaded, False if it was skipped.
+    """
+    if skip_if_identical and is_identical(bfs_path, file_path):
+        _logger.info("File %s is already present in the bucketfs", bfs_path.name)
+        return False
+    _logger.info("Uploading file %s to bucketfs", bfs_path.name)
+    upload_to_bucketfs(bfs_path, file_path)
+    write_manifest(bfs_path, file_path)
+    return True
 
 
 def put_file(
-    bucket: bfs.Bucket, file_path: pathlib.Path, skip_if_exists: bool = True
+    bucket: bfs.BucketLike, file_path: pathlib.Path, skip_if_exists: bool = True
 ) -> bfs.path.BucketPath:
     """
     Uploads given file into bucketfs
     :param bucket: bucket to use
     :param file_path: local file path to uplaod. File have to exist.
-    :param skip_if_exists: Do not upload if file already present in the bucketfs.
+    :param skip_if_exists: Do not upload if the same file is already present
+        in the bucketfs, comparing the hash in the manifest uploaded with the
+        file.
     :return: Path in the bucketfs.
     """
     if not file_path.exists():
         raise ValueError(f"Local file doesn't exist: {file_path}")
-    local_name = file_path.name
-    if skip_if_exists and _file_in_bucket(local_name, bucket):
-        _logger.info("File %s is already present in the bucketfs", local_name)
-    else:
-        _logger.info("Uploading file %s to bucketfs", local_name)
-        with file_path.open("rb") as file:
-            bucket.upload(local_name, file)
-    return bfs.path.BucketPath(local_name, bucket)
+    bfs_path = bfs.path.BucketPath(file_path.name, bucket)
+    upload_file(bfs_path, file_path, skip_if_identical=skip_if_exists)
+    return bfs_path
+
+
+@dataclass(frozen=True)
+class SyncStats:
+    """
+    Progress of synchronizing a directory: the number of files in the local
+    directory, the names of the files uploaded and skipped so far, the bytes
+    uploaded, and the duration in seconds.
+    """
+
+    files: int
+    uploaded: list[str]
+    skipped: list[str]
+    bytes: int
+    seconds: float
+
+    @property
+    def done(self) -> int:
+        return len(self.uploaded) + len(self.skipped)
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+def sync_dir(
+    local_dir: str | pathlib.Path,
+    bfs_location: bfs.path.PathLike,
+    workers: int = DEFAULT_SYNC_WORKERS,
+    progress: Callable[[SyncStats], None] | None = None,
+) -> SyncStats:
+    """
+    Uploads the files in a local directory tree, which are new or changed,
+    into the bucketfs, keeping the relative paths. Unchanged files are
+    detected by comparing the hash in the manifest uploaded with each file,
+    see upload_file(). The files are streamed from the disk by a pool of
+    threads, so that at most one chunk per worker is held in memory. Larger
+    files are started first.
+
+    Files in the bucketfs which don't exist locally are kept.
+    :param local_dir: local directory to upload.
+    :param bfs_location: directory in the bucketfs, e.g.
+        open_bucketfs_location(conf) / "models".
+    :param workers: max. number of files uploaded concurrently.
+    :param progress: called in the calling thread after each file, with the
+        progress so far.
+    :return: Statistics of the synchronization.
+    """
+    local_dir = pathlib.Path(local_dir)
+    if not local_dir.is_dir():
+        raise ValueError(f"Local directory doesn't exist: {local_dir}")
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers: {workers}")
+    sizes = {
+        path: path.stat().st_size for path in local_dir.rglob("*") if path.is_file()
+    }
+    files = sorted(sizes, key=sizes.__getitem__, reverse=True)
+
+    def sync(file_path: pathlib.Path) -> tuple[str, bool]:
+        name = file_path.relative_to(local_dir).as_posix()
+        return name, upload_file(bfs_location / name, file_path)
+
+    uploaded: list[str] = []
+    skipped: list[str] = []
+    uploaded_bytes = 0
+    start = time.monotonic()
+
+    def stats() -> SyncStats:
+        return SyncStats(
+            files=len(files),
+            uploaded=list(uploaded),
+            skipped=list(skipped),
+            bytes=uploaded_bytes,
+            seconds=time.monotonic() - start,
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="bfs-sync"
+    ) as executor:
+        futures = {executor.submit(sync, path): path for path in files}
+        try:
+            for future in as_completed(futures):
+                name, done = future.result()
+                if done:
+                    uploaded.append(name)
+                    uploaded_bytes += sizes[futures[future]]
+                else:
+                    skipped.append(name)
+                if progress:
+                    progress(stats())
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+    result = stats()
+    _logger.info(
+        "Synchronized %s: %d files uploaded, %d skipped, %.1f MB/s",
+        local_dir,
+        len(uploaded),
+        len(skipped),
+        result.megabytes_per_second,
+    )
+    return result
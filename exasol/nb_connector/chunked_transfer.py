@@ -0,0 +1,377 @@
+"""
+Streaming transfers of large files, e.g. script language containers and
+model archives, in bounded memory. Transient network failures are retried,
+downloads are resumed from the last byte received.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+import exasol.bucketfs as bfs
+import requests
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Number of consecutive failures retried before giving up. A failure after
+# receiving or sending further data doesn't count as consecutive.
+DEFAULT_RETRIES = 5
+
+# Seconds to wait for the server to connect or to send the next data.
+DEFAULT_TIMEOUT = 60.0
+
+# Seconds before the first retry, doubled with each consecutive failure.
+_BACKOFF = 1.0
+_MAX_BACKOFF = 30.0
+
+STAGING_SUFFIX = ".part"
+
+# Suffix of the file next to the staging file, holding the ETag or the date
+# of the last modification of the downloaded file.
+_VALIDATOR_SUFFIX = ".validator"
+
+Compression = Literal["gzip", "zstd"]
+
+_COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+TransferProgress = Callable[[int, int | None], None]
+"""
+Called with the number of bytes transferred so far and the total number of
+bytes, if known.
+"""
+
+_CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-\d+|\*)/(\d+|\*)")
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Checks if a failed request may succeed when retried: connection
+    problems, timeouts, and errors of the server.
+    """
+    if isinstance(error, bfs.BucketFsError) and isinstance(error.__cause__, Exception):
+        return _is_transient(error.__cause__)
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return response is not None and (
+            response.status_code >= 500 or response.status_code == 429
+        )
+    return isinstance(
+        error,
+        (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ),
+    )
+
+
+def _backoff(failures: int) -> float:
+    return min(_BACKOFF * 2 ** (failures - 1), _MAX_BACKOFF)
+
+
+def _content_range(response: requests.Response) -> tuple[int | None, int | None]:
+    """Returns the first byte and the total size in the Content-Range header."""
+    match = _CONTENT_RANGE.fullmatch(response.headers.get("Content-Range", ""))
+    if not match:
+        return None, None
+    first, total = match.groups()
+    return (
+        int(first) if first is not None else None,
+        int(total) if total != "*" else None,
+    )
+
+
+def _staging_path(url: str, target: Path) -> Path:
+    # The hash of the URL avoids resuming the download of another file.
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:12]
+    return target.with_name(f"{target.name}.{url_hash}{STAGING_SUFFIX}")
+
+
+def _validator(response: requests.Response) -> str | None:
+    """
+    Returns the value for an If-Range header identifying the version of the
+    response: the ETag unless it is weak, or else the date of the last
+    modification.
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def download_url(
+    url: str,
+    target: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    timeout: float = DEFAULT_TIMEOUT,
+    progress: TransferProgress | None = None,
+    headers: dict[str, str] | None = None,
+) -> int:
+    """
+    Downloads a file via HTTP in chunks of fixed size. The chunks are
+    written to a staging file next to the target, which is renamed to the
+    target when the download is complete.
+
+    If the connection fails, then the download is resumed from the end of
+    the staging file by a range request. This also applies to a staging file
+    left by an earlier call, e.g. before the kernel was restarted. The range
+    request includes the ETag or the date of the last modification of the
+    first response, so that the server sends the whole file if it has
+    changed since. Without either, or if the server doesn't support range
+    requests, the download starts from the beginning once more.
+
+    Parameters:
+        url:
+            URL of the file.
+        target:
+            Local path of the downloaded file.
+        chunk_size:
+            Number of bytes held in memory.
+        retries:
+            Number of consecutive failures retried before giving up.
+        timeout:
+            Seconds to wait for the server to connect or to send the next data.
+        progress:
+            Called after each chunk with the number of bytes downloaded and
+            the size of the file, if known.
+        headers:
+            Additional HTTP headers, e.g. for authorization.
+    :return: Size of the downloaded file in bytes.
+    """
+    target = Path(target)
+    staging = _staging_path(url, target)
+    validator_file = staging.with_name(staging.name + _VALIDATOR_SUFFIX)
+    validator = validator_file.read_text() if validator_file.exists() else None
+    failures = 0
+    while True:
+        if validator is None:
+            # The staging file can't be checked against the file on the server.
+            staging.unlink(missing_ok=True)
+        offset = staging.stat().st_size if staging.exists() else 0
+        start = offset
+        request_headers = dict(headers or {})
+        if offset and validator:
+            request_headers["Range"] = f"bytes={offset}-"
+            request_headers["If-Range"] = validator
+        try:
+            with requests.get(
+                url, stream=True, timeout=timeout, headers=request_headers
+            ) as response:
+                first, total = _content_range(response)
+                if offset and response.status_code == 416:
+                    if total == offset:
+                        break
+                    # The file has changed since the staging file was written.
+                    staging.unlink()
+                    continue
+                response.raise_for_status()
+                if (
+                    response.status_code != 206
+                    or first != offset
+                    or _validator(response) not in (None, validator)
+                ):
+                    offset = 0
+                    content_length = response.headers.get("Content-Length")
+                    total = int(content_length) if content_length else None
+                    validator = _validator(response)
+                    if validator:
+                        validator_file.write_text(validator)
+                    else:
+                        validator_file.unlink(missing_ok=True)
+                elif offset:
+                    _logger.info("Resuming download of %s at byte %d", url, offset)
+                with staging.open("ab" if offset else "wb") as file:
+                    for chunk in response.iter_content(chunk_size):
+                        file.write(chunk)
+                        offset += len(chunk)
+                        if progress:
+                            progress(offset, total)
+                if total is not None and offset < total:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Received {offset} of {total} bytes"
+                    )
+            break
+        except requests.RequestException as ex:
+            failures = 1 if offset > start else failures + 1
+            if not _is_transient(ex) or failures > retries:
+                raise
+            delay = _backoff(failures)
+            _logger.warning(
+                "Download of %s failed at byte %d, retrying in %.0f s: %s",
+                url,
+                offset,
+                delay,
+                ex,
+            )
+            time.sleep(delay)
+    os.replace(staging, target)
+    validator_file.unlink(missing_ok=True)
+    _logger.info("Saved %d bytes in %s", offset, target)
+    return offset
+
+
+def url_version(
+    url: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    headers: dict[str, str] | None = None,
+) -> str | None:
+    """
+    Returns the version of the file at the URL as reported by the server in
+    response to a HEAD request: the ETag, or else the date of the last
+    modification and the size. Comparing the version with the one of an
+    earlier download tells if the file needs to be downloaded again.
+
+    Parameters:
+        url:
+            URL of the file.
+        timeout:
+            Seconds to wait for the server.
+        headers:
+            Additional HTTP headers, e.g. for authorization.
+    :return: The version, or None if the server reports neither an ETag nor
+        the date of the last modification, or if the request fails.
+    """
+    try:
+        response = requests.head(
+            url, allow_redirects=True, timeout=timeout, headers=headers
+        )
+        response.raise_for_status()
+    except requests.RequestException as ex:
+        _logger.debug("Failed to get the version of %s: %s", url, ex)
+        return None
+    etag = response.headers.get("ETag")
+    if etag:
+        return etag
+    modified = response.headers.get("Last-Modified")
+    if modified:
+        return f"{modified}; {response.headers.get('Content-Length')}"
+    return None
+
+
+class _ProgressReader(io.RawIOBase):
+    """Reads a local file, reporting the number of bytes read."""
+
+    def __init__(self, file: io.FileIO, total: int, progress: TransferProgress):
+        self._file = file
+        self._total = total
+        self._progress = progress
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int | None:
+        count = self._file.readinto(buffer)
+        if count:
+            self._progress(self._file.tell(), self._total)
+        return count
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+def _compress(source: Path, target: Path, compression: Compression) -> None:
+    with source.open("rb") as src:
+        if compression == "gzip":
+            with gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, DEFAULT_CHUNK_SIZE)
+        elif compression == "zstd":
+            import pyarrow as pa
+
+            with pa.CompressedOutputStream(str(target), "zstd") as dst:
+                shutil.copyfileobj(src, dst, DEFAULT_CHUNK_SIZE)
+        else:
+            raise ValueError(f"Unsupported compression {compression}.")
+
+
+def upload_to_bucketfs(
+    bfs_path: bfs.path.PathLike,
+    file_path: str | Path,
+    compression: Compression | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    progress: TransferProgress | None = None,
+) -> int:
+    """
+    Uploads a local file into the bucketfs, streaming it from the disk in
+    chunks of fixed size. The BucketFS doesn't support partial uploads, so
+    a failed upload is retried from the beginning of the file.
+
+    With compression, the file is first compressed into a local staging
+    file, which is then uploaded, so that a retry doesn't compress the file
+    once more. The compressed file is stored in the given bfs_path, which
+    should have a matching suffix, e.g. ".tar.gz" to let the BucketFS
+    unpack a tar archive.
+
+    Parameters:
+        bfs_path:
+            Path of the file in the bucketfs.
+        file_path:
+            Local path of the file to upload.
+        compression:
+            Either "gzip", or "zstd" which requires pyarrow.
+        chunk_size:
+            Number of bytes read from the disk at once.
+        retries:
+            Number of failed uploads retried before giving up.
+        progress:
+            Called after each chunk with the number of bytes uploaded and
+            the size of the uploaded file.
+    :return: Number of bytes uploaded.
+    """
+    if compression is not None and compression not in _COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression {compression}.")
+    file_path = Path(file_path)
+    with contextlib.ExitStack() as stack:
+        source = file_path
+        if compression:
+            tmp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            source = Path(tmp_dir) / (
+                file_path.name + _COMPRESSION_SUFFIXES[compression]
+            )
+            _compress(file_path, source, compression)
+        total = source.stat().st_size
+        failures = 0
+        while True:
+            try:
+                with source.open("rb", buffering=0) as raw:
+                    reader: io.RawIOBase = (
+                        _ProgressReader(raw, total, progress) if progress else raw
+                    )
+                    bfs_path.write(io.BufferedReader(reader, chunk_size))
+                return total
+            except (bfs.BucketFsError, requests.RequestException) as ex:
+                failures += 1
+                if not _is_transient(ex) or failures > retries:
+                    raise
+                delay = _backoff(failures)
+                _logger.warning(
+                    "Upload of %s failed, retrying in %.0f s: %s",
+                    bfs_path.name,
+                    delay,
+                    ex,
+                )
+                time.sleep(delay)
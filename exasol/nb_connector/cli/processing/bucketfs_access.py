@@ -1,14 +1,18 @@
+from __future__ import annotations
+
 import random
 import string
 import traceback
-
-import exasol.bucketfs as bfs
+from typing import TYPE_CHECKING
 
 import exasol.nb_connector.cli.reporting as report
 from exasol.nb_connector.cli.processing.option_set import ScsCliError
 from exasol.nb_connector.connections import open_bucketfs_location
 from exasol.nb_connector.secret_store import Secrets
 
+if TYPE_CHECKING:
+    import exasol.bucketfs as bfs
+
 
 def random_string(length: int = 10) -> str:
     return "".join(random.choice(string.ascii_uppercase) for _ in range(length))
@@ -30,6 +34,8 @@ def files_in(bfsloc: bfs.path.PathLike) -> list[bfs.path.PathLike]:
 
 
 def verify_bucketfs_access(scs: Secrets) -> None:
+    import exasol.bucketfs as bfs
+
     bfs_root = open_bucketfs_location(scs)
     existing = [f.name for f in files_in(bfs_root)]
     file = bfs_root / random_file_name(other_than=existing)
@@ -8,6 +8,7 @@ from typing import Any
 
 import click
 
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.ai_lab_config import StorageBackend
 from exasol.nb_connector.cli import reporting as report
 from exasol.nb_connector.cli.param_wrappers import ScsSecretOption
@@ -48,6 +49,9 @@ def save(
     values[SELECT_BACKEND_OPTION.arg_name] = backend.name
     values[USE_ITDE_OPTION.arg_name] = use_itde
     values.update(options.default_values(values))
+    # Collect all entries before saving them in a single transaction, to
+    # avoid locking the SCS while prompting for secrets.
+    entries: dict[CKey, str] = {}
     for arg_name, value in values.items():
         if value is None:
             continue
@@ -56,10 +60,11 @@ def save(
             continue
         if not isinstance(option, ScsSecretOption):
             content = value.value if isinstance(value, Enum) else str(value)
-            scs.save(option.scs_key, content)
+            entries[option.scs_key] = content
             continue
         if secret := option.get_secret(interactive=bool(value)):
-            scs.save(option.scs_key, secret)
+            entries[option.scs_key] = secret
+    scs.save_many(entries)
 
 
 def verify_connection(scs: Secrets) -> None:
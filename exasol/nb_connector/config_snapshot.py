@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections.abc import (
+    Iterable,
+    Mapping,
+)
+from typing import Any
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.ai_lab_config import StorageBackend
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.utils import optional_str_to_bool
+
+_BOOLEAN_KEYS = (
+    CKey.use_itde,
+    CKey.db_encryption,
+    CKey.cert_vld,
+    CKey.bfs_encryption,
+)
+
+_PORT_KEYS = (
+    CKey.db_port,
+    CKey.bfs_port,
+    CKey.bfs_internal_port,
+)
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+class ConfigSnapshot:
+    """
+    Immutable copy of the configuration, e.g. read from a secret store
+    using Secrets.snapshot().
+
+    Each key of AILabConfig is available as an attribute with its value
+    already parsed, e.g. ports as int, flags as bool, and the storage
+    backend as StorageBackend. Missing values are None.
+
+    Methods get(), keys(), values(), items(), and the subscript operator
+    provide the original string values of all entries, including entries
+    with keys not defined in AILabConfig, like class Secrets does.
+
+    Invalid boolean or integer values raise a ValueError when creating the
+    snapshot.
+    """
+
+    _values: dict[str, str]
+    use_itde: bool | None
+    db_host_name: str | None
+    db_port: int | None
+    db_schema: str | None
+    db_user: str | None
+    db_password: str | None
+    db_encryption: bool | None
+    cert_vld: bool | None
+    trusted_ca: str | None
+    client_cert: str | None
+    client_key: str | None
+    bfs_host_name: str | None
+    bfs_port: int | None
+    bfs_internal_host_name: str | None
+    bfs_internal_port: int | None
+    bfs_service: str | None
+    bfs_bucket: str | None
+    bfs_user: str | None
+    bfs_password: str | None
+    bfs_encryption: bool | None
+    mem_size: str | None
+    disk_size: str | None
+    huggingface_token: str | None
+    aws_region: str | None
+    aws_access_key_id: str | None
+    aws_secret_access_key: str | None
+    itde_container: str | None
+    itde_volume: str | None
+    itde_network: str | None
+    te_hf_connection: str | None
+    te_models_cache_dir: str | None
+    txaie_models_cache_dir: str | None
+    saas_url: str | None
+    saas_token: str | None
+    saas_account_id: str | None
+    saas_database_id: str | None
+    saas_database_name: str | None
+    storage_backend: StorageBackend
+    accelerator: str | None
+    bfs_model_subdir: str | None
+    bfs_connection_name: str | None
+
+    __slots__ = ("_values", *(key.name for key in CKey))
+
+    def __init__(self, entries: Iterable[tuple[str, str]] | Mapping[str, str]) -> None:
+        values = dict(entries.items() if isinstance(entries, Mapping) else entries)
+        set_attr = super().__setattr__
+        set_attr("_values", values)
+        for key in CKey:
+            set_attr(key.name, values.get(key.name))
+        for key in _BOOLEAN_KEYS:
+            set_attr(key.name, optional_str_to_bool(values.get(key.name)))
+        for key in _PORT_KEYS:
+            set_attr(key.name, _optional_int(values.get(key.name)))
+        backend = values.get(CKey.storage_backend.name, StorageBackend.onprem.name)
+        set_attr(CKey.storage_backend.name, StorageBackend[backend])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def get(self, key: str | CKey, default_value: str | None = None) -> str | None:
+        key = key.name if isinstance(key, CKey) else key
+        return self._values.get(key, default_value)
+
+    def __getitem__(self, item: str | CKey) -> str:
+        val = self.get(item)
+        if val is None:
+            raise AttributeError(f'Unknown key "{item}"')
+        return val
+
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        return (k for k in self._values if k.startswith(prefix))
+
+    def values(self, prefix: str = "") -> Iterable[str]:
+        return (v for k, v in self._values.items() if k.startswith(prefix))
+
+    def items(self, prefix: str = "") -> Iterable[tuple[str, str]]:
+        return ((k, v) for k, v in self._values.items() if k.startswith(prefix))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(keys={sorted(self._values)})"
+
+
+def optional_bool(conf: ConfigReader, key: CKey) -> bool | None:
+    """
+    Reads a boolean value from any configuration store or snapshot. Saves
+    parsing the value for the flags the snapshot already holds as bool.
+    """
+    if isinstance(conf, ConfigSnapshot) and key in _BOOLEAN_KEYS:
+        return getattr(conf, key.name)
+    return optional_str_to_bool(conf.get(key))
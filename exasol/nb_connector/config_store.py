@@ -0,0 +1,189 @@
+"""
+Configuration stores without encryption, e.g. for batch jobs and CI
+pipelines, avoiding the cost of the key derivation of the Secure
+Configuration Storage (SCS) at startup.
+
+All stores implement protocol ConfigStore, like class Secrets does.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from collections.abc import (
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+)
+from pathlib import Path
+from typing import (
+    Protocol,
+    TypeVar,
+)
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+
+KeyT = TypeVar("KeyT", bound="str | CKey")
+
+DEFAULT_ENV_PREFIX = "AI_LAB_"
+
+
+class ConfigReader(Protocol):
+    """
+    Read access to the configuration, e.g. a ConfigStore or a
+    ConfigSnapshot.
+    """
+
+    def get(self, key: str | CKey, default_value: str | None = None) -> str | None:
+        """Returns the value of the key or the default value if not found."""
+
+    def __getitem__(self, item: str | CKey) -> str:
+        """Returns the value of the key or raises an AttributeError if not found."""
+
+    def keys(self, prefix: str = "") -> Iterable[str]: ...
+
+    def values(self, prefix: str = "") -> Iterable[str]: ...
+
+    def items(self, prefix: str = "") -> Iterable[tuple[str, str]]: ...
+
+
+class ConfigStore(ConfigReader, Protocol):
+    """
+    Read and write access to the configuration, e.g. Secrets, MemoryStore,
+    EnvironmentStore, or JsonFileStore.
+    """
+
+    def save(self, key: str | CKey, value: str) -> ConfigStore: ...
+
+    def save_many(self, entries: Mapping[KeyT, str]) -> ConfigStore: ...
+
+    def remove(self, key: str | CKey) -> None: ...
+
+    def remove_many(self, keys: Iterable[str | CKey]) -> None: ...
+
+
+def _key_name(key: str | CKey) -> str:
+    return key.name if isinstance(key, CKey) else key
+
+
+class MemoryStore:
+    """
+    Keeps the configuration in memory only.
+    """
+
+    def __init__(self, entries: Mapping[KeyT, str] | None = None) -> None:
+        self._data: MutableMapping[str, str] = {}
+        for key, value in (entries or {}).items():
+            self._data[_key_name(key)] = value
+
+    def _changed(self) -> None:
+        """Called after each change, allowing subclasses to persist the data."""
+
+    def save(self, key: str | CKey, value: str) -> MemoryStore:
+        self._data[_key_name(key)] = value
+        self._changed()
+        return self
+
+    def save_many(self, entries: Mapping[KeyT, str]) -> MemoryStore:
+        for key, value in entries.items():
+            self._data[_key_name(key)] = value
+        self._changed()
+        return self
+
+    def get(self, key: str | CKey, default_value: str | None = None) -> str | None:
+        return self._data.get(_key_name(key), default_value)
+
+    def __getitem__(self, item: str | CKey) -> str:
+        val = self.get(item)
+        if val is None:
+            raise AttributeError(f'Unknown key "{item}"')
+        return val
+
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        return [k for k in self._data if k.startswith(prefix)]
+
+    def values(self, prefix: str = "") -> Iterable[str]:
+        return [v for k, v in self._data.items() if k.startswith(prefix)]
+
+    def items(self, prefix: str = "") -> Iterable[tuple[str, str]]:
+        return [(k, v) for k, v in self._data.items() if k.startswith(prefix)]
+
+    def remove(self, key: str | CKey) -> None:
+        self._data.pop(_key_name(key), None)
+        self._changed()
+
+    def remove_many(self, keys: Iterable[str | CKey]) -> None:
+        for key in keys:
+            self._data.pop(_key_name(key), None)
+        self._changed()
+
+
+class _EnvironmentMapping(MutableMapping[str, str]):
+    """
+    Maps key "db_host_name" to environment variable "AI_LAB_DB_HOST_NAME",
+    for example.
+    """
+
+    def __init__(self, prefix: str) -> None:
+        self._prefix = prefix
+
+    def _variable(self, key: str) -> str:
+        return self._prefix + key.upper()
+
+    def __getitem__(self, key: str) -> str:
+        return os.environ[self._variable(key)]
+
+    def __setitem__(self, key: str, value: str) -> None:
+        os.environ[self._variable(key)] = value
+
+    def __delitem__(self, key: str) -> None:
+        del os.environ[self._variable(key)]
+
+    def __iter__(self) -> Iterator[str]:
+        size = len(self._prefix)
+        names = [name for name in os.environ if name.startswith(self._prefix)]
+        return (name[size:].lower() for name in names)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class EnvironmentStore(MemoryStore):
+    """
+    Reads the configuration from environment variables, e.g. key
+    "db_host_name" from variable "AI_LAB_DB_HOST_NAME". Keys are
+    case-insensitive.
+
+    Saved values are visible to the current process and to subprocesses
+    started afterwards only.
+    """
+
+    def __init__(self, prefix: str = DEFAULT_ENV_PREFIX) -> None:
+        super().__init__()
+        self._data = _EnvironmentMapping(prefix)
+
+
+class JsonFileStore(MemoryStore):
+    """
+    Keeps the configuration as a JSON object in an unencrypted file. The
+    file is read once on creation of the store and rewritten after each
+    change.
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self.path = path
+        if path.exists():
+            self._data = json.loads(path.read_text())
+
+    def _changed(self) -> None:
+        # Write to a temporary file first, to avoid leaving a corrupt file
+        # behind in case of an error.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.path.parent, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(f.name, self.path)
@@ -0,0 +1,227 @@
+"""
+Pool of pyexasol connections, reused by subsequent calls with the same
+connection parameters.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+)
+
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.connections import (
+    connect_pyexasol,
+    connection_fingerprint,
+    open_pyexasol_connection,
+    pyexasol_connection_params,
+)
+from exasol.nb_connector.warm_connections import (
+    IdleConnection,
+    close_quietly,
+    take_warm_connection,
+)
+
+if TYPE_CHECKING:
+    import pyexasol
+
+LOG = logging.getLogger(__name__)
+
+# Max. number of idle connections kept open by a PyexasolConnectionPool.
+DEFAULT_POOL_SIZE = 4
+
+# Seconds after which a PyexasolConnectionPool closes an idle connection.
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+class PyexasolConnectionPool:
+    """
+    Keeps pyexasol connections open for reuse by subsequent calls with the
+    same connection parameters. The connections are keyed by a fingerprint
+    of the parameters, resolved from the configuration and the kwargs.
+
+    Parameters:
+        max_size:
+            Max. number of idle connections kept open. Checking in another
+            connection closes the connection idle for the longest time.
+        idle_timeout:
+            Seconds after which an idle connection is closed.
+        health_check:
+            If True then the pool verifies that an idle connection still
+            works before handing it out again.
+
+    Note that the state of a session, e.g. the script languages activated
+    by ALTER SESSION, is preserved when a connection is reused.
+
+    Used as a context manager, the pool is activated for the current
+    context, see function pooled_pyexasol_connection(), and closes all
+    connections on exit.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_POOL_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        health_check: bool = True,
+    ) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self._lock = threading.Lock()
+        self._idle: list[IdleConnection] = []
+        self._checked_out: dict[int, str] = {}
+        self._closed = False
+        self._tokens: list[Any] = []
+
+    def __enter__(self) -> PyexasolConnectionPool:
+        self._tokens.append(_ACTIVE_POOL.set(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _ACTIVE_POOL.reset(self._tokens.pop())
+        self.close()
+
+    def _remove_expired(self) -> list[IdleConnection]:
+        """
+        Must be called while holding self._lock.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [c for c in self._idle if c.since < deadline]
+        excess = len(self._idle) - len(expired) - self.max_size
+        if excess > 0:
+            expired += [c for c in self._idle if c not in expired][:excess]
+        self._idle = [c for c in self._idle if c not in expired]
+        return expired
+
+    def _is_healthy(self, conn: pyexasol.ExaConnection) -> bool:
+        if conn.is_closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            LOG.debug("Discarding broken connection: %s", ex)
+            return False
+
+    def _take_idle(self, fingerprint: str) -> pyexasol.ExaConnection | None:
+        while True:
+            with self._lock:
+                expired = self._remove_expired()
+                matching = [c for c in self._idle if c.fingerprint == fingerprint]
+                if matching:
+                    self._idle.remove(matching[-1])
+            for idle in expired:
+                close_quietly(idle.conn)
+            if not matching:
+                return None
+            if self._is_healthy(matching[-1].conn):
+                return matching[-1].conn
+            close_quietly(matching[-1].conn)
+
+    def checkout(self, conf: ConfigReader, **kwargs) -> pyexasol.ExaConnection:
+        """
+        Returns an idle connection with the same parameters or opens a new
+        connection. See open_pyexasol_connection() for the parameters.
+        """
+        if self._closed:
+            raise RuntimeError("The connection pool has been closed.")
+        conn_params = pyexasol_connection_params(conf, **kwargs)
+        fingerprint = connection_fingerprint(conn_params)
+        conn = self._take_idle(fingerprint)
+        if conn is None:
+            conn = take_warm_connection(fingerprint)
+        if conn is None:
+            conn_params, conn = connect_pyexasol(conf, conn_params, **kwargs)
+            fingerprint = connection_fingerprint(conn_params)
+        with self._lock:
+            self._checked_out[id(conn)] = fingerprint
+        return conn
+
+    def checkin(self, conn: pyexasol.ExaConnection) -> None:
+        """
+        Returns a connection to the pool for reuse.
+        """
+        with self._lock:
+            fingerprint = self._checked_out.pop(id(conn), None)
+            if fingerprint is None:
+                raise ValueError(
+                    "The connection has not been checked out from this pool."
+                )
+            keep = not (self._closed or conn.is_closed)
+            if keep:
+                self._idle.append(IdleConnection(conn, fingerprint, time.monotonic()))
+            expired = self._remove_expired()
+        if not keep:
+            close_quietly(conn)
+        for idle in expired:
+            close_quietly(idle.conn)
+
+    @property
+    def idle_connections(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close(self) -> None:
+        """
+        Closes all idle connections. Connections checked out currently
+        will be closed on checkin.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for c in idle:
+            close_quietly(c.conn)
+
+
+_ACTIVE_POOL: ContextVar[PyexasolConnectionPool | None] = ContextVar(
+    "active_pyexasol_pool", default=None
+)
+
+
+@contextlib.contextmanager
+def pyexasol_connection_pool(**kwargs) -> Iterator[PyexasolConnectionPool]:
+    """
+    Activates a new PyexasolConnectionPool for the current context, unless
+    a pool is already active. The kwargs are passed to the constructor of
+    the pool.
+
+    Within the context, all calls of pooled_pyexasol_connection() with the
+    same configuration and parameters reuse the same connection.
+    """
+    if active := _ACTIVE_POOL.get():
+        yield active
+        return
+    with PyexasolConnectionPool(**kwargs) as pool:
+        yield pool
+
+
+@contextlib.contextmanager
+def pooled_pyexasol_connection(
+    conf: ConfigReader, **kwargs
+) -> Iterator[pyexasol.ExaConnection]:
+    """
+    Provides a pyexasol connection from the active connection pool and
+    returns it to the pool on exit. If there is no active pool, then opens
+    a new connection and closes it on exit.
+
+    The parameters are the same as for open_pyexasol_connection().
+    """
+    pool = _ACTIVE_POOL.get()
+    if pool is None:
+        with open_pyexasol_connection(conf, **kwargs) as conn:
+            yield conn
+        return
+    conn = pool.checkout(conf, **kwargs)
+    try:
+        yield conn
+    finally:
+        pool.checkin(conn)
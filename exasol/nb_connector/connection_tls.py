@@ -0,0 +1,209 @@
+"""
+TLS options and SSL contexts for the connections to the database and the
+BucketFS, cached per configuration.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import ssl
+import stat
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_snapshot import optional_bool
+from exasol.nb_connector.config_store import ConfigReader
+
+LOG = logging.getLogger(__name__)
+
+# Max. number of configurations whose SSL options and contexts are cached.
+MAX_SSL_CACHE_SIZE = 16
+
+_SSL_CACHE: dict[tuple, TlsOptions] = {}
+_SSL_CACHE_LOCK = threading.Lock()
+
+# Environment variables affecting the SSL context, the ones naming files or
+# directories first, followed by SSLKEYLOGFILE.
+_ENVIRONMENT_VARIABLES = (
+    "WEBSOCKET_CLIENT_CA_BUNDLE",
+    "SSL_CERT_FILE",
+    "SSL_CERT_DIR",
+    "SSLKEYLOGFILE",
+)
+
+
+def _file_status(path: str | None) -> tuple[int, int] | None:
+    """
+    Returns the mode and the modification time of the file or directory, or
+    None if it doesn't exist.
+    """
+    if not path:
+        return None
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_mode, status.st_mtime_ns
+
+
+def _build_ssl_options(
+    certificate_validation: bool | None,
+    trusted_ca: str | None,
+    client_certificate: str | None,
+    private_key: str | None,
+    file_status: dict[str, tuple[int, int] | None],
+) -> dict[str, object]:
+    sslopt: dict[str, object] = {}
+
+    # Is server certificate validation required?
+    if certificate_validation is not None:
+        sslopt["cert_reqs"] = (
+            ssl.CERT_REQUIRED if certificate_validation else ssl.CERT_NONE
+        )
+
+    def is_file(path: str) -> bool:
+        status = file_status[path]
+        return status is not None and stat.S_ISREG(status[0])
+
+    # Is a bundle with trusted CAs provided?
+    if trusted_ca:
+        status = file_status[trusted_ca]
+        if status is not None and stat.S_ISDIR(status[0]):
+            sslopt["ca_cert_path"] = trusted_ca
+        elif is_file(trusted_ca):
+            sslopt["ca_certs"] = trusted_ca
+        else:
+            raise ValueError(f"Trusted CA location {trusted_ca} doesn't exist.")
+
+    # Is client's own certificate provided?
+    if client_certificate:
+        if not is_file(client_certificate):
+            raise ValueError(f"Certificate file {client_certificate} doesn't exist.")
+        sslopt["certfile"] = client_certificate
+        if private_key:
+            if not is_file(private_key):
+                raise ValueError(f"Private key file {private_key} doesn't exist.")
+            sslopt["keyfile"] = private_key
+
+    return sslopt
+
+
+def _build_ssl_context(sslopt: dict[str, Any]) -> ssl.SSLContext | None:
+    """
+    Builds the SSL context like the websocket-client does for the specified
+    options. Returns None if the context would not verify anything, so
+    building it is cheap anyway, or if building the context fails, leaving
+    the error to be reported when connecting.
+    """
+    cert_reqs = sslopt.get("cert_reqs", ssl.CERT_REQUIRED)
+    if cert_reqs == ssl.CERT_NONE and "certfile" not in sslopt:
+        return None
+    try:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        keylog_filename = os.environ.get("SSLKEYLOGFILE")
+        if keylog_filename:
+            context.keylog_filename = keylog_filename
+        if cert_reqs != ssl.CERT_NONE:
+            cafile = sslopt.get("ca_certs")
+            capath = sslopt.get("ca_cert_path")
+            if cafile or capath:
+                context.load_verify_locations(cafile=cafile, capath=capath)
+            else:
+                context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+        if "certfile" in sslopt:
+            context.load_cert_chain(sslopt["certfile"], sslopt.get("keyfile"))
+        if cert_reqs == ssl.CERT_NONE:
+            context.check_hostname = False
+        context.verify_mode = cert_reqs
+        return context
+    except (OSError, ValueError) as ex:
+        LOG.debug("Failed building the SSL context: %s", ex)
+        return None
+
+
+def _ca_bundle_options(
+    sslopt: dict[str, object],
+    bundle: str | None,
+    bundle_status: tuple[int, int] | None,
+) -> dict[str, object]:
+    """
+    Adds the CA bundle in the environment variable WEBSOCKET_CLIENT_CA_BUNDLE
+    to the options if they don't specify trusted CAs, as the websocket-client
+    does when it builds the SSL context itself.
+    """
+    if bundle is None or bundle_status is None:
+        return sslopt
+    if stat.S_ISREG(bundle_status[0]) and sslopt.get("ca_certs") is None:
+        return {**sslopt, "ca_certs": bundle}
+    if stat.S_ISDIR(bundle_status[0]) and sslopt.get("ca_cert_path") is None:
+        return {**sslopt, "ca_cert_path": bundle}
+    return sslopt
+
+
+def _verification(sslopt: dict[str, object]) -> bool | str:
+    trusted_ca = sslopt.get("ca_certs") or sslopt.get("ca_cert_path")
+    if trusted_ca:
+        return str(trusted_ca)
+    return sslopt.get("cert_reqs") == ssl.CERT_REQUIRED
+
+
+@dataclass(frozen=True)
+class TlsOptions:
+    """
+    The TLS settings of a configuration in the formats of the clients.
+
+    Parameters:
+        sslopt:
+            The SSL options in the websocket-client format, see
+            https://websocket-client.readthedocs.io/en/latest/faq.html#what-else-can-i-do-with-sslopts.
+            Shared by all callers, must not be modified.
+        context:
+            The SSL context for the options, or None if the websocket-client
+            can build it cheaply itself.
+        verify:
+            The argument "verify" of the requests library, i.e. the path of
+            the trusted CAs or whether to verify the server certificate.
+    """
+
+    sslopt: dict[str, object]
+    context: ssl.SSLContext | None
+    verify: bool | str
+
+
+def tls_options(conf: ConfigReader) -> TlsOptions:
+    """
+    Returns the TLS options for the configuration. They are cached, keyed by
+    the SSL settings in the configuration, the environment variables
+    affecting the trusted CAs, and the status of the referenced files.
+    Hence, the files are read again only if they are modified.
+    """
+    settings = (
+        optional_bool(conf, CKey.cert_vld),
+        conf.get(CKey.trusted_ca),
+        conf.get(CKey.client_cert),
+        conf.get(CKey.client_key),
+    )
+    paths = [path for path in settings[1:] if path]
+    file_status = {path: _file_status(path) for path in paths}
+    env = tuple(os.environ.get(name) for name in _ENVIRONMENT_VARIABLES)
+    env_status = {path: _file_status(path) for path in env[:-1] if path}
+    key = (settings, tuple(file_status.items()), env, tuple(env_status.items()))
+    with _SSL_CACHE_LOCK:
+        cached = _SSL_CACHE.get(key)
+    if cached is not None:
+        return cached
+    sslopt = _build_ssl_options(*settings, file_status)
+    context = None
+    if sslopt:
+        bundle = env[0]
+        bundle_status = env_status.get(bundle) if bundle else None
+        context = _build_ssl_context(_ca_bundle_options(sslopt, bundle, bundle_status))
+    result = TlsOptions(sslopt, context, _verification(sslopt))
+    with _SSL_CACHE_LOCK:
+        if len(_SSL_CACHE) >= MAX_SSL_CACHE_SIZE:
+            _SSL_CACHE.clear()
+        _SSL_CACHE[key] = result
+    return result
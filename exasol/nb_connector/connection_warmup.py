@@ -0,0 +1,144 @@
+"""
+Opening the connections to the database and the BucketFS in the background
+or concurrently, saving the time of the first call in a notebook.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import (
+    TYPE_CHECKING,
+    Any,
+)
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.ai_lab_config import StorageBackend
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.connections import (
+    JUPYSQL_ENGINE_OPTIONS,
+    connect_pyexasol,
+    connection_fingerprint,
+    get_backend,
+    get_saas_database_id,
+    open_bucketfs_location,
+    open_pyexasol_connection,
+    open_sqlalchemy_connection,
+    pyexasol_connection_params,
+)
+from exasol.nb_connector.warm_connections import (
+    IdleConnection,
+    reserve_warm_connection,
+)
+
+if TYPE_CHECKING:
+    import exasol.bucketfs as bfs
+    import pyexasol
+
+LOG = logging.getLogger(__name__)
+
+
+def _warm_up_pyexasol(conf: ConfigReader, **kwargs) -> None:
+    conn_params = pyexasol_connection_params(conf, **kwargs)
+    fingerprint = connection_fingerprint(conn_params)
+    future = reserve_warm_connection(fingerprint)
+    if future is None:
+        return
+    try:
+        _, conn = connect_pyexasol(conf, conn_params, **kwargs)
+    except BaseException as ex:
+        future.set_exception(ex)
+        raise
+    future.set_result(IdleConnection(conn, fingerprint, time.monotonic()))
+
+
+def _warm_up_sqlalchemy(conf: ConfigReader) -> None:
+    # The engine cache is keyed by the options, so warming up any other
+    # engine than the one used by JupySQL would be in vain.
+    engine = open_sqlalchemy_connection(conf, **JUPYSQL_ENGINE_OPTIONS)
+    # Returning the connection keeps it open in the pool of the engine.
+    with engine.connect():
+        pass
+
+
+def warm_up(
+    conf: ConfigReader,
+    pyexasol_connection: bool = True,
+    sqlalchemy_engine: bool = True,
+    bucketfs_location: bool = True,
+    **kwargs,
+) -> threading.Thread | None:
+    """
+    Prepares the connections to the database in a background thread, saving
+    the time of the first call in a notebook. Resolves the SaaS database id
+    and connection parameters, opens a pyexasol connection, opens a
+    connection in the pool of the engine used by JupySQL, i.e. returned by
+    open_sqlalchemy_connection() with JUPYSQL_ENGINE_OPTIONS, and creates
+    the BucketFS location, importing the required libraries.
+
+    The pyexasol connection is handed to the first call of
+    open_pyexasol_connection() or PyexasolConnectionPool.checkout() with the
+    same configuration and kwargs. If the connection is still being opened,
+    then the call waits for it. If not taken within
+    warm_connections.WARM_CONNECTION_TIMEOUT seconds, then the connection is
+    discarded.
+
+    Failures are logged and otherwise ignored, the first call using the
+    connection will report them.
+
+    Returns the started thread, or None if the configuration does not
+    specify a database yet.
+    """
+    if get_backend(conf) == StorageBackend.onprem:
+        configured = conf.get(CKey.db_host_name)
+    else:
+        configured = conf.get(CKey.saas_url)
+    if not configured:
+        return None
+
+    steps: list[tuple[str, Callable[[], Any]]] = []
+    if get_backend(conf) == StorageBackend.saas:
+        steps.append(("SaaS database id", lambda: get_saas_database_id(conf)))
+    if pyexasol_connection:
+        steps.append(("pyexasol", lambda: _warm_up_pyexasol(conf, **kwargs)))
+    if sqlalchemy_engine:
+        steps.append(("SQLAlchemy", lambda: _warm_up_sqlalchemy(conf)))
+    if bucketfs_location:
+        steps.append(("BucketFS", lambda: open_bucketfs_location(conf)))
+
+    def run() -> None:
+        for name, step in steps:
+            try:
+                step()
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                LOG.debug("Warm-up of %s failed: %s", name, ex)
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+async def open_pyexasol_connection_async(
+    conf: ConfigReader, **kwargs
+) -> pyexasol.ExaConnection:
+    """
+    Opens a pyexasol connection in a worker thread, allowing to open other
+    connections or to run other setup steps concurrently, e.g. with
+    asyncio.gather(). See open_pyexasol_connection() for the parameters.
+
+    The connection itself is synchronous. Use asyncio.to_thread() to run
+    long statements without blocking the event loop.
+    """
+    return await asyncio.to_thread(open_pyexasol_connection, conf, **kwargs)
+
+
+async def open_bucketfs_location_async(conf: ConfigReader) -> bfs.path.PathLike:
+    """
+    Creates the BucketFS location in a worker thread, see
+    open_bucketfs_location(). For SaaS, this includes resolving the
+    database id.
+    """
+    return await asyncio.to_thread(open_bucketfs_location, conf)
@@ -1,87 +1,82 @@
 from __future__ import annotations
 
-import ssl
+import hashlib
+import json
+import logging
+import threading
 import warnings
-from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
 )
 
-import exasol.bucketfs as bfs
-import exasol.saas.client.api_access as saas_api
-import ibis
-import pyexasol
-import sqlalchemy
-from sqlalchemy.engine.url import URL
-
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.ai_lab_config import StorageBackend
-from exasol.nb_connector.secret_store import Secrets
-from exasol.nb_connector.utils import optional_str_to_bool
+from exasol.nb_connector.config_snapshot import (
+    ConfigSnapshot,
+    optional_bool,
+)
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.connection_tls import tls_options
+from exasol.nb_connector.saas_cache import SAAS_CACHE
+from exasol.nb_connector.warm_connections import (
+    has_warm_connections,
+    take_warm_connection,
+)
+
+# The backends are imported by the functions using them, saving their import
+# time for callers not needing all of them, e.g. the CLI.
+if TYPE_CHECKING:
+    import exasol.bucketfs as bfs
+    import pyexasol
+    from sqlalchemy.engine import Engine
 
+LOG = logging.getLogger(__name__)
 
-def _optional_encryption(conf: Secrets, key: CKey = CKey.db_encryption) -> bool | None:
-    return optional_str_to_bool(conf.get(key))
+# Engines cached by open_sqlalchemy_connection(), keyed by the fingerprint
+# of their parameters.
+_ENGINES: dict[str, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
 
+# Options of the engine used by JupySQL, see ui.common.jupysql. Pooled
+# connections are checked, as they may time out between notebook cells.
+JUPYSQL_ENGINE_OPTIONS: dict[str, Any] = {"pool_pre_ping": True}
 
-def _extract_ssl_options(conf: Secrets) -> dict:
+
+def _optional_encryption(
+    conf: ConfigReader, key: CKey = CKey.db_encryption
+) -> bool | None:
+    return optional_bool(conf, key)
+
+
+def _extract_ssl_options(conf: ConfigReader) -> dict:
     """
     Extracts SSL parameters from the provided configuration.
     Returns a dictionary in the winsocket-client format
     (see https://websocket-client.readthedocs.io/en/latest/faq.html#what-else-can-i-do-with-sslopts)
     """
-    sslopt: dict[str, object] = {}
+    return dict(tls_options(conf).sslopt)
 
-    # Is server certificate validation required?
-    certificate_validation = optional_str_to_bool(conf.get(CKey.cert_vld))
-    if certificate_validation is not None:
-        sslopt["cert_reqs"] = (
-            ssl.CERT_REQUIRED if certificate_validation else ssl.CERT_NONE
-        )
 
-    # Is a bundle with trusted CAs provided?
-    trusted_ca = conf.get(CKey.trusted_ca)
-    if trusted_ca:
-        trusted_ca_path = Path(trusted_ca)
-        if trusted_ca_path.is_dir():
-            sslopt["ca_cert_path"] = trusted_ca
-        elif trusted_ca_path.is_file():
-            sslopt["ca_certs"] = trusted_ca
-        else:
-            raise ValueError(f"Trusted CA location {trusted_ca} doesn't exist.")
-
-    # Is client's own certificate provided?
-    client_certificate = conf.get(CKey.client_cert)
-    if client_certificate:
-        if not Path(client_certificate).is_file():
-            raise ValueError(f"Certificate file {client_certificate} doesn't exist.")
-        sslopt["certfile"] = client_certificate
-        private_key = conf.get(CKey.client_key)
-        if private_key:
-            if not Path(private_key).is_file():
-                raise ValueError(f"Private key file {private_key} doesn't exist.")
-            sslopt["keyfile"] = private_key
-
-    return sslopt
-
-
-def get_backend(conf: Secrets) -> StorageBackend:
+def get_backend(conf: ConfigReader) -> StorageBackend:
     """
     Tries to find which backend was selected in the configuration. If the relevant
     configuration element is not there - which may be the case if the configuration
     has been created before the SaaS support was introduced - returns the
     StorageBackend.onprem.
     """
+    if isinstance(conf, ConfigSnapshot):
+        return conf.storage_backend
     storage_backend = conf.get(CKey.storage_backend, StorageBackend.onprem.name)
     return StorageBackend[storage_backend]  # type: ignore
 
 
-def get_external_host(conf: Secrets) -> str:
+def get_external_host(conf: ConfigReader) -> str:
     """Constructs the host part of a DB URL using provided configuration parameters."""
     return f"{conf.get(CKey.db_host_name)}:{conf.get(CKey.db_port)}"
 
 
-def get_udf_bucket_path(conf: Secrets) -> str:
+def get_udf_bucket_path(conf: ConfigReader) -> str:
     """
     Builds the path of the BucketFS bucket specified in the configuration,
     as it's seen in the udf's file system.
@@ -90,7 +85,7 @@ def get_udf_bucket_path(conf: Secrets) -> str:
     return bucket.udf_path
 
 
-def get_saas_database_id(conf: Secrets) -> str:
+def get_saas_database_id(conf: ConfigReader) -> str:
     """
     Gets the SaaS database id using the available configuration elements.
     """
@@ -99,22 +94,29 @@ def get_saas_database_id(conf: Secrets) -> str:
     if saas_database_id:
         return saas_database_id
 
-    return saas_api.get_database_id(
-        host=conf[CKey.saas_url],
-        account_id=conf[CKey.saas_account_id],
-        pat=conf[CKey.saas_token],
-        database_name=conf[CKey.saas_database_name],
+    import exasol.saas.client.api_access as saas_api
+
+    return SAAS_CACHE.lookup(
+        conf,
+        "database_id",
+        lambda: saas_api.get_database_id(
+            host=conf[CKey.saas_url],
+            account_id=conf[CKey.saas_account_id],
+            pat=conf[CKey.saas_token],
+            database_name=conf[CKey.saas_database_name],
+        ),
     )
 
 
-def _get_pyexasol_connection_params(conf: Secrets, **kwargs) -> dict[str, Any]:
-    if get_backend(conf) == StorageBackend.onprem:
-        conn_params: dict[str, Any] = {
-            "dsn": get_external_host(conf),
-            "user": conf.get(CKey.db_user),
-            "password": conf.get(CKey.db_password),
-        }
-    else:
+def _get_saas_connection_params(conf: ConfigReader) -> dict[str, Any]:
+    """
+    Gets the SaaS connection parameters, reusing the cached dsn and user.
+    The token is not cached, it is always taken from the configuration.
+    """
+
+    def resolve() -> dict[str, Any]:
+        import exasol.saas.client.api_access as saas_api
+
         conn_params = saas_api.get_connection_params(
             host=conf[CKey.saas_url],
             account_id=conf[CKey.saas_account_id],
@@ -122,19 +124,47 @@ def _get_pyexasol_connection_params(conf: Secrets, **kwargs) -> dict[str, Any]:
             database_id=conf.get(CKey.saas_database_id),
             database_name=conf.get(CKey.saas_database_name),
         )
+        return {k: v for k, v in conn_params.items() if k != "password"}
+
+    cached = SAAS_CACHE.lookup(conf, "connection", resolve)
+    return {**cached, "password": conf.get(CKey.saas_token)}
+
+
+def pyexasol_connection_params(conf: ConfigReader, **kwargs) -> dict[str, Any]:
+    """
+    Returns the parameters of pyexasol.connect() for the configuration,
+    see open_pyexasol_connection().
+    """
+    if get_backend(conf) == StorageBackend.onprem:
+        conn_params: dict[str, Any] = {
+            "dsn": get_external_host(conf),
+            "user": conf.get(CKey.db_user),
+            "password": conf.get(CKey.db_password),
+        }
+    else:
+        conn_params = _get_saas_connection_params(conf)
 
     encryption = _optional_encryption(conf)
     if encryption is not None:
         conn_params["encryption"] = encryption
-    ssopt = _extract_ssl_options(conf)
-    if ssopt:
-        conn_params["websocket_sslopt"] = ssopt
+    tls = tls_options(conf)
+    if tls.sslopt:
+        conn_params["websocket_sslopt"] = dict(tls.sslopt)
+        if tls.context is not None:
+            # Saves loading the certificates for each connection.
+            conn_params["websocket_sslopt"]["context"] = tls.context
 
     conn_params.update(kwargs)
     return conn_params
 
 
-def open_pyexasol_connection(conf: Secrets, **kwargs) -> pyexasol.ExaConnection:
+def _db_port(conf: ConfigReader) -> int:
+    if isinstance(conf, ConfigSnapshot):
+        return conf.db_port  # type: ignore
+    return int(conf.get(CKey.db_port))  # type: ignore
+
+
+def open_pyexasol_connection(conf: ConfigReader, **kwargs) -> pyexasol.ExaConnection:
     """
     Opens a pyexasol connection using provided configuration parameters.
     Supports both On-Prem and Saas backends.
@@ -163,16 +193,66 @@ def open_pyexasol_connection(conf: Secrets, **kwargs) -> pyexasol.ExaConnection:
     For other optional parameters the default settings are as per the pyexasol interface.
     """
 
-    conn_params = _get_pyexasol_connection_params(conf, **kwargs)
-    return pyexasol.connect(**conn_params)
+    conn_params = pyexasol_connection_params(conf, **kwargs)
+    conn = None
+    if has_warm_connections():
+        conn = take_warm_connection(connection_fingerprint(conn_params))
+    if conn is None:
+        _, conn = connect_pyexasol(conf, conn_params, **kwargs)
+    return conn
 
 
-def open_sqlalchemy_connection(conf: Secrets):
+def connect_pyexasol(
+    conf: ConfigReader, conn_params: dict[str, Any], **kwargs
+) -> tuple[dict[str, Any], pyexasol.ExaConnection]:
+    """
+    Opens a pyexasol connection. If the authentication fails with SaaS
+    connection parameters, then drops the cached entries and tries once
+    more, in case the freshly resolved parameters differ from the cached
+    ones.
+
+    Returns the parameters of the connection and the connection.
+    """
+    import pyexasol
+
+    try:
+        return conn_params, pyexasol.connect(**conn_params)
+    except pyexasol.ExaAuthError:
+        if get_backend(conf) == StorageBackend.onprem:
+            raise
+        SAAS_CACHE.invalidate(conf)
+        fresh_params = pyexasol_connection_params(conf, **kwargs)
+        if fresh_params == conn_params:
+            raise
+        LOG.info("Authentication failed, retrying with new SaaS connection parameters.")
+        return fresh_params, pyexasol.connect(**fresh_params)
+
+
+def connection_fingerprint(conn_params: dict[str, Any]) -> str:
+    """
+    Returns a hash of the connection parameters, avoiding to keep the
+    credentials in the pool.
+    """
+    serialized = json.dumps(conn_params, sort_keys=True, default=repr)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def open_sqlalchemy_connection(
+    conf: ConfigReader, cached: bool = True, **kwargs
+) -> Engine:
     """
     Creates an Exasol SQLAlchemy websocket engine using provided configuration parameters.
     Supports both On-Prem and Saas backends.
     Sets the default schema if it is defined in the configuration.
 
+    Unless `cached` is False, repeated calls with the same configuration and
+    parameters return the same engine, reusing the connections in its pool.
+    Use dispose_sqlalchemy_engines() to close them.
+
+    Any additional parameters are passed to sqlalchemy.create_engine() via
+    the kwargs, e.g. the pool options pool_size, max_overflow, pool_pre_ping,
+    and pool_recycle.
+
     The configuration should provide the following parameters:
 
     On-Prem:
@@ -206,18 +286,12 @@ def open_sqlalchemy_connection(conf: Secrets):
     if get_backend(conf) == StorageBackend.onprem:
         conn_params: dict[str, Any] = {
             "host": conf.get(CKey.db_host_name),
-            "port": int(conf.get(CKey.db_port)),  # type: ignore
+            "port": _db_port(conf),
             "username": conf.get(CKey.db_user),
             "password": conf.get(CKey.db_password),
         }
     else:
-        conn_params = saas_api.get_connection_params(
-            host=conf[CKey.saas_url],
-            account_id=conf[CKey.saas_account_id],
-            pat=conf[CKey.saas_token],
-            database_id=conf.get(CKey.saas_database_id),
-            database_name=conf.get(CKey.saas_database_name),
-        )
+        conn_params = _get_saas_connection_params(conf)
         host, port = str(conn_params["dsn"]).split(":")
         conn_params = {
             "host": host,
@@ -226,6 +300,9 @@ def open_sqlalchemy_connection(conf: Secrets):
             "password": conn_params["password"],
         }
 
+    import sqlalchemy
+    from sqlalchemy.engine.url import URL
+
     websocket_url = URL.create(
         "exa+websocket",
         **conn_params,
@@ -233,10 +310,33 @@ def open_sqlalchemy_connection(conf: Secrets):
         query=query_params,
     )
 
-    return sqlalchemy.create_engine(websocket_url)
+    if not cached:
+        return sqlalchemy.create_engine(websocket_url, **kwargs)
+    fingerprint = connection_fingerprint(
+        {"url": websocket_url.render_as_string(hide_password=False), **kwargs}
+    )
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(fingerprint)
+        if engine is None:
+            engine = sqlalchemy.create_engine(websocket_url, **kwargs)
+            _ENGINES[fingerprint] = engine
+        return engine
 
 
-def _get_onprem_bucketfs_url(conf: Secrets) -> str:
+def dispose_sqlalchemy_engines() -> None:
+    """
+    Closes the pooled connections of all engines cached by
+    open_sqlalchemy_connection() and forgets the engines. Subsequent calls
+    of open_sqlalchemy_connection() create new engines.
+    """
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+def _get_onprem_bucketfs_url(conf: ConfigReader) -> str:
     bucketfs_url_prefix = (
         "https" if _optional_encryption(conf, CKey.bfs_encryption) else "http"
     )
@@ -244,13 +344,13 @@ def _get_onprem_bucketfs_url(conf: Secrets) -> str:
     return f"{bucketfs_url_prefix}://{bucketfs_host}:{conf.get(CKey.bfs_port)}"
 
 
-def _get_ca_cert_verification(conf: Secrets) -> Any:
-    sslopt = _extract_ssl_options(conf)
-    verify = sslopt.get("cert_reqs") == ssl.CERT_REQUIRED
-    return sslopt.get("ca_certs") or sslopt.get("ca_cert_path") or verify
+def _get_ca_cert_verification(conf: ConfigReader) -> bool | str:
+    # The BucketFS client passes the argument verify to the functions of the
+    # requests library, which don't accept an SSL context.
+    return tls_options(conf).verify
 
 
-def open_bucketfs_connection(conf: Secrets) -> bfs.BucketLike:
+def open_bucketfs_connection(conf: ConfigReader) -> bfs.BucketLike:
     """
     This function is deprecated, please use open_bucketfs_bucket(conf) instead.
     """
@@ -262,7 +362,7 @@ def open_bucketfs_connection(conf: Secrets) -> bfs.BucketLike:
     return open_bucketfs_bucket(conf)
 
 
-def open_bucketfs_bucket(conf: Secrets) -> bfs.BucketLike:
+def open_bucketfs_bucket(conf: ConfigReader) -> bfs.BucketLike:
     """
     Connects to a BucketFS service using provided configuration parameters.
     Returns the BucketLike object for the bucket selected in the configuration.
@@ -285,6 +385,7 @@ def open_bucketfs_bucket(conf: Secrets) -> bfs.BucketLike:
         - Secured comm flag (bfs_encryption), defaults to False.
         - Some of the SSL options (cert_vld, trusted_ca).
     """
+    import exasol.bucketfs as bfs
 
     if get_backend(conf) == StorageBackend.onprem:
         bucketfs_url = _get_onprem_bucketfs_url(conf)
@@ -319,10 +420,12 @@ def open_bucketfs_bucket(conf: Secrets) -> bfs.BucketLike:
         )
 
 
-def open_bucketfs_location(conf: Secrets) -> bfs.path.PathLike:
+def open_bucketfs_location(conf: ConfigReader) -> bfs.path.PathLike:
     """
     Similar to `open_buckets_connection`, but returns a PathLike interface.
     """
+    import exasol.bucketfs as bfs
+
     if get_backend(conf) == StorageBackend.onprem:
         return bfs.path.build_path(
             backend=bfs.path.StorageBackend.onprem,
@@ -343,7 +446,7 @@ def open_bucketfs_location(conf: Secrets) -> bfs.path.PathLike:
         )
 
 
-def open_ibis_connection(conf: Secrets, **kwargs):
+def open_ibis_connection(conf: ConfigReader, **kwargs):
     """
     Creates a connection to Ibis with Exasol backend.
 
@@ -354,8 +457,9 @@ def open_ibis_connection(conf: Secrets, **kwargs):
     Unlike open_pyexasol_connection, this function sets the default schema if it's
     defined in the configuration.
     """
+    import ibis
 
-    conn_params = _get_pyexasol_connection_params(conf, **kwargs)
+    conn_params = pyexasol_connection_params(conf, **kwargs)
 
     dsn = conn_params.pop("dsn")
     host_port = dsn.split(":")
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 from datetime import timedelta
 from pathlib import Path
+from urllib.parse import urlparse
 
 import exasol.bucketfs as bfs
 from exasol.python_extension_common.deployment.extract_validator import ExtractValidator
@@ -12,6 +15,24 @@ from exasol.python_extension_common.deployment.language_container_deployer impor
 
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.ai_lab_config import StorageBackend
+from exasol.nb_connector.bfs_utils import (
+    is_identical,
+    read_manifest,
+    write_manifest,
+)
+from exasol.nb_connector.chunked_transfer import (
+    download_url,
+    url_version,
+)
+from exasol.nb_connector.config_snapshot import (
+    ConfigSnapshot,
+    optional_bool,
+)
+from exasol.nb_connector.config_store import (
+    ConfigReader,
+    ConfigStore,
+)
+from exasol.nb_connector.connection_pool import pooled_pyexasol_connection
 from exasol.nb_connector.connections import (
     get_backend,
     get_external_host,
@@ -19,16 +40,22 @@ from exasol.nb_connector.connections import (
     open_bucketfs_location,
     open_pyexasol_connection,
 )
-from exasol.nb_connector.secret_store import Secrets
-from exasol.nb_connector.utils import optional_str_to_bool
+
+LOG = logging.getLogger(__name__)
 
 PATH_IN_BUCKET_FOR_SLC = "ai-lab/slc"
 """
 Location to deploy Script-Language-Contains relatively to bucket in BucketFS.
 """
 
+CONTAINER_DOWNLOAD_DIR = Path.home() / ".cache" / "notebook-connector" / "downloads"
+"""
+Directory of the containers downloaded from a URL. A download interrupted,
+e.g. by a restart of the kernel, is resumed by the next deployment.
+"""
+
 
-def str_to_bool(conf: Secrets, key: CKey, default_value: bool) -> bool:
+def str_to_bool(conf: ConfigReader, key: CKey, default_value: bool) -> bool:
     """
     Tries to read a binary (i.e. yes/no) value from the secret store. If found
     returns the correspondent boolean. Otherwise, returns the provided default
@@ -42,11 +69,11 @@ def str_to_bool(conf: Secrets, key: CKey, default_value: bool) -> bool:
         default_value:
             Default value if the key is not in the secret store.
     """
-    prop_value = optional_str_to_bool(conf.get(key))
+    prop_value = optional_bool(conf, key)
     return default_value if prop_value is None else prop_value
 
 
-def _get_optional_external_host(conf: Secrets) -> str | None:
+def _get_optional_external_host(conf: ConfigReader) -> str | None:
     """
     Get the host part of an onprem database URL if the data can be found
     in the configuration, otherwise None.
@@ -56,11 +83,13 @@ def _get_optional_external_host(conf: Secrets) -> str | None:
     return None
 
 
-def _get_optional_bfs_port(conf: Secrets) -> int | None:
+def _get_optional_bfs_port(conf: ConfigReader) -> int | None:
     """
     Return the BucketFS service port number if it can be found in the
     configuration, otherwise None.
     """
+    if isinstance(conf, ConfigSnapshot):
+        return conf.bfs_port
     port_str = conf.get(CKey.bfs_port)
     if port_str:
         return int(port_str)
@@ -68,7 +97,7 @@ def _get_optional_bfs_port(conf: Secrets) -> int | None:
 
 
 def deploy_language_container(
-    conf: Secrets,
+    conf: ConfigStore,
     path_in_bucket: str,
     language_alias: str,
     activation_key: str,
@@ -86,6 +115,18 @@ def deploy_language_container(
     This function doesn't activate the language container. Instead, it generates the
     activation SQL command and writes it to the secret store using the provided key.
 
+    Together with the container, the function uploads a manifest containing its
+    SHA-256 hash. If the BucketFS already contains an identical container, then
+    the upload is skipped. For a container downloaded from a URL, the manifest
+    also records the URL and the version reported by the server, i.e. the ETag
+    or the date of the last modification. If the version is unchanged, then
+    the download is skipped, too. Either requires the container itself to be
+    still present in the BucketFS.
+
+    A container is downloaded into CONTAINER_DOWNLOAD_DIR and removed after
+    the deployment. If the download is interrupted, e.g. by a restart of the
+    kernel, then the next call resumes it.
+
     Parameters:
         conf:
             The secret store. The store must contain the DB connection parameters
@@ -119,6 +160,84 @@ def deploy_language_container(
             Defaults to "exaudfclient".
     """
 
+    if container_file:
+        _deploy_container_file(
+            conf,
+            path_in_bucket,
+            language_alias,
+            activation_key,
+            container_file,
+            container_name or container_file.name,
+            allow_override,
+            timeout,
+            udf_client_binary,
+        )
+    elif container_url:
+        container_name = container_name or Path(urlparse(container_url).path).name
+        # The manifest of a container downloaded earlier records the URL and
+        # the version reported by the server. If they are unchanged, then
+        # the download is skipped.
+        source = {"url": container_url, "version": url_version(container_url)}
+        bucketfs_file = open_bucketfs_location(conf) / path_in_bucket / container_name
+        manifest = read_manifest(bucketfs_file) if source["version"] else None
+        # The container itself may have been removed or replaced by other
+        # tools than deploy_language_container().
+        if manifest and manifest.get("source") == source and bucketfs_file.is_file():
+            LOG.info("Container %s is already present", container_name)
+            _deploy_container_file(
+                conf,
+                path_in_bucket,
+                language_alias,
+                activation_key,
+                None,
+                container_name,
+                allow_override,
+                timeout,
+                udf_client_binary,
+            )
+            return
+        CONTAINER_DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        downloaded_file = CONTAINER_DOWNLOAD_DIR / container_name
+        download_url(container_url, downloaded_file, timeout=300)
+        try:
+            _deploy_container_file(
+                conf,
+                path_in_bucket,
+                language_alias,
+                activation_key,
+                downloaded_file,
+                container_name,
+                allow_override,
+                timeout,
+                udf_client_binary,
+                source,
+            )
+        finally:
+            downloaded_file.unlink(missing_ok=True)
+    else:
+        raise ValueError("Either container URL or container file must be provided")
+
+
+def _deploy_container_file(
+    conf: ConfigStore,
+    path_in_bucket: str,
+    language_alias: str,
+    activation_key: str,
+    container_file: Path | None,
+    container_name: str,
+    allow_override: bool,
+    timeout: timedelta,
+    udf_client_binary: str,
+    source: dict[str, str | None] | None = None,
+) -> None:
+    """
+    Uploads the container file unless the BucketFS holds an identical one,
+    and saves the activation SQL. Without container file, the container in
+    the BucketFS is activated only. The source of a downloaded container is
+    recorded in its manifest.
+    """
+    # The deployer activates the container in the session, so the connection
+    # must not be pooled.
     with open_pyexasol_connection(conf, compression=True) as conn:
         validator = ExtractValidator(conn, timeout)
         bucketfs_location = open_bucketfs_location(conf) / path_in_bucket
@@ -130,24 +249,29 @@ def deploy_language_container(
             udf_client_binary=udf_client_binary,
         )
 
-        if container_file:
-            deployer.run(
-                container_file,
-                container_name,
-                alter_system=False,
-                allow_override=allow_override,
-                wait_for_completion=True,
-            )
-        elif container_url:
-            deployer.download_and_run(
-                container_url,
-                container_name,
-                alter_system=False,
-                allow_override=allow_override,
-                wait_for_completion=True,
-            )
+        # Skip the upload if the container in the BucketFS is identical, the
+        # deployer then only activates it.
+        bucketfs_file = bucketfs_location / container_name
+        if (
+            container_file
+            and is_identical(bucketfs_file, container_file)
+            and bucketfs_file.is_file()
+        ):
+            LOG.info("Container %s is already present", container_name)
+            uploaded_file = None
         else:
-            raise ValueError("Either container URL or container file must be provided")
+            uploaded_file = container_file
+        deployer.run(
+            uploaded_file,
+            container_name,
+            alter_system=False,
+            allow_override=allow_override,
+            wait_for_completion=True,
+        )
+        if container_file and (uploaded_file or source):
+            write_manifest(
+                bucketfs_file, container_file, {"source": source} if source else None
+            )
 
         # Install the language container.
         # Save the activation SQL in the secret store.
@@ -155,8 +279,17 @@ def deploy_language_container(
         conf.save(activation_key, language_def)
 
 
+async def deploy_language_container_async(conf: ConfigStore, **kwargs) -> None:
+    """
+    Runs deploy_language_container() in a worker thread, allowing to run
+    other setup steps concurrently, e.g. with asyncio.gather(). The kwargs
+    are the parameters of deploy_language_container().
+    """
+    await asyncio.to_thread(deploy_language_container, conf, **kwargs)
+
+
 def encapsulate_bucketfs_credentials(
-    conf: Secrets, path_in_bucket: str, connection_name: str
+    conf: ConfigReader, path_in_bucket: str, connection_name: str
 ) -> None:
     """
     Creates a connection object in the database encapsulating
@@ -227,9 +360,7 @@ def encapsulate_bucketfs_credentials(
         protocol = "https" if str_to_bool(conf, CKey.bfs_encryption, True) else "http"
         url = f"{protocol}://{host}:{port}"
         verify: bool | None = (
-            False
-            if conf.get(CKey.trusted_ca)
-            else optional_str_to_bool(conf.get(CKey.cert_vld))
+            False if conf.get(CKey.trusted_ca) else optional_bool(conf, CKey.cert_vld)
         )
         conn_to = to_json_str(
             backend=bfs.path.StorageBackend.onprem.name,
@@ -263,11 +394,11 @@ def encapsulate_bucketfs_credentials(
         "BUCKETFS_USER": conn_user,
         "BUCKETFS_PASSWORD": conn_password,
     }
-    with open_pyexasol_connection(conf, compression=True) as conn:
+    with pooled_pyexasol_connection(conf, compression=True) as conn:
         conn.execute(query=sql, query_params=query_params)
 
 
-def encapsulate_huggingface_token(conf: Secrets, connection_name: str) -> None:
+def encapsulate_huggingface_token(conf: ConfigReader, connection_name: str) -> None:
     """
     Creates a connection object in the database encapsulating a Huggingface token.
 
@@ -285,12 +416,12 @@ def encapsulate_huggingface_token(conf: Secrets, connection_name: str) -> None:
         IDENTIFIED BY {{TOKEN!s}}
     """
     query_params = {"TOKEN": conf.get(CKey.huggingface_token)}
-    with open_pyexasol_connection(conf, compression=True) as conn:
+    with pooled_pyexasol_connection(conf, compression=True) as conn:
         conn.execute(query=sql, query_params=query_params)
 
 
 def encapsulate_aws_credentials(
-    conf: Secrets, connection_name: str, s3_bucket_key: CKey
+    conf: ConfigReader, connection_name: str, s3_bucket_key: CKey
 ) -> None:
     """
     Creates a connection object in the database encapsulating the address of
@@ -317,5 +448,5 @@ def encapsulate_aws_credentials(
         "ACCESS_ID": conf.get(CKey.aws_access_key_id),
         "SECRET_KEY": conf.get(CKey.aws_secret_access_key),
     }
-    with open_pyexasol_connection(conf, compression=True) as conn:
+    with pooled_pyexasol_connection(conf, compression=True) as conn:
         conn.execute(query=sql, query_params=query_params)
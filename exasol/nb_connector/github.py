@@ -9,6 +9,8 @@ import pathlib
 
 import requests
 
+from exasol.nb_connector.chunked_transfer import download_url
+
 _logger = logging.getLogger(__name__)
 
 
@@ -82,10 +84,5 @@ def retrieve_jar(
         )
     else:
         _logger.info("Fetching jar for version %s from %s...", version, jar_url)
-        req = requests.get(jar_url, stream=True, timeout=10)
-        try:
-            count_bytes = local_jar_path.write_bytes(req.content)
-            _logger.info("Saved %d bytes in %s", count_bytes, local_jar_path)
-        finally:
-            req.close()
+        download_url(jar_url, local_jar_path, timeout=10)
     return local_jar_path
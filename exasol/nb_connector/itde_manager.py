@@ -28,6 +28,7 @@ from exasol.nb_connector.ai_lab_config import (
     Accelerator,
     AILabConfig,
 )
+from exasol.nb_connector.config_store import ConfigStore
 from exasol.nb_connector.container_by_ip import (
     ContainerByIp,
     IPRetriever,
@@ -35,7 +36,6 @@ from exasol.nb_connector.container_by_ip import (
 from exasol.nb_connector.luigi_utils import (
     temporarily_disable_luigi_worker_shutdown_handler,
 )
-from exasol.nb_connector.secret_store import Secrets
 
 ENVIRONMENT_NAME = "DemoDb"
 NAME_SERVER_ADDRESS = "8.8.8.8"
@@ -50,7 +50,7 @@ class ItdeContainerStatus(IntFlag):
     READY = RUNNING | VISIBLE
 
 
-def bring_itde_up(conf: Secrets, env_info: EnvironmentInfo | None = None) -> None:
+def bring_itde_up(conf: ConfigStore, env_info: EnvironmentInfo | None = None) -> None:
     """
     Launches the ITDE environment using its API. Sets hardcoded environment name,
     and Google name server address. Additionally, can set the following
@@ -110,27 +110,28 @@ def bring_itde_up(conf: Secrets, env_info: EnvironmentInfo | None = None) -> Non
     assert container_info is not None
     _add_current_container_to_db_network(container_info.network_info.network_name)
 
-    conf.save(AILabConfig.itde_container, container_info.container_name)
+    entries = {
+        AILabConfig.itde_container: container_info.container_name,
+        AILabConfig.itde_network: env_info.network_info.network_name,
+        AILabConfig.db_host_name: db_info.host,
+        AILabConfig.bfs_host_name: db_info.host,
+        AILabConfig.db_port: str(db_info.ports.database),
+        AILabConfig.bfs_port: str(db_info.ports.bucketfs),
+        # Q. Can we draw any of the below constants from the ITDE configuration?
+        AILabConfig.db_user: "sys",
+        AILabConfig.db_password: "exasol",
+        AILabConfig.bfs_user: "w",
+        AILabConfig.bfs_password: "write",
+        AILabConfig.bfs_service: "bfsdefault",
+        AILabConfig.bfs_bucket: "default",
+        AILabConfig.db_encryption: "True",
+        # The BucketFS encryption is turned off temporarily.
+        AILabConfig.bfs_encryption: "False",
+        AILabConfig.cert_vld: "False",
+    }
     if container_info.volume_name is not None:
-        conf.save(AILabConfig.itde_volume, container_info.volume_name)
-    conf.save(AILabConfig.itde_network, env_info.network_info.network_name)
-
-    conf.save(AILabConfig.db_host_name, db_info.host)
-    conf.save(AILabConfig.bfs_host_name, db_info.host)
-    conf.save(AILabConfig.db_port, str(db_info.ports.database))
-    conf.save(AILabConfig.bfs_port, str(db_info.ports.bucketfs))
-
-    # Q. Can we draw any of the below constants from the ITDE configuration?
-    conf.save(AILabConfig.db_user, "sys")
-    conf.save(AILabConfig.db_password, "exasol")
-    conf.save(AILabConfig.bfs_user, "w")
-    conf.save(AILabConfig.bfs_password, "write")
-    conf.save(AILabConfig.bfs_service, "bfsdefault")
-    conf.save(AILabConfig.bfs_bucket, "default")
-    conf.save(AILabConfig.db_encryption, "True")
-    # The BucketFS encryption is turned off temporarily.
-    conf.save(AILabConfig.bfs_encryption, "False")
-    conf.save(AILabConfig.cert_vld, "False")
+        entries[AILabConfig.itde_volume] = container_info.volume_name
+    conf.save_many(entries)
 
 
 def _get_current_container(docker_client: docker.DockerClient):
@@ -180,7 +181,7 @@ def _get_docker_network(
     return None
 
 
-def _remove_current_container_from_db_network(conf: Secrets):
+def _remove_current_container_from_db_network(conf: ConfigStore):
     network_name = conf.get(AILabConfig.itde_network)
     if not network_name:
         return
@@ -201,7 +202,7 @@ def _get_ipv4_addresses():
     return ip_addresses
 
 
-def get_itde_status(conf: Secrets) -> ItdeContainerStatus:
+def get_itde_status(conf: ConfigStore) -> ItdeContainerStatus:
     """
     Checks if the ITDE container exists and ready to be used. In the Docker Edition that
     means the ITDE is running and the AI-Lab container is connected to its network. In
@@ -232,7 +233,7 @@ def get_itde_status(conf: Secrets) -> ItdeContainerStatus:
         return ItdeContainerStatus.ABSENT
 
 
-def restart_itde(conf: Secrets) -> None:
+def restart_itde(conf: ConfigStore) -> None:
     """
     Starts an existing ITDE container if it's not already running. In the Docker Edition
     connects the AI-Lab container to the Docker-DB network, unless it's already connected
@@ -259,7 +260,7 @@ def restart_itde(conf: Secrets) -> None:
             _add_current_container_to_db_network(network_name)
 
 
-def take_itde_down(conf: Secrets, stop_db: bool = True) -> None:
+def take_itde_down(conf: ConfigStore, stop_db: bool = True) -> None:
     """
     Shuts down the ITDE.
     The names of the docker container, docker volume and docker network
@@ -276,19 +277,23 @@ def take_itde_down(conf: Secrets, stop_db: bool = True) -> None:
         remove_volume(conf)
         remove_network(conf)
 
-    conf.remove(AILabConfig.db_host_name)
-    conf.remove(AILabConfig.bfs_host_name)
-    conf.remove(AILabConfig.db_port)
-    conf.remove(AILabConfig.bfs_port)
-    conf.remove(AILabConfig.db_user)
-    conf.remove(AILabConfig.db_password)
-    conf.remove(AILabConfig.bfs_user)
-    conf.remove(AILabConfig.bfs_password)
-    conf.remove(AILabConfig.bfs_service)
-    conf.remove(AILabConfig.bfs_bucket)
-    conf.remove(AILabConfig.db_encryption)
-    conf.remove(AILabConfig.bfs_encryption)
-    conf.remove(AILabConfig.cert_vld)
+    conf.remove_many(
+        [
+            AILabConfig.db_host_name,
+            AILabConfig.bfs_host_name,
+            AILabConfig.db_port,
+            AILabConfig.bfs_port,
+            AILabConfig.db_user,
+            AILabConfig.db_password,
+            AILabConfig.bfs_user,
+            AILabConfig.bfs_password,
+            AILabConfig.bfs_service,
+            AILabConfig.bfs_bucket,
+            AILabConfig.db_encryption,
+            AILabConfig.bfs_encryption,
+            AILabConfig.cert_vld,
+        ]
+    )
 
 
 def remove_network(conf):
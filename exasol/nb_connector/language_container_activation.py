@@ -14,6 +14,8 @@ def get_registered_languages_string(conf: Secrets) -> str:
     in a format of a space separated list: "<alias1>=<url1> <alias2=<url2> ..."
     """
 
+    # A pooled connection could still carry language definitions of an
+    # earlier ALTER SESSION, so this query needs a fresh session.
     with open_pyexasol_connection(conf) as pyexasol_conn:
         query_result = pyexasol_conn.execute(
             "SELECT SESSION_VALUE FROM SYS.EXA_PARAMETERS WHERE PARAMETER_NAME='SCRIPT_LANGUAGES'"
@@ -46,19 +48,18 @@ def get_requested_languages(conf: Secrets) -> dict[str, str]:
 
     result: dict[str, str] = {}
     # Iterate over all entries that look like language definitions.
-    for key, value in conf.items():
-        if key.startswith(ACTIVATION_KEY_PREFIX):
-            alias, lang_url = value.split("=", maxsplit=1)
-            alias = alias.upper()
-            if alias in result:
-                if result[alias] != lang_url:
-                    error = (
-                        "Unable to merge multiple language definitions. "
-                        f"Found incompatible definitions for the language alias {alias}."
-                    )
-                    raise RuntimeError(error)
-            else:
-                result[alias] = lang_url
+    for value in conf.values(prefix=ACTIVATION_KEY_PREFIX):
+        alias, lang_url = value.split("=", maxsplit=1)
+        alias = alias.upper()
+        if alias in result:
+            if result[alias] != lang_url:
+                error = (
+                    "Unable to merge multiple language definitions. "
+                    f"Found incompatible definitions for the language alias {alias}."
+                )
+                raise RuntimeError(error)
+        else:
+            result[alias] = lang_url
     return result
 
 
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import Any
@@ -67,6 +68,14 @@ def install_model(conf: Secrets, model: TransformerModel) -> None:
     spinner.ok(CHECKMARK)
 
 
+async def install_model_async(conf: Secrets, model: TransformerModel) -> None:
+    """
+    Downloads and installs the specified Huggingface model in a worker
+    thread, see install_model().
+    """
+    await asyncio.to_thread(install_model, conf, model)
+
+
 def create_model_repository(conf: Secrets) -> BucketFSRepository:
     """
     Creates a BucketFSRepository encapsulating using the sub-directory from the secret store.
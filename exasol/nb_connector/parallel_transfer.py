@@ -0,0 +1,610 @@
+"""
+Parallel export and import of data via the HTTP transport of pyexasol, using
+one worker per node of the Exasol cluster.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections.abc import (
+    Iterable,
+    Iterator,
+)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Literal,
+)
+
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.connection_pool import pooled_pyexasol_connection
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyexasol
+
+LOG = logging.getLogger(__name__)
+
+# Number of bytes of CSV data each worker parses into a record batch.
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Max. number of record batches buffered between the workers and the
+# consumer, or the source, bounding the memory used by an export or import.
+DEFAULT_MAX_QUEUED_BATCHES = 16
+
+# Number of rows per record batch read from the source of an import.
+DEFAULT_BATCH_SIZE = 64 * 1024
+
+# Name of the threads of an export, the workers have an additional suffix.
+THREAD_NAME = "parallel-export"
+
+# Name of the threads of an import, the workers have an additional suffix.
+IMPORT_THREAD_NAME = "parallel-import"
+
+# Format of the timestamps written by the CSV writer of pyarrow.
+_TIMESTAMP_FORMAT = "YYYY-MM-DD HH24:MI:SS.FF6"
+
+ExportFormat = Literal["arrow", "pandas", "polars"]
+
+
+def _arrow_type(column: dict[str, Any]) -> pa.DataType:
+    """
+    Maps the type of a column, as reported by pyexasol, to an Arrow type.
+    Types without an Arrow equivalent, e.g. intervals and geometries, are
+    mapped to strings.
+    """
+    import pyarrow as pa
+
+    exa_type = column["type"]
+    if exa_type == "DECIMAL":
+        precision, scale = column["precision"], column["scale"]
+        if scale == 0 and precision <= 18:
+            return pa.int64()
+        return pa.decimal128(precision, scale)
+    if exa_type == "DOUBLE":
+        return pa.float64()
+    if exa_type == "BOOLEAN":
+        return pa.bool_()
+    if exa_type == "DATE":
+        return pa.date32()
+    if exa_type.startswith("TIMESTAMP"):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def arrow_schema(columns: dict[str, dict[str, Any]]) -> pa.Schema:
+    """
+    Returns the Arrow schema for the columns of a query, as reported by
+    pyexasol's ExaMetaData.sql_columns().
+    """
+    import pyarrow as pa
+
+    return pa.schema([(name, _arrow_type(col)) for name, col in columns.items()])
+
+
+def _open_transports(conn: pyexasol.ExaConnection, workers: int | None) -> list:
+    """
+    Opens an HTTP transport per worker, connected to the nodes of the
+    cluster in a round-robin fashion.
+    """
+    import pyexasol
+
+    return [
+        pyexasol.http_transport(
+            node["ipaddr"],
+            node["port"],
+            compression=conn.options["compression"],
+            encryption=conn.options["encryption"],
+        )
+        for node in conn.get_nodes(workers)
+    ]
+
+
+class _Cancelled(Exception):
+    """Raised in a worker if the consumer stopped reading the batches."""
+
+
+_DONE = object()
+
+
+class ParallelExport:
+    """
+    Runs an export with one HTTP transport per worker. Each worker parses
+    its CSV stream into record batches and passes them to the consumer via
+    a bounded queue.
+
+    Parameters:
+        conn:
+            The connection running the export.
+        schema:
+            The schema of the exported rows, see arrow_schema().
+        block_size:
+            Number of bytes of CSV data parsed into a record batch.
+        max_queued_batches:
+            Max. number of batches buffered before the workers wait for the
+            consumer.
+    """
+
+    def __init__(
+        self,
+        conn: pyexasol.ExaConnection,
+        schema: pa.Schema,
+        block_size: int,
+        max_queued_batches: int,
+    ):
+        self.conn = conn
+        self.schema = schema
+        self.block_size = block_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_batches)
+        self._cancelled = threading.Event()
+        self._errors: list[BaseException] = []
+
+    def _put(self, item: Any) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _Cancelled()
+
+    def _read_batches(self, pipe: io.RawIOBase, dst: Any) -> None:
+        """Callback for the HTTP transport of a worker."""
+        import pyarrow.csv as pacsv
+
+        stream = io.BufferedReader(pipe, buffer_size=self.block_size)
+        if not stream.peek(1):
+            # The worker did not receive any rows.
+            return
+        reader = pacsv.open_csv(
+            stream,
+            read_options=pacsv.ReadOptions(
+                column_names=self.schema.names, block_size=self.block_size
+            ),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types=self.schema, strings_can_be_null=True
+            ),
+        )
+        for batch in reader:
+            self._put(batch)
+
+    def _work(self, http) -> None:
+        try:
+            http.export_to_callback(self._read_batches, None)
+        except _Cancelled:
+            pass
+        except BaseException as ex:  # pylint: disable=broad-exception-caught
+            self._errors.append(ex)
+
+    def _run(self, transports: list, query: str, query_params: dict | None) -> None:
+        workers = [
+            threading.Thread(
+                target=self._work, args=(http,), name=f"{THREAD_NAME}-{i}", daemon=True
+            )
+            for i, http in enumerate(transports)
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            addresses = [http.exa_address for http in transports]
+            self.conn.export_parallel(addresses, query, query_params)
+        except BaseException as ex:  # pylint: disable=broad-exception-caught
+            self._errors.append(ex)
+            for http in transports:
+                http.http_thread.terminate()
+        for worker in workers:
+            worker.join()
+        try:
+            self._put(self._errors[0] if self._errors else _DONE)
+        except _Cancelled:
+            pass
+
+    def batches(
+        self, query: str, query_params: dict | None, workers: int | None
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Exports the result of the query and yields its record batches. A
+        single worker preserves the order of the rows. Closing the iterator
+        early cancels the export.
+        """
+        transports = _open_transports(self.conn, workers)
+        coordinator = threading.Thread(
+            target=self._run,
+            args=(transports, query, query_params),
+            name=THREAD_NAME,
+            daemon=True,
+        )
+        coordinator.start()
+        try:
+            while (item := self._queue.get()) is not _DONE:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self._cancelled.set()
+            coordinator.join()
+
+
+def export_arrow_batches(
+    conf: ConfigReader,
+    query: str,
+    query_params: dict | None = None,
+    workers: int | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    max_queued_batches: int = DEFAULT_MAX_QUEUED_BATCHES,
+) -> pa.RecordBatchReader:
+    """
+    Exports the result of the query in parallel, using the HTTP transport
+    of pyexasol with one worker per node of the Exasol cluster, and returns
+    the data as a stream of Arrow record batches.
+
+    The memory used is bounded by the number of batches buffered between
+    the workers and the consumer of the stream. The order of the rows is
+    not preserved.
+
+    Parameters:
+        conf:
+            The configuration, see open_pyexasol_connection().
+        query:
+            SQL query, possibly with placeholders.
+        query_params:
+            Values for the placeholders in the query.
+        workers:
+            Number of workers. Defaults to the number of nodes of the
+            cluster. If greater, then some nodes get multiple workers.
+        block_size:
+            Number of bytes of CSV data parsed into a record batch.
+        max_queued_batches:
+            Max. number of batches buffered before the workers wait for the
+            consumer.
+    """
+    import pyarrow as pa
+
+    def schema_and_batches() -> Iterator[Any]:
+        with pooled_pyexasol_connection(conf) as conn:
+            schema = arrow_schema(conn.meta.sql_columns(query, query_params))
+            yield schema
+            export = ParallelExport(conn, schema, block_size, max_queued_batches)
+            yield from export.batches(query, query_params, workers)
+
+    # The generator yields the schema first, using the same connection for
+    # the export.
+    stream = schema_and_batches()
+    return pa.RecordBatchReader.from_batches(next(stream), stream)
+
+
+def export_parallel(
+    conf: ConfigReader,
+    query: str,
+    format: ExportFormat = "arrow",
+    **kwargs,
+) -> Any:
+    """
+    Exports the result of the query in parallel, see export_arrow_batches()
+    for the parameters, and returns it as a pyarrow.Table, a pandas
+    DataFrame, or a polars DataFrame, depending on the format.
+    """
+    if format not in ("arrow", "pandas", "polars"):
+        raise ValueError(f"Unsupported format {format}.")
+    table = export_arrow_batches(conf, query, **kwargs).read_all()
+    return convert_table(table, format)
+
+
+def convert_table(table: pa.Table, format: ExportFormat) -> Any:
+    """
+    Converts an Arrow table into the format, see export_parallel().
+    """
+    if format == "pandas":
+        return table.to_pandas()
+    if format == "polars":
+        import polars as pl
+
+        return pl.from_arrow(table)
+    return table
+
+
+@dataclass(frozen=True)
+class ImportStats:
+    """
+    Throughput of an import: the number of rows, the bytes of CSV data sent
+    to the database, and the duration in seconds.
+    """
+
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+class _CountingWriter:
+    """Counts the bytes written to the pipe of an HTTP transport."""
+
+    def __init__(self, pipe: io.RawIOBase):
+        self.pipe = pipe
+        self.bytes = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int | None:
+        self.bytes += len(data)
+        return self.pipe.write(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def _source_batches(source: Any, batch_size: int) -> Iterable[pa.RecordBatch]:
+    """
+    Returns the record batches of a Parquet file or directory, an Arrow
+    dataset, table, record batch reader, or a pandas or polars DataFrame.
+    Files and datasets are read in batches, not needing all data in memory.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if isinstance(source, (str, Path)):
+        source = ds.dataset(source, format="parquet")
+    if isinstance(source, ds.Dataset):
+        return source.to_batches(batch_size=batch_size)
+    if isinstance(source, pa.RecordBatchReader):
+        return source
+    package = type(source).__module__.split(".")[0]
+    if package == "pandas":
+        source = pa.Table.from_pandas(source, preserve_index=False)
+    elif package == "polars":
+        source = source.to_arrow()
+    if isinstance(source, pa.Table):
+        return source.to_batches(max_chunksize=batch_size)
+    raise TypeError(f"Unsupported source {type(source).__name__}.")
+
+
+def _csv_compatible(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """
+    Converts all timestamps to UTC timestamps in microseconds without a time
+    zone, matching _TIMESTAMP_FORMAT, as the database neither accepts the
+    time zone suffix, nor a varying number of fractional digits.
+    """
+    import pyarrow as pa
+
+    target = pa.timestamp("us")
+    if not any(
+        pa.types.is_timestamp(field.type) and field.type != target
+        for field in batch.schema
+    ):
+        return batch
+    columns = [
+        (
+            column.cast(target, safe=False)
+            if pa.types.is_timestamp(column.type)
+            else column
+        )
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+@contextlib.contextmanager
+def _timestamp_format(conn: pyexasol.ExaConnection, schema: pa.Schema) -> Iterator:
+    """
+    Sets the timestamp format of the session to the format written by
+    pyarrow, if the schema contains timestamps, and restores the previous
+    format afterward, as the connection may be reused.
+    """
+    import pyarrow as pa
+
+    if not any(pa.types.is_timestamp(field.type) for field in schema):
+        yield
+        return
+    previous = conn.execute(
+        "SELECT SESSION_VALUE FROM SYS.EXA_PARAMETERS"
+        " WHERE PARAMETER_NAME='NLS_TIMESTAMP_FORMAT'"
+    ).fetchval()
+    conn.execute(f"ALTER SESSION SET NLS_TIMESTAMP_FORMAT='{_TIMESTAMP_FORMAT}'")
+    try:
+        yield
+    finally:
+        conn.execute(f"ALTER SESSION SET NLS_TIMESTAMP_FORMAT='{previous}'")
+
+
+class _ParallelImport:
+    """
+    Runs an import with one HTTP transport per worker. A producer reads the
+    record batches from the source and passes them to the workers via a
+    bounded queue. Each worker writes the batches it takes as CSV.
+    """
+
+    def __init__(self, conn: pyexasol.ExaConnection, max_queued_batches: int):
+        self.conn = conn
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_batches)
+        self._cancelled = threading.Event()
+        self._errors: list[BaseException] = []
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.bytes = 0
+
+    def _put(self, item: Any) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _Cancelled()
+
+    def _get(self) -> Any:
+        while not self._cancelled.is_set():
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise _Cancelled()
+
+    def _produce(self, batches: Iterable[pa.RecordBatch], workers: int) -> None:
+        try:
+            for batch in batches:
+                self._put(_csv_compatible(batch))
+            for _ in range(workers):
+                self._put(_DONE)
+        except _Cancelled:
+            pass
+        except BaseException as ex:  # pylint: disable=broad-exception-caught
+            self._errors.append(ex)
+            self._cancelled.set()
+
+    def _write_batches(self, pipe: io.RawIOBase, src: Any) -> None:
+        """Callback for the HTTP transport of a worker."""
+        import pyarrow.csv as pacsv
+
+        sink = _CountingWriter(pipe)
+        writer = None
+        rows = 0
+        try:
+            while (batch := self._get()) is not _DONE:
+                if writer is None:
+                    writer = pacsv.CSVWriter(
+                        sink,
+                        batch.schema,
+                        write_options=pacsv.WriteOptions(include_header=False),
+                    )
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+            with self._lock:
+                self.rows += rows
+                self.bytes += sink.bytes
+
+    def _work(self, http) -> None:
+        try:
+            http.import_from_callback(self._write_batches, None)
+        except _Cancelled:
+            pass
+        except BaseException as ex:  # pylint: disable=broad-exception-caught
+            self._errors.append(ex)
+            self._cancelled.set()
+
+    def run(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        table: str | tuple[str, str],
+        schema: pa.Schema,
+        workers: int | None,
+    ) -> None:
+        transports = _open_transports(self.conn, workers)
+        threads = [
+            threading.Thread(
+                target=self._produce,
+                args=(batches, len(transports)),
+                name=IMPORT_THREAD_NAME,
+                daemon=True,
+            )
+        ] + [
+            threading.Thread(
+                target=self._work,
+                args=(http,),
+                name=f"{IMPORT_THREAD_NAME}-{i}",
+                daemon=True,
+            )
+            for i, http in enumerate(transports)
+        ]
+        sql_error = None
+        try:
+            for thread in threads:
+                thread.start()
+            addresses = [http.exa_address for http in transports]
+            with _timestamp_format(self.conn, schema):
+                self.conn.import_parallel(addresses, table, {"columns": schema.names})
+        except BaseException as ex:  # pylint: disable=broad-exception-caught
+            sql_error = ex
+            self._cancelled.set()
+            for http in transports:
+                http.http_thread.terminate()
+        for thread in threads:
+            thread.join()
+        # An error of the producer or a worker is the cause of a failing
+        # IMPORT statement.
+        if self._errors:
+            raise self._errors[0]
+        if sql_error:
+            raise sql_error
+
+
+def import_parallel(
+    conf: ConfigReader,
+    source: Any,
+    table: str | tuple[str, str],
+    workers: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_queued_batches: int = DEFAULT_MAX_QUEUED_BATCHES,
+) -> ImportStats:
+    """
+    Imports data into an existing table in parallel, using the HTTP
+    transport of pyexasol with one worker per node of the Exasol cluster.
+
+    The source is streamed in record batches to the workers, which send them
+    to the database as CSV. The memory used is bounded by the number of
+    batches buffered between reading the source and the workers. The
+    columns of the source are mapped to the columns of the table with the
+    same names.
+
+    Returns the number of imported rows and the throughput. The throughput
+    is also logged.
+
+    Parameters:
+        conf:
+            The configuration, see open_pyexasol_connection().
+        source:
+            Path of a Parquet file or a directory with Parquet files, an
+            Arrow dataset, table, or record batch reader, or a pandas or
+            polars DataFrame.
+        table:
+            Name of the table, or a tuple (schema, table).
+        workers:
+            Number of workers. Defaults to the number of nodes of the
+            cluster. If greater, then some nodes get multiple workers.
+        batch_size:
+            Max. number of rows per record batch read from the source.
+        max_queued_batches:
+            Max. number of batches buffered before reading the source waits
+            for the workers.
+    """
+    start = time.monotonic()
+    batches = iter(_source_batches(source, batch_size))
+    first = next(batches, None)
+    if first is None:
+        return ImportStats(rows=0, bytes=0, seconds=time.monotonic() - start)
+    with pooled_pyexasol_connection(conf) as conn:
+        parallel_import = _ParallelImport(conn, max_queued_batches)
+        parallel_import.run(
+            itertools.chain([first], batches), table, first.schema, workers
+        )
+    stats = ImportStats(
+        rows=parallel_import.rows,
+        bytes=parallel_import.bytes,
+        seconds=time.monotonic() - start,
+    )
+    LOG.info(
+        "Imported %d rows into %s in %.1f s: %.0f rows/s, %.1f MB/s",
+        stats.rows,
+        table,
+        stats.seconds,
+        stats.rows_per_second,
+        stats.megabytes_per_second,
+    )
+    return stats
@@ -0,0 +1,320 @@
+"""
+Persistent cache of query results on the local disk, reusing the results of
+expensive queries across kernel restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import (
+    Callable,
+    Iterable,
+)
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+)
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import ConfigReader
+from exasol.nb_connector.connection_pool import pooled_pyexasol_connection
+from exasol.nb_connector.parallel_transfer import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_MAX_QUEUED_BATCHES,
+    ExportFormat,
+    ParallelExport,
+    arrow_schema,
+    convert_table,
+)
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyexasol
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_QUERY_CACHE_DIR = (
+    Path.home() / ".cache" / "notebook-connector" / "query_results"
+)
+
+# Max. number of bytes of all cached results.
+DEFAULT_MAX_CACHE_SIZE = 2 * 1024**3
+
+# Seconds after which a cached result expires.
+DEFAULT_QUERY_CACHE_TTL = 24 * 3600.0
+
+# Configuration keys identifying the database, part of the cache key.
+_DATABASE_KEYS = [
+    CKey.storage_backend,
+    CKey.db_host_name,
+    CKey.db_port,
+    CKey.db_user,
+    CKey.saas_url,
+    CKey.saas_account_id,
+    CKey.saas_database_id,
+    CKey.saas_database_name,
+]
+
+_SUFFIX = ".arrow"
+
+_QUOTED_OR_SPACE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+VersionProbe = Callable[["pyexasol.ExaConnection"], Any]
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses the whitespace in the SQL statement outside of string literals
+    and quoted identifiers and removes a trailing semicolon.
+    """
+    normalized = _QUOTED_OR_SPACE.sub(lambda m: m.group(1) or " ", sql).strip()
+    return normalized.rstrip(";").rstrip()
+
+
+def last_commit_probe(schema: str, tables: Iterable[str] | None = None) -> VersionProbe:
+    """
+    Returns a version probe reporting the time of the last commit changing
+    any of the tables in the schema. If tables are specified, then only
+    these are considered. The names must be given as stored in the
+    database, i.e. usually in upper case.
+    """
+    query = (
+        "SELECT MAX(LAST_COMMIT) FROM SYS.EXA_ALL_OBJECTS"
+        " WHERE OBJECT_TYPE = 'TABLE' AND ROOT_NAME = {schema}"
+    )
+    params: dict[str, Any] = {"schema": schema}
+    if tables is not None:
+        query += " AND OBJECT_NAME IN ({tables})"
+        params["tables"] = list(tables)
+
+    def probe(conn: pyexasol.ExaConnection) -> Any:
+        return conn.execute(query, params).fetchval()
+
+    return probe
+
+
+class QueryCache:
+    """
+    Caches the results of queries as Arrow IPC files in a local directory,
+    surviving restarts of the kernel. A cached result is memory-mapped
+    rather than read into memory.
+
+    The entries are keyed by a hash of the normalized SQL statement, the
+    query parameters, the schema, and the database identified by the
+    configuration. Results from other databases or users are never mixed.
+
+    Without a version probe, a cached result is used until it expires,
+    without any round trip to the database. With a version probe, each
+    lookup runs the probe, e.g. last_commit_probe(), and a result is only
+    used if the probe reports the same version as when it was cached.
+
+    Parameters:
+        cache_dir:
+            Directory of the cached results.
+        max_size:
+            Max. number of bytes of all cached results. If exceeded, then
+            the least recently used results are removed.
+        ttl:
+            Seconds after which a cached result expires.
+        version_probe:
+            Function returning the version of the data read by the queries,
+            called with a pyexasol connection.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+        ttl: float = DEFAULT_QUERY_CACHE_TTL,
+        version_probe: VersionProbe | None = None,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_QUERY_CACHE_DIR
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version_probe = version_probe
+        self._lock = threading.Lock()
+
+    def _path(
+        self,
+        conf: ConfigReader,
+        sql: str,
+        query_params: dict | None,
+        schema: str | None,
+    ) -> Path:
+        elements = [
+            normalize_sql(sql),
+            query_params,
+            schema,
+            [conf.get(key) for key in _DATABASE_KEYS],
+        ]
+        serialized = json.dumps(elements, sort_keys=True, default=repr)
+        key = hashlib.sha256(serialized.encode()).hexdigest()
+        return self.cache_dir / f"{key}{_SUFFIX}"
+
+    def _load(self, path: Path, version: str) -> pa.Table | None:
+        """
+        Returns the memory-mapped result in the file, or None if there is no
+        such file, or the result has expired or has another version.
+        """
+        import pyarrow as pa
+
+        try:
+            modified = path.stat().st_mtime
+            if modified + self.ttl <= time.time():
+                return None
+            reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        except (OSError, ValueError):
+            return None
+        metadata = reader.schema.metadata or {}
+        if metadata.get(b"version") != version.encode():
+            return None
+        # The access time tracks the usage, while the modification time is
+        # the time the result was cached.
+        os.utime(path, (time.time(), modified))
+        return reader.read_all().replace_schema_metadata(None)
+
+    def _store(
+        self,
+        path: Path,
+        conn: pyexasol.ExaConnection,
+        sql: str,
+        query_params: dict | None,
+        version: str,
+    ) -> pa.Table:
+        import pyarrow as pa
+
+        schema = arrow_schema(conn.meta.sql_columns(sql, query_params))
+        export = ParallelExport(
+            conn, schema, DEFAULT_BLOCK_SIZE, DEFAULT_MAX_QUEUED_BATCHES
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with (
+                pa.OSFile(str(tmp), "wb") as sink,
+                pa.ipc.new_file(
+                    sink, schema.with_metadata({"version": version})
+                ) as writer,
+            ):
+                # A single worker preserves the order of the rows.
+                for batch in export.batches(sql, query_params, workers=1):
+                    writer.write_batch(batch)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        self._evict()
+        return table.replace_schema_metadata(None)
+
+    def _evict(self) -> None:
+        """
+        Removes the expired results, and the least recently used ones while
+        the total size exceeds the limit.
+        """
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob(f"*{_SUFFIX}"):
+                try:
+                    entries.append((path, path.stat()))
+                except FileNotFoundError:
+                    pass
+            now = time.time()
+            total = sum(st.st_size for _, st in entries)
+            for path, st in sorted(entries, key=lambda entry: entry[1].st_atime):
+                if st.st_mtime + self.ttl > now and total <= self.max_size:
+                    continue
+                try:
+                    path.unlink()
+                    total -= st.st_size
+                except FileNotFoundError:
+                    pass
+                except OSError as ex:
+                    LOG.debug("Failed to remove cached result %s: %s", path, ex)
+
+    def query(
+        self,
+        conf: ConfigReader,
+        sql: str,
+        query_params: dict | None = None,
+        schema: str | None = None,
+        format: ExportFormat = "arrow",
+        refresh: bool = False,
+    ) -> Any:
+        """
+        Returns the result of the query from the cache, or runs the query
+        via pyexasol and caches its result.
+
+        Parameters:
+            conf:
+                The configuration, see open_pyexasol_connection().
+            sql:
+                SQL query, possibly with placeholders.
+            query_params:
+                Values for the placeholders in the query.
+            schema:
+                Default schema of the connection running the query.
+            format:
+                Type of the returned result, a pyarrow.Table, a pandas
+                DataFrame, or a polars DataFrame.
+            refresh:
+                If True then runs the query even if its result is cached.
+        """
+        if format not in ("arrow", "pandas", "polars"):
+            raise ValueError(f"Unsupported format {format}.")
+        path = self._path(conf, sql, query_params, schema)
+        if not (refresh or self.version_probe):
+            if (table := self._load(path, "")) is not None:
+                LOG.debug("Using cached result %s", path.name)
+                return convert_table(table, format)
+        kwargs = {"schema": schema} if schema else {}
+        with pooled_pyexasol_connection(conf, **kwargs) as conn:
+            version = ""
+            if self.version_probe:
+                version = json.dumps(self.version_probe(conn), default=str)
+                if not refresh and (table := self._load(path, version)) is not None:
+                    LOG.debug("Using cached result %s", path.name)
+                    return convert_table(table, format)
+            table = self._store(path, conn, sql, query_params, version)
+        return convert_table(table, format)
+
+    def invalidate(
+        self,
+        conf: ConfigReader,
+        sql: str,
+        query_params: dict | None = None,
+        schema: str | None = None,
+    ) -> bool:
+        """
+        Removes the cached result of the query. Returns True if there was
+        such a result.
+        """
+        try:
+            self._path(conf, sql, query_params, schema).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> int:
+        """Removes all cached results and returns their number."""
+        removed = 0
+        for path in self.cache_dir.glob(f"*{_SUFFIX}"):
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+QUERY_CACHE = QueryCache()
+"""
+Cache in the default directory. Applications can change its settings, e.g.
+QUERY_CACHE.version_probe = last_commit_probe("MY_SCHEMA").
+"""
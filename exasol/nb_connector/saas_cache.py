@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import (
+    Any,
+    TypeVar,
+)
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import ConfigReader
+
+LOG = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds for which a resolved SaaS database id or connection parameters
+# are reused.
+DEFAULT_SAAS_CACHE_TTL = 3600.0
+
+# Persisted entries are saved in the configuration store with keys having
+# this prefix, followed by the kind of the entry.
+PERSISTED_KEY_PREFIX = "saas_cache_"
+
+_KINDS = ("database_id", "connection")
+
+
+class SaasLookupCache:
+    """
+    Caches the SaaS database id and the connection parameters resolved via
+    the SaaS API, saving a round trip to the SaaS control plane for each
+    connection.
+
+    The entries are keyed by a hash of the SaaS url, the account id, the
+    token, and the database id or name. Hence, changing any of these values
+    in the configuration bypasses the cached entries.
+
+    Parameters:
+        ttl:
+            Seconds after which an entry expires.
+        persist:
+            If True then the entries are also saved in the configuration
+            store, e.g. the SCS, making them available to other processes
+            and later sessions until they expire. Persisting requires the
+            store to support method save().
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SAAS_CACHE_TTL, persist: bool = False):
+        self.ttl = ttl
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    @staticmethod
+    def _key(conf: ConfigReader, kind: str) -> str:
+        elements = [
+            kind,
+            conf.get(CKey.saas_url),
+            conf.get(CKey.saas_account_id),
+            conf.get(CKey.saas_token),
+            conf.get(CKey.saas_database_id),
+            conf.get(CKey.saas_database_name),
+        ]
+        return hashlib.sha256(json.dumps(elements).encode()).hexdigest()
+
+    def _load_persisted(self, conf: ConfigReader, kind: str, key: str) -> Any:
+        serialized = conf.get(PERSISTED_KEY_PREFIX + kind)
+        if not serialized:
+            return None
+        try:
+            entry = json.loads(serialized)
+        except ValueError:
+            LOG.warning("Ignoring invalid cache entry %s", PERSISTED_KEY_PREFIX + kind)
+            return None
+        if entry.get("key") != key or entry.get("expires", 0) <= time.time():
+            return None
+        with self._lock:
+            self._entries[key] = (entry["expires"], entry["value"])
+        return entry["value"]
+
+    def lookup(self, conf: ConfigReader, kind: str, resolve: Callable[[], T]) -> T:
+        """
+        Returns the cached value of the specified kind for the SaaS
+        parameters in the configuration. If there is no valid entry, then
+        calls resolve() and caches the returned value.
+        """
+        key = self._key(conf, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        if self.persist and (value := self._load_persisted(conf, kind, key)):
+            return value
+        value = resolve()
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+        save = getattr(conf, "save", None)
+        if self.persist and save:
+            serialized = json.dumps({"key": key, "expires": expires, "value": value})
+            save(PERSISTED_KEY_PREFIX + kind, serialized)
+        return value
+
+    def invalidate(self, conf: ConfigReader | None = None) -> bool:
+        """
+        Drops the entries for the SaaS parameters in the configuration, or
+        all entries if no configuration is specified. Also removes the
+        persisted entries from the configuration, if the store supports
+        method remove().
+
+        Returns True if any entry has been dropped.
+        """
+        with self._lock:
+            if conf is None:
+                found = bool(self._entries)
+                self._entries.clear()
+                return found
+            keys = [self._key(conf, kind) for kind in _KINDS]
+            found = any([self._entries.pop(key, None) for key in keys])
+        remove = getattr(conf, "remove", None)
+        if remove:
+            for kind in _KINDS:
+                if conf.get(PERSISTED_KEY_PREFIX + kind):
+                    remove(PERSISTED_KEY_PREFIX + kind)
+                    found = True
+        return found
+
+
+SAAS_CACHE = SaasLookupCache()
+"""
+Cache used by the connection factories. Applications can change its TTL or
+enable persisting the entries, e.g. SAAS_CACHE.persist = True.
+"""
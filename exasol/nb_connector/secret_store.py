@@ -1,48 +1,225 @@
 from __future__ import annotations
 
 import contextlib
+import hashlib
 import logging
+import re
+import sys
 import threading
-from collections.abc import Iterable
+from collections.abc import (
+    Iterable,
+    Iterator,
+    Mapping,
+)
 from inspect import cleandoc
 from pathlib import Path
 from typing import (
     Any,
+    TypeVar,
 )
 
-import tenacity
 from sqlcipher3 import dbapi2 as sqlcipher  # type: ignore
-from tenacity import (
-    retry_if_exception_message,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
 
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_snapshot import ConfigSnapshot
+from exasol.nb_connector.secret_store_pool import (
+    DEFAULT_MAX_CONNECTIONS,
+    ConnectionStats,
+    ThreadConnectionPool,
+)
+from exasol.nb_connector.secret_store_watcher import (
+    ChangeCallback,
+    Subscription,
+    _Watcher,
+)
 
 LOG = logging.getLogger(__name__)
 TABLE_NAME = "secrets"
 
+# Default key derivation of SQLCipher 4, see
+# https://www.zetetic.net/sqlcipher/sqlcipher-api/#cipher_compatibility
+KDF_ALGORITHM = "sha512"
+KDF_ITERATIONS = 256000
+KEY_SIZE = 32
+SALT_SIZE = 16
+
+# In WAL mode readers do not block writers and vice versa. Concurrent writers
+# wait up to busy_timeout milliseconds for the lock instead of failing with
+# "database is locked".
+DEFAULT_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+}
+_PRAGMA_VALUE = re.compile(r"-?\w+")
+
+# Max. number of keys in a single statement, SQLite versions before 3.32.0
+# support only 999 host parameters.
+MAX_SQL_VARIABLES = 500
+
+
+KeyT = TypeVar("KeyT", bound="str | CKey")
+
 
 class InvalidPassword(Exception):
     """Signal potentially incorrect master password."""
 
 
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """
+    Returns the smallest string greater than all strings starting with the
+    specified prefix, or None if there is no such string.
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+class _ReadCache:
+    """
+    In-memory copy of the entries read from or written to the secret store.
+
+    SQLite increments the value of PRAGMA data_version of a connection
+    whenever another connection, potentially in another process, has
+    committed changes to the database file. The cache remembers the last
+    version seen by each connection and drops all entries as soon as a
+    connection reports a different version.
+
+    Values read from the database are only stored if no write or
+    invalidation happened in the meantime, as indicated by the generation
+    counter. Otherwise, a concurrent writer could be overridden by an older
+    value.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, str | None] = {}
+        self._versions: dict[int, int] = {}
+        self.generation = 0
+
+    def validate(self, con_id: int, data_version: int) -> None:
+        """
+        Clears the cache if the connection is unknown or if its data
+        version has changed since the last call.
+        """
+        with self._lock:
+            if self._versions.get(con_id) != data_version:
+                self._clear()
+            self._versions[con_id] = data_version
+
+    def forget(self, con_id: int) -> None:
+        with self._lock:
+            self._versions.pop(con_id, None)
+
+    def lookup(self, key: str) -> tuple[bool, str | None]:
+        with self._lock:
+            if key in self._entries:
+                return True, self._entries[key]
+            return False, None
+
+    def store(self, key: str, value: str | None, generation: int) -> None:
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = value
+
+    def update(self, key: str, value: str | None) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self.generation += 1
+        self._entries = {}
+
+
 class Secrets:
-    def __init__(self, db_file: Path, master_password: str) -> None:
+    """
+    Secure Configuration Storage (SCS) based on an encrypted SQLite database.
+
+    With cache=True all values read by get() are kept in memory. Each read
+    still verifies the data version of the database file, so changes by
+    other instances or processes sharing the same file invalidate the
+    cache.
+
+    The pragmas are applied to each new connection, overriding the
+    DEFAULT_PRAGMAS, e.g. pragmas={"busy_timeout": 10000}.
+
+    Each thread uses its own connection. Connections of threads that have
+    exited are closed automatically. If more than max_connections threads
+    access the store, then the idle connections used least recently are
+    closed, too.
+    """
+
+    def __init__(
+        self,
+        db_file: Path,
+        master_password: str,
+        cache: bool = False,
+        pragmas: Mapping[str, str | int] | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ) -> None:
         self.db_file = db_file
         self._master_password = master_password
-        self._lock = threading.Lock()
-        self._cache: dict[int, sqlcipher.Connection] = {}
+        self._pool = ThreadConnectionPool(
+            db_file, self._setup_connection, self._forget_connection, max_connections
+        )
+        self._watcher = _Watcher(self)
+        self._read_cache = _ReadCache() if cache else None
+        self._raw_key: str | None = None
+        self._local = threading.local()
+        self._pragmas = self._validate_pragmas({**DEFAULT_PRAGMAS, **(pragmas or {})})
         self._initialize()
 
     def _initialize(self) -> None:
         if self.db_file.exists():
-            self._verify_access()
+            self._raw_key = self._derive_raw_key(self._read_salt())
+            try:
+                self._verify_access()
+            except InvalidPassword:
+                if self._raw_key is None:
+                    raise
+                LOG.info("Raw key rejected, falling back to the master password")
+                self._raw_key = None
+                self.close()
+                self._verify_access()
             return
         LOG.info('Creating file %s and table "%s"', self.db_file, TABLE_NAME)
         self._execute(f"CREATE TABLE {TABLE_NAME} (key TEXT PRIMARY KEY, value TEXT)")
+        with self._cursor() as cur:
+            cur.execute("PRAGMA cipher_salt")
+            row = cur.fetchone()
+        self._raw_key = self._derive_raw_key(bytes.fromhex(row[0]) if row else b"")
+
+    def _read_salt(self) -> bytes:
+        """
+        SQLCipher stores the salt for the key derivation unencrypted in the
+        first bytes of the database file.
+        """
+        with open(self.db_file, "rb") as f:
+            return f.read(SALT_SIZE)
+
+    def _derive_raw_key(self, salt: bytes) -> str | None:
+        """
+        For each new connection SQLCipher derives the encryption key from
+        the master password, which is intentionally expensive.  This method
+        derives the key once, using the same algorithm as SQLCipher.  The
+        key is kept only in memory and enables opening further connections
+        with a raw key, which skips the key derivation.
+        """
+        if self._master_password is None or len(salt) != SALT_SIZE:
+            return None
+        key = hashlib.pbkdf2_hmac(
+            KDF_ALGORITHM,
+            self._master_password.encode("utf-8"),
+            salt,
+            KDF_ITERATIONS,
+            KEY_SIZE,
+        )
+        return key.hex()
 
     def connection(self) -> sqlcipher.Connection:
         """
@@ -50,45 +227,68 @@ class Secrets:
         multi-threaded scenarios we therefore need to maintain a connection
         pool, containing a separate connection for each thread.
 
+        The returned connection stays open while the current thread is
+        alive, until close() or close_all() is called.
+
         Potential exceptions:
         sqlcipher3.dbapi2.IntegrityError: UNIQUE constraint failed: secrets.key
         sqlcipher3.dbapi2.OperationalError: database is locked
         """
-        thread_id = threading.get_ident()
-        with self._lock:
-            if con := self._cache.get(thread_id):
-                return con
-            con = sqlcipher.connect(self.db_file)  # pylint: disable=E1101
-            self._cache[thread_id] = con
+        return self._pool.pin()
+
+    def _checkout(self) -> contextlib.AbstractContextManager[sqlcipher.Connection]:
+        return self._pool.checkout()
+
+    def _setup_connection(self, con: sqlcipher.Connection) -> None:
         with self._cursor(con) as cur:
             self._use_master_password(cur)
-        return con
+            for name, value in self._pragmas.items():
+                cur.execute(f"PRAGMA {name} = {value}")
+
+    def _forget_connection(self, con_id: int) -> None:
+        if self._read_cache:
+            self._read_cache.forget(con_id)
+
+    def reap_connections(self) -> None:
+        """
+        Closes the connections of threads that have exited.
+        """
+        self._pool.reap()
+
+    def connection_stats(self) -> ConnectionStats:
+        return self._pool.stats()
+
+    @staticmethod
+    def _validate_pragmas(pragmas: dict[str, str | int]) -> dict[str, str | int]:
+        """
+        Pragmas do not support SQL parameters, so names and values are
+        restricted to plain words and numbers.
+        """
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not _PRAGMA_VALUE.fullmatch(str(value)):
+                raise ValueError(f"Invalid pragma {name} = {value}")
+        return pragmas
 
     def close(self) -> None:
-        thread_id = threading.get_ident()
-        with self._lock:
-            con = self._cache.pop(thread_id, None)
-        if con:
-            con.close()
+        self._pool.close_current()
 
     def close_all(self) -> None:
         """
         Close all connections in cache and empty cache.
         """
-        with self._lock:
-            for con in self._cache.values():
-                con.close()
-            self._cache = {}
+        self._pool.close_all()
 
     def __del__(self) -> None:
-        self.close()
+        self.close_all()
 
     def _use_master_password(self, cur: sqlcipher.Cursor) -> None:
         """
         If database is unencrypted then this method encrypts it.
         If database is already encrypted then this method enables to access the data.
         """
-        if self._master_password is not None:
+        if self._raw_key is not None:
+            cur.execute(f"PRAGMA key = \"x'{self._raw_key}'\"")
+        elif self._master_password is not None:
             sanitized = self._master_password.replace("'", "\\'")
             cur.execute(f"PRAGMA key = '{sanitized}'")
 
@@ -107,16 +307,6 @@ class Secrets:
                     """)) from ex
             raise
 
-    # If the database is locked, wait exponentially min. 0.1 seconds, max. 5
-    # seconds (50 * 0.1) and retry executing the current SQL statement.
-    @tenacity.retry(
-        retry=(
-            retry_if_exception_type(sqlcipher.OperationalError)
-            & retry_if_exception_message("database is locked")
-        ),
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=0.1, min=0.1, max=30),
-    )
     def _execute(
         self, stmt: str, args: list[Any] | None = None, cur: sqlcipher.Cursor = None
     ) -> None:
@@ -135,16 +325,66 @@ class Secrets:
         self,
         con: sqlcipher.Connection | None = None,
     ) -> sqlcipher.Cursor:
-        con = con or self.connection()
-        cur = con.cursor()
-        try:
-            yield cur
-            con.commit()
-        except:
-            con.rollback()
-            raise
-        finally:
-            cur.close()
+        with contextlib.ExitStack() as stack:
+            con = con or stack.enter_context(self._checkout())
+            cur = con.cursor()
+            in_transaction = self._in_transaction()
+            try:
+                yield cur
+                if not in_transaction:
+                    con.commit()
+            except:
+                if not in_transaction:
+                    con.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def _in_transaction(self) -> bool:
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[Secrets]:
+        """
+        Groups all changes made by the current thread within the context
+        into a single commit. If the context is left with an exception then
+        all changes are rolled back.
+
+        Nested transactions join the outermost one, i.e. only the outermost
+        transaction commits.
+        """
+        depth = getattr(self._local, "depth", 0)
+        with self._checkout() as con:
+            if depth == 0:
+                self._local.pending = {}
+            self._local.depth = depth + 1
+            try:
+                yield self
+                if depth == 0:
+                    con.commit()
+                    if self._read_cache:
+                        for key, value in self._local.pending.items():
+                            self._read_cache.update(key, value)
+            except:
+                if depth == 0:
+                    con.rollback()
+                raise
+            finally:
+                self._local.depth = depth
+                if depth == 0:
+                    self._local.pending = {}
+
+    def _update_read_cache(self, key: str, value: str | None) -> None:
+        """
+        Changes within a transaction are applied to the cache only after
+        the transaction has been committed.
+        """
+        if not self._read_cache:
+            return
+        if self._in_transaction():
+            self._local.pending[key] = value
+        else:
+            self._read_cache.update(key, value)
 
     def save(self, key: str | CKey, value: str) -> Secrets:
         """key represents a system, service, or application"""
@@ -154,14 +394,108 @@ class Secrets:
             " ON CONFLICT(key) DO UPDATE SET value=?"
         )
         self._execute(stmt, [key, value, value])
+        self._update_read_cache(key, value)
+        return self
+
+    def save_many(self, entries: Mapping[KeyT, str]) -> Secrets:
+        """
+        Saves all specified entries in a single transaction.
+        """
+        with self.transaction():
+            for key, value in entries.items():
+                self.save(key, value)
         return self
 
+    def _data_version(self) -> int:
+        """
+        The data version of the current thread's connection changes when
+        any other connection has committed changes to the database file.
+        """
+        with self._cursor() as cur:
+            cur.execute("PRAGMA data_version")
+            return cur.fetchone()[0]
+
+    def _validate_read_cache(self, cache: _ReadCache) -> None:
+        cache.validate(threading.get_ident(), self._data_version())
+
+    def subscribe(
+        self, keys: Iterable[str | CKey], callback: ChangeCallback
+    ) -> Subscription:
+        """
+        Calls the callback whenever the values of any of the specified keys
+        have changed, including changes made by other instances of Secrets,
+        other threads, or other processes.
+
+        The callback receives a dictionary mapping the names of the changed
+        keys to their new values, or to None if the key has been removed. A
+        background thread checks the data version of the database file every
+        WATCH_INTERVAL seconds and calls the callbacks, so the callbacks need
+        to be thread-safe.
+
+        Returns a Subscription, allowing to cancel the subscription.
+        """
+        subscription = Subscription(self._watcher, self.get_many(keys), callback)
+        self._watcher.subscribe(subscription)
+        return subscription
+
+    def clear_cache(self) -> None:
+        """
+        Drops all values from the in-memory cache, if the cache is enabled.
+        """
+        if self._read_cache:
+            self._read_cache.clear()
+
     def get(self, key: str | CKey, default_value: str | None = None) -> str | None:
         key = key.name if isinstance(key, CKey) else key
+        cache = None if self._in_transaction() else self._read_cache
+        if cache:
+            self._validate_read_cache(cache)
+            found, value = cache.lookup(key)
+            if found:
+                return default_value if value is None else value
+            generation = cache.generation
         with self._cursor() as cur:
             self._execute(f"SELECT value FROM {TABLE_NAME} WHERE key=?", [key], cur=cur)
             row = cur.fetchone()
-        return row[0] if row else default_value
+        value = row[0] if row else None
+        if cache:
+            cache.store(key, value, generation)
+        return default_value if value is None else value
+
+    def get_many(
+        self, keys: Iterable[str | CKey], default_value: str | None = None
+    ) -> dict[str, str | None]:
+        """
+        Reads the values of all specified keys with a single query per chunk
+        of keys. Returns a dictionary mapping the names of the keys to their
+        values, using the default value for missing keys.
+        """
+        names = [key.name if isinstance(key, CKey) else key for key in keys]
+        cache = None if self._in_transaction() else self._read_cache
+        found: dict[str, str | None] = {}
+        if cache:
+            self._validate_read_cache(cache)
+            for name in names:
+                hit, value = cache.lookup(name)
+                if hit:
+                    found[name] = value
+            generation = cache.generation
+        missing = list(dict.fromkeys(n for n in names if n not in found))
+        for start in range(0, len(missing), MAX_SQL_VARIABLES):
+            chunk = missing[start : start + MAX_SQL_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            stmt = f"SELECT key, value FROM {TABLE_NAME} WHERE key IN ({placeholders})"
+            with self._cursor() as cur:
+                self._execute(stmt, chunk, cur=cur)
+                rows = dict(cur.fetchall())
+            for name in chunk:
+                found[name] = rows.get(name)
+                if cache:
+                    cache.store(name, found[name], generation)
+        return {
+            name: default_value if found[name] is None else found[name]
+            for name in names
+        }
 
     def __getattr__(self, key) -> str:
         val = self.get(key)
@@ -175,23 +509,58 @@ class Secrets:
             raise AttributeError(f'Unknown key "{item}"')
         return val
 
-    def keys(self) -> Iterable[str]:
-        """Iterator over keys akin to dict.keys()"""
+    def _select(self, columns: str, prefix: str) -> Iterator[tuple]:
+        """
+        Selects the specified columns of all entries with keys starting
+        with the specified prefix. A non-empty prefix is translated into a
+        range condition on the primary key, enabling SQLite to scan only the
+        matching range of the index.
+        """
+        stmt = f"SELECT {columns} FROM {TABLE_NAME}"
+        args: list[str] = []
+        if prefix:
+            stmt += " WHERE key >= ?"
+            args.append(prefix)
+            if upper := _prefix_upper_bound(prefix):
+                stmt += " AND key < ?"
+                args.append(upper)
         with self._cursor() as cur:
-            self._execute(f"SELECT key FROM {TABLE_NAME}", cur=cur)
-            yield from (row[0] for row in cur)
+            self._execute(stmt, args, cur=cur)
+            yield from cur
 
-    def values(self) -> Iterable[str]:
-        """Iterator over values akin to dict.values()"""
-        with self._cursor() as cur:
-            self._execute(f"SELECT value FROM {TABLE_NAME}", cur=cur)
-            yield from (row[0] for row in cur)
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        """
+        Iterator over keys akin to dict.keys(), optionally restricted to
+        the keys starting with the specified prefix.
+        """
+        yield from (row[0] for row in self._select("key", prefix))
 
-    def items(self) -> Iterable[tuple[str, str]]:
-        """Iterator over keys and values akin to dict.items()"""
-        with self._cursor() as cur:
-            self._execute(f"SELECT key, value FROM {TABLE_NAME}", cur=cur)
-            yield from ((row[0], row[1]) for row in cur)
+    def values(self, prefix: str = "") -> Iterable[str]:
+        """
+        Iterator over values akin to dict.values(), optionally restricted to
+        the entries with keys starting with the specified prefix.
+        """
+        yield from (row[0] for row in self._select("value", prefix))
+
+    def items(self, prefix: str = "") -> Iterable[tuple[str, str]]:
+        """
+        Iterator over keys and values akin to dict.items(), optionally
+        restricted to the entries with keys starting with the specified
+        prefix.
+        """
+        yield from ((row[0], row[1]) for row in self._select("key, value", prefix))
+
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        Reads all entries with a single query and returns them as an
+        immutable ConfigSnapshot with the values already parsed. The
+        connection factories accept the snapshot instead of the secret store,
+        saving the queries when opening connections repeatedly.
+
+        Changes saved after creating the snapshot are not visible in the
+        snapshot.
+        """
+        return ConfigSnapshot(self.items())
 
     def remove(self, key: str | CKey) -> None:
         """
@@ -200,3 +569,12 @@ class Secrets:
         """
         key = key.name if isinstance(key, CKey) else key
         self._execute(f"DELETE FROM {TABLE_NAME} WHERE key=?", [key])
+        self._update_read_cache(key, None)
+
+    def remove_many(self, keys: Iterable[str | CKey]) -> None:
+        """
+        Deletes the entries with the specified keys in a single transaction.
+        """
+        with self.transaction():
+            for key in keys:
+                self.remove(key)
@@ -0,0 +1,230 @@
+"""
+Pool of the SQLite connections of the secret store, one per thread.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+import weakref
+from collections.abc import (
+    Callable,
+    Iterator,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+from pathlib import Path
+
+from sqlcipher3 import dbapi2 as sqlcipher  # type: ignore
+
+LOG = logging.getLogger(__name__)
+
+# Max. number of connections kept open by a single instance of Secrets.
+DEFAULT_MAX_CONNECTIONS = 32
+
+
+@dataclass(frozen=True)
+class ConnectionStats:
+    """
+    Metrics of the connection pool of an instance of Secrets.
+    """
+
+    open_connections: int
+    reaped_connections: int
+    evicted_connections: int
+
+
+@dataclass
+class _PooledConnection:
+    con: sqlcipher.Connection
+    thread: weakref.ref[threading.Thread]
+    in_use: int = 0
+    # Set when the connection has been handed out to the caller without a
+    # scope, see ThreadConnectionPool.pin().
+    pinned: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+
+    def is_orphaned(self) -> bool:
+        thread = self.thread()
+        return thread is None or not thread.is_alive()
+
+    def is_idle(self) -> bool:
+        return self.in_use == 0 and not self.pinned
+
+
+class ThreadConnectionPool:
+    """
+    SQLite allows a connection to be used only by a single thread. The pool
+    therefore maintains a separate connection for each thread.
+
+    Connections of threads that have exited are closed automatically. If
+    more than max_connections threads access the database, then the idle
+    connections used least recently are closed, too. Connections in use or
+    pinned by their thread are never closed by other threads, unless their
+    thread has exited.
+
+    Parameters:
+        db_file:
+            The database file.
+        setup:
+            Called with each new connection, e.g. for setting the key.
+        on_close:
+            Called with the id of the thread of a connection before the
+            connection is closed.
+        max_connections:
+            Max. number of connections kept open.
+    """
+
+    def __init__(
+        self,
+        db_file: Path,
+        setup: Callable[[sqlcipher.Connection], None],
+        on_close: Callable[[int], None],
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ) -> None:
+        self.db_file = db_file
+        self._setup = setup
+        self._on_close = on_close
+        self._max_connections = max_connections
+        self._lock = threading.Lock()
+        self._connections: dict[int, _PooledConnection] = {}
+        self._reaped = 0
+        self._evicted = 0
+
+    @contextlib.contextmanager
+    def checkout(self) -> Iterator[sqlcipher.Connection]:
+        """
+        Provides the connection of the current thread and marks it as in
+        use, preventing the connection from being evicted from the pool.
+        """
+        pooled = self._pooled_connection()
+        try:
+            yield pooled.con
+        finally:
+            with self._lock:
+                pooled.in_use -= 1
+
+    def pin(self) -> sqlcipher.Connection:
+        """
+        Returns the connection of the current thread, which is never evicted
+        while its thread is alive, as the caller may keep using it. The
+        connection is only closed by close_current(), close_all(), or after
+        its thread has exited.
+        """
+        pooled = self._pooled_connection()
+        with self._lock:
+            pooled.pinned = True
+            pooled.in_use -= 1
+        return pooled.con
+
+    def _pooled_connection(self) -> _PooledConnection:
+        thread = threading.current_thread()
+        thread_id = threading.get_ident()
+        with self._lock:
+            pooled = self._connections.get(thread_id)
+            if pooled and pooled.thread() is thread:
+                pooled.in_use += 1
+                pooled.last_used = time.monotonic()
+                return pooled
+            obsolete = self._remove_obsolete_connections()
+            # Each connection is used only by its own thread, but may be
+            # closed by other threads after its thread has exited.
+            con = sqlcipher.connect(  # pylint: disable=E1101
+                self.db_file, check_same_thread=False
+            )
+            pooled = _PooledConnection(con, weakref.ref(thread), in_use=1)
+            self._connections[thread_id] = pooled
+        for con_id, other in obsolete:
+            self._close(con_id, other.con)
+        try:
+            self._setup(con)
+        except:
+            with self._lock:
+                pooled.in_use -= 1
+            raise
+        return pooled
+
+    def _remove_obsolete_connections(self) -> list[tuple[int, _PooledConnection]]:
+        """
+        Removes the connections of threads that have exited from the pool.
+        If the pool is still full, then removes idle connections, the least
+        recently used first. Returns the removed connections.
+
+        Thread ids may be reused after a thread has exited. Hence, the
+        connection of a thread that has exited may also be found under the
+        id of the current thread.
+
+        Must be called while holding self._lock.
+        """
+        reaped = self._remove_orphaned_connections()
+        excess = len(self._connections) + 1 - self._max_connections
+        idle = sorted(
+            ((i, p) for i, p in self._connections.items() if p.is_idle()),
+            key=lambda item: item[1].last_used,
+        )
+        evicted = idle[: max(excess, 0)]
+        self._evicted += len(evicted)
+        for con_id, _ in evicted:
+            del self._connections[con_id]
+        if len(self._connections) >= self._max_connections:
+            LOG.warning(
+                "More than %d connections to %s are in use",
+                self._max_connections,
+                self.db_file,
+            )
+        return reaped + evicted
+
+    def _remove_orphaned_connections(self) -> list[tuple[int, _PooledConnection]]:
+        """
+        Must be called while holding self._lock.
+        """
+        orphaned = [(i, p) for i, p in self._connections.items() if p.is_orphaned()]
+        self._reaped += len(orphaned)
+        for con_id, _ in orphaned:
+            del self._connections[con_id]
+        return orphaned
+
+    def _close(self, con_id: int, con: sqlcipher.Connection) -> None:
+        self._on_close(con_id)
+        con.close()
+
+    def reap(self) -> None:
+        """
+        Closes the connections of threads that have exited.
+        """
+        with self._lock:
+            reaped = self._remove_orphaned_connections()
+        for con_id, pooled in reaped:
+            self._close(con_id, pooled.con)
+
+    def stats(self) -> ConnectionStats:
+        with self._lock:
+            return ConnectionStats(
+                open_connections=len(self._connections),
+                reaped_connections=self._reaped,
+                evicted_connections=self._evicted,
+            )
+
+    def close_current(self) -> None:
+        """
+        Closes the connection of the current thread.
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            pooled = self._connections.pop(thread_id, None)
+        if pooled:
+            self._close(thread_id, pooled.con)
+
+    def close_all(self) -> None:
+        """
+        Closes all connections.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = {}
+        for thread_id, pooled in connections.items():
+            self._close(thread_id, pooled.con)
@@ -0,0 +1,130 @@
+"""
+Background thread notifying subscribers of the secret store about changed
+keys.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import weakref
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from exasol.nb_connector.secret_store import Secrets
+
+LOG = logging.getLogger(__name__)
+
+# Seconds between two checks of the watcher for changes of subscribed keys.
+WATCH_INTERVAL = 1.0
+
+ChangeCallback = Callable[[dict[str, "str | None"]], None]
+
+
+class Subscription:
+    """
+    Handle of a subscription to changes of keys, see Secrets.subscribe().
+    """
+
+    def __init__(
+        self,
+        watcher: _Watcher,
+        values: dict[str, str | None],
+        callback: ChangeCallback,
+    ) -> None:
+        self._watcher = watcher
+        self.values = values
+        self.callback = callback
+
+    @property
+    def active(self) -> bool:
+        return self._watcher.is_subscribed(self)
+
+    def cancel(self) -> None:
+        """
+        Stops calling the callback. Stops the watcher thread, if this was
+        the last subscription.
+        """
+        self._watcher.unsubscribe(self)
+
+
+class _Watcher:
+    """
+    Background thread checking the data version of the store every
+    WATCH_INTERVAL seconds. If the data version has changed, then the
+    watcher reads the subscribed keys and calls the callbacks of the
+    subscriptions with changed values.
+
+    The thread references the store only weakly, and terminates if the
+    store has been deleted or if all subscriptions have been cancelled.
+    """
+
+    def __init__(self, secrets: Secrets) -> None:
+        self._secrets = weakref.ref(secrets)
+        self._lock = threading.Lock()
+        self._subscriptions: list[Subscription] = []
+        self._stop = threading.Event()
+
+    def is_subscribed(self, subscription: Subscription) -> bool:
+        with self._lock:
+            return subscription in self._subscriptions
+
+    def subscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if len(self._subscriptions) == 1:
+                self._stop = threading.Event()
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(self._stop,),
+                    name="secret-store-watcher",
+                    daemon=True,
+                )
+                thread.start()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                if not self._subscriptions:
+                    self._stop.set()
+
+    def _run(self, stop: threading.Event) -> None:
+        data_version = None
+        while True:
+            secrets = self._secrets()
+            if secrets is None:
+                return
+            if stop.is_set():
+                secrets.close()
+                return
+            try:
+                current = secrets._data_version()
+                if current != data_version:
+                    data_version = current
+                    self._notify(secrets)
+            except Exception:  # pylint: disable=broad-exception-caught
+                LOG.exception("Failed to check %s for changes", secrets.db_file)
+            # Don't prevent the store from being deleted while waiting.
+            del secrets
+            stop.wait(WATCH_INTERVAL)
+
+    def _notify(self, secrets: Secrets) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        keys = {key for s in subscriptions for key in s.values}
+        current = secrets.get_many(keys)
+        for subscription in subscriptions:
+            changed = {
+                key: current[key]
+                for key, value in subscription.values.items()
+                if current[key] != value
+            }
+            if not changed or not self.is_subscribed(subscription):
+                continue
+            subscription.values.update(changed)
+            try:
+                subscription.callback(changed)
+            except Exception:  # pylint: disable=broad-exception-caught
+                LOG.exception("Callback for changed keys %s failed", list(changed))
@@ -28,9 +28,11 @@ from transformers import (
 
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.bfs_connection import ensure_bfs_connection
-from exasol.nb_connector.connections import (
-    open_pyexasol_connection,
+from exasol.nb_connector.connection_pool import (
+    pooled_pyexasol_connection,
+    pyexasol_connection_pool,
 )
+from exasol.nb_connector.connections import open_pyexasol_connection
 from exasol.nb_connector.extension_wrapper_common import (
     PATH_IN_BUCKET_FOR_SLC,
     deploy_language_container,
@@ -104,8 +106,8 @@ def deploy_license(
     if license_file:
         license_content = license_file.read_text()
 
-    pyexasol_connection = open_pyexasol_connection(conf)
-    txai_licenses.create_connection(pyexasol_connection, license_content)
+    with pooled_pyexasol_connection(conf, compression=True) as pyexasol_connection:
+        txai_licenses.create_connection(pyexasol_connection, license_content)
 
 
 def initialize_text_ai_extension(
@@ -176,54 +178,60 @@ def initialize_text_ai_extension(
             udf_client_binary=LEGACY_UDF_CLIENT_BINARY,
         )
 
-    print("Text AI: Updating Secure Configuration Storage")
-    conf.save(CKey.txaie_models_cache_dir, MODELS_CACHE_DIR)
-
-    print("Text AI: Ensuring BFS model connection")
-    ensure_bfs_connection(conf)
-    ensure_model_subdir_config_value(conf)
-
-    if install_slc:
-        print("Text AI: Downloading and installing Script Language Container (SLC)")
-        if container_file:
-            deploy_slc(container_file=container_file)
-        else:
-            version = version or importlib.metadata.version("exasol_text_ai_extension")
-            deploy_slc(version=version)
-
-    if install_models:
-        #  Install default Hugging Face models into the Bucketfs using
-        #  Transformers Extensions upload model functionality.
-        print("Text AI: Downloading and installing Huggingface models to BucketFS:")
-        install_model(
-            conf,
-            TransformerModel(
-                DEFAULT_FEATURE_EXTRACTION_MODEL, "feature-extraction", AutoModel
-            ),
-        )
-        install_model(
-            conf,
-            TransformerModel(
-                DEFAULT_NAMED_ENTITY_MODEL,
-                "token-classification",
-                AutoModelForTokenClassification,
-            ),
-        )
-        install_model(
-            conf,
-            TransformerModel(
-                DEFAULT_NLI_MODEL,
-                "zero-shot-classification",
-                AutoModelForSequenceClassification,
-            ),
-        )
+    # Reuse a database session for the steps creating connection objects.
+    with pyexasol_connection_pool():
+        print("Text AI: Updating Secure Configuration Storage")
+        conf.save(CKey.txaie_models_cache_dir, MODELS_CACHE_DIR)
+
+        print("Text AI: Ensuring BFS model connection")
+        ensure_bfs_connection(conf)
+        ensure_model_subdir_config_value(conf)
+
+        if install_slc:
+            print("Text AI: Downloading and installing Script Language Container (SLC)")
+            if container_file:
+                deploy_slc(container_file=container_file)
+            else:
+                version = version or importlib.metadata.version(
+                    "exasol_text_ai_extension"
+                )
+                deploy_slc(version=version)
+
+        if install_models:
+            #  Install default Hugging Face models into the Bucketfs using
+            #  Transformers Extensions upload model functionality.
+            print("Text AI: Downloading and installing Huggingface models to BucketFS:")
+            install_model(
+                conf,
+                TransformerModel(
+                    DEFAULT_FEATURE_EXTRACTION_MODEL, "feature-extraction", AutoModel
+                ),
+            )
+            install_model(
+                conf,
+                TransformerModel(
+                    DEFAULT_NAMED_ENTITY_MODEL,
+                    "token-classification",
+                    AutoModelForTokenClassification,
+                ),
+            )
+            install_model(
+                conf,
+                TransformerModel(
+                    DEFAULT_NLI_MODEL,
+                    "zero-shot-classification",
+                    AutoModelForSequenceClassification,
+                ),
+            )
 
-    if install_scripts:
-        print("Text AI: Creating Scripts")
-        pyexasol_connection = open_pyexasol_connection(
-            conf, schema=conf.get(CKey.db_schema)
-        )
-        create_scripts(pyexasol_connection)
+        if install_scripts:
+            print("Text AI: Creating Scripts")
+            # Creating the scripts may activate the language container in
+            # the session, so the connection must not be pooled.
+            with open_pyexasol_connection(
+                conf, schema=conf.get(CKey.db_schema)
+            ) as pyexasol_connection:
+                create_scripts(pyexasol_connection)
 
     print("Text AI: Installation finished.")
 
@@ -242,6 +250,8 @@ class Extraction(AbstractExtraction):
     def run(self, conf: Secrets) -> None:
         activation_sql = get_activation_sql(conf)
         defaults = self.defaults_with_model_repository(conf)
+        # The activation SQL alters the session, so the connection must not
+        # be pooled.
         with open_pyexasol_connection(conf, compression=True) as connection:
             connection.execute(query=activation_sql)
             TextAiExtraction(
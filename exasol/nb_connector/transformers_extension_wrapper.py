@@ -7,6 +7,7 @@ from exasol_transformers_extension.deployment.te_language_container_deployer imp
 
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.bfs_connection import ensure_bfs_connection
+from exasol.nb_connector.connection_pool import pyexasol_connection_pool
 from exasol.nb_connector.connections import open_pyexasol_connection
 from exasol.nb_connector.extension_wrapper_common import (
     PATH_IN_BUCKET_FOR_SLC,
@@ -56,9 +57,10 @@ def deploy_scripts(conf: Secrets, language_alias: str) -> None:
             The language alias of the extension's language container.
     """
 
+    activation_sql = get_activation_sql(conf)
+    # The activation alters the session, so the connection must not be pooled.
     with open_pyexasol_connection(conf, compression=True) as conn:
         # First need to activate the language container at the session level, otherwise the script creation fails.
-        activation_sql = get_activation_sql(conf)
         conn.execute(activation_sql)
 
         scripts_deployer = ScriptsDeployer(
@@ -109,39 +111,41 @@ def initialize_te_extension(
             in a RuntimeError.
     """
 
-    # Make the connection object names
-    db_user = str(conf.get(CKey.db_user))
-    token = conf.get(CKey.huggingface_token)
-    hf_conn_name = "_".join([HF_CONNECTION_PREFIX, db_user]) if token else ""
-
-    if run_deploy_container:
-        container_url = TeLanguageContainerDeployer.SLC_URL_FORMATTER.format(
-            version=version
-        )
-        deploy_language_container(
-            conf,
-            container_url=container_url,
-            container_name=TeLanguageContainerDeployer.SLC_NAME,
-            language_alias=language_alias,
-            activation_key=ACTIVATION_KEY,
-            path_in_bucket=PATH_IN_BUCKET_FOR_SLC,
-            allow_override=allow_override,
-            udf_client_binary=LEGACY_UDF_CLIENT_BINARY,
-        )
-
-    ensure_bfs_connection(conf)
-    ensure_model_subdir_config_value(conf)
-
-    # Create the required objects in the database
-    if run_deploy_scripts:
-        deploy_scripts(conf, language_alias)
-    if token and run_encapsulate_hf_token:
-        encapsulate_huggingface_token(conf, hf_conn_name)
-
-    # Save the connection object name in the secret store.
-    conf.save(CKey.te_hf_connection, hf_conn_name)
-    # Save the directory names in the secret store
-    conf.save(CKey.te_models_cache_dir, MODELS_CACHE_DIR)
+    # Reuse a database session for the steps creating connection objects.
+    with pyexasol_connection_pool():
+        # Make the connection object names
+        db_user = str(conf.get(CKey.db_user))
+        token = conf.get(CKey.huggingface_token)
+        hf_conn_name = "_".join([HF_CONNECTION_PREFIX, db_user]) if token else ""
+
+        if run_deploy_container:
+            container_url = TeLanguageContainerDeployer.SLC_URL_FORMATTER.format(
+                version=version
+            )
+            deploy_language_container(
+                conf,
+                container_url=container_url,
+                container_name=TeLanguageContainerDeployer.SLC_NAME,
+                language_alias=language_alias,
+                activation_key=ACTIVATION_KEY,
+                path_in_bucket=PATH_IN_BUCKET_FOR_SLC,
+                allow_override=allow_override,
+                udf_client_binary=LEGACY_UDF_CLIENT_BINARY,
+            )
+
+        ensure_bfs_connection(conf)
+        ensure_model_subdir_config_value(conf)
+
+        # Create the required objects in the database
+        if run_deploy_scripts:
+            deploy_scripts(conf, language_alias)
+        if token and run_encapsulate_hf_token:
+            encapsulate_huggingface_token(conf, hf_conn_name)
+
+        # Save the connection object name in the secret store.
+        conf.save(CKey.te_hf_connection, hf_conn_name)
+        # Save the directory names in the secret store
+        conf.save(CKey.te_models_cache_dir, MODELS_CACHE_DIR)
 
 
 def upload_model_from_cache(conf: Secrets, model_name: str, cache_dir: str) -> None:
@@ -4,6 +4,7 @@ from pathlib import Path
 import ipywidgets as widgets
 from IPython import get_ipython
 
+from exasol.nb_connector.connection_warmup import warm_up
 from exasol.nb_connector.secret_store import (
     InvalidPassword,
     Secrets,
@@ -116,6 +117,8 @@ def get_access_store(root_dir: str | None = None) -> widgets.Widget:
         else:
             open_btn.icon = "check"
             ipython.push({"ai_lab_config": ai_lab_config}, interactive=True)
+            # Most notebooks open pyexasol connections with compression.
+            warm_up(ai_lab_config, compression=True)
         finally:
             set_sb_store_file(str(sb_store_file))
 
@@ -7,12 +7,16 @@
 from IPython import get_ipython
 from IPython.core.error import UsageError
 
-from exasol.nb_connector.connections import open_sqlalchemy_connection
+from exasol.nb_connector.connections import (
+    JUPYSQL_ENGINE_OPTIONS,
+    open_sqlalchemy_connection,
+)
 from exasol.nb_connector.language_container_activation import get_activation_sql
 
 
 def init(ai_lab_config):
-    engine = open_sqlalchemy_connection(ai_lab_config)
+    # Reuse the cached engine on repeated initialization or after warm_up().
+    engine = open_sqlalchemy_connection(ai_lab_config, **JUPYSQL_ENGINE_OPTIONS)
     ipy = get_ipython()
     if ipy is None:
         raise RuntimeError(
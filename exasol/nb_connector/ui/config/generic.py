@@ -34,9 +34,7 @@ def get_config(
     )
 
     def save(btn):
-        for row in chain(*inputs):
-            _, widget, key = row
-            secrets.save(key, str(widget.value))
+        secrets.save_many({key: str(widget.value) for _, widget, key in chain(*inputs)})
         btn.icon = "check"
 
     def on_value_change(change):
@@ -0,0 +1,146 @@
+"""
+Registry of the pyexasol connections opened in advance by warm_up(), each
+handed to the first caller with the same connection parameters.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pyexasol
+
+LOG = logging.getLogger(__name__)
+
+# Seconds after which a connection opened by warm_up() is discarded if it
+# has not been taken by any caller.
+WARM_CONNECTION_TIMEOUT = 300.0
+
+# Connections opened by warm_up(), keyed by the fingerprint of their
+# parameters, and the timers closing them when they expire.
+_WARM_CONNECTIONS: dict[str, Future[IdleConnection]] = {}
+_EXPIRY_TIMERS: dict[str, threading.Timer] = {}
+_WARM_LOCK = threading.Lock()
+
+
+@dataclass
+class IdleConnection:
+    """
+    A pyexasol connection not used by any caller, with the fingerprint of
+    its parameters, and the time since when it has been idle.
+    """
+
+    conn: pyexasol.ExaConnection
+    fingerprint: str
+    since: float
+
+
+def close_quietly(conn: pyexasol.ExaConnection) -> None:
+    try:
+        conn.close()
+    except Exception as ex:  # pylint: disable=broad-exception-caught
+        LOG.debug("Failed to close connection: %s", ex)
+
+
+def has_warm_connections() -> bool:
+    """
+    Checks if there are any warm connections, saving the callers to compute
+    the fingerprint of their parameters otherwise.
+    """
+    return bool(_WARM_CONNECTIONS)
+
+
+def _close_when_done(future: Future[IdleConnection]) -> None:
+    def close(done: Future[IdleConnection]) -> None:
+        if done.exception() is None:
+            close_quietly(done.result().conn)
+
+    future.add_done_callback(close)
+
+
+def _expire(fingerprint: str, future: Future[IdleConnection]) -> None:
+    with _WARM_LOCK:
+        if _WARM_CONNECTIONS.get(fingerprint) is not future:
+            return
+        del _WARM_CONNECTIONS[fingerprint]
+        _EXPIRY_TIMERS.pop(fingerprint, None)
+    LOG.debug("Closing expired warm connection")
+    _close_when_done(future)
+
+
+def _start_expiry_timer(fingerprint: str, future: Future[IdleConnection]) -> None:
+    timer = threading.Timer(
+        WARM_CONNECTION_TIMEOUT, _expire, args=(fingerprint, future)
+    )
+    timer.daemon = True
+    with _WARM_LOCK:
+        if _WARM_CONNECTIONS.get(fingerprint) is not future:
+            return
+        _EXPIRY_TIMERS[fingerprint] = timer
+    timer.start()
+
+
+def reserve_warm_connection(fingerprint: str) -> Future[IdleConnection] | None:
+    """
+    Registers a connection about to be opened. Returns the future to be
+    completed with the connection, or None if there already is a warm
+    connection with the same parameters.
+
+    Unless taken by a caller, the connection is closed
+    WARM_CONNECTION_TIMEOUT seconds after it has been opened.
+    """
+    future: Future[IdleConnection] = Future()
+    with _WARM_LOCK:
+        if fingerprint in _WARM_CONNECTIONS:
+            return None
+        _WARM_CONNECTIONS[fingerprint] = future
+    future.add_done_callback(lambda done: _start_expiry_timer(fingerprint, done))
+    return future
+
+
+def take_warm_connection(fingerprint: str) -> pyexasol.ExaConnection | None:
+    """
+    Returns the warm connection with the same parameters, waiting for it if
+    it is still being opened, or None if there is no such connection.
+    """
+    with _WARM_LOCK:
+        future = _WARM_CONNECTIONS.pop(fingerprint, None)
+        timer = _EXPIRY_TIMERS.pop(fingerprint, None)
+    if timer is not None:
+        timer.cancel()
+    if future is None:
+        return None
+    try:
+        warm = future.result()
+    except Exception:  # pylint: disable=broad-exception-caught
+        return None
+    if warm.conn.is_closed or warm.since < time.monotonic() - WARM_CONNECTION_TIMEOUT:
+        close_quietly(warm.conn)
+        return None
+    return warm.conn
+
+
+def close_warm_connections() -> None:
+    """
+    Closes the pyexasol connections opened by warm_up() which have not been
+    taken by any caller, including connections still being opened. Called
+    automatically at the exit of the interpreter.
+    """
+    with _WARM_LOCK:
+        futures = list(_WARM_CONNECTIONS.values())
+        timers = list(_EXPIRY_TIMERS.values())
+        _WARM_CONNECTIONS.clear()
+        _EXPIRY_TIMERS.clear()
+    for timer in timers:
+        timer.cancel()
+    for future in futures:
+        _close_when_done(future)
+
+
+atexit.register(close_warm_connections)
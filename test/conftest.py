@@ -5,11 +5,22 @@ from test.utils.secrets import sample_db_file
 
 import pytest
 
+from exasol.nb_connector.connections import dispose_sqlalchemy_engines
+from exasol.nb_connector.saas_cache import SAAS_CACHE
 from exasol.nb_connector.secret_store import Secrets
+from exasol.nb_connector.warm_connections import close_warm_connections
 
 pytest_plugins = ["test.integration.ui.common.utils.notebook_test_utils"]
 
 
+@pytest.fixture(autouse=True)
+def clear_connection_caches() -> Iterator[None]:
+    yield
+    SAAS_CACHE.invalidate()
+    dispose_sqlalchemy_engines()
+    close_warm_connections()
+
+
 @pytest.fixture
 def secrets() -> Iterator[Secrets]:
     with sample_db_file() as secret_db:
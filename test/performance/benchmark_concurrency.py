@@ -0,0 +1,78 @@
+import statistics
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+
+from exasol.nb_connector.secret_store import Secrets
+
+PASSWORD = "abc"
+WORKERS = 8
+OPERATIONS = 50
+
+
+def access_secret_store(secrets: Secrets, worker: int) -> list[float]:
+    """
+    Mixes reads and writes with every 4th operation being a write and
+    returns the latency of each operation in seconds.
+    """
+    latencies = []
+    for i in range(OPERATIONS):
+        start = time.perf_counter()
+        if i % 4 == 0:
+            secrets.save(f"key-{worker}", f"value {i}")
+        else:
+            secrets.get(f"key-{worker}")
+        latencies.append(time.perf_counter() - start)
+    secrets.close()
+    return latencies
+
+
+def access_in_process(db_file: Path, worker: int) -> list[float]:
+    return access_secret_store(Secrets(db_file, PASSWORD), worker)
+
+
+def run_concurrently(executor: Executor, task, *args) -> list[float]:
+    futures = [executor.submit(task, *args, worker) for worker in range(WORKERS)]
+    return [latency for f in futures for latency in f.result()]
+
+
+def record_tail_latency(benchmark, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    benchmark.extra_info.update(
+        {
+            "operations": len(latencies),
+            "p50": quantiles[49],
+            "p95": quantiles[94],
+            "p99": quantiles[98],
+            "max": max(latencies),
+        }
+    )
+
+
+def test_threads(secrets, benchmark):
+    latencies: list[float] = []
+
+    def run():
+        with ThreadPoolExecutor(WORKERS) as executor:
+            latencies.extend(run_concurrently(executor, access_secret_store, secrets))
+
+    benchmark.pedantic(run, iterations=1, rounds=5)
+    record_tail_latency(benchmark, latencies)
+
+
+def test_processes(secrets, benchmark):
+    latencies: list[float] = []
+    secrets.save("key", "value")
+
+    def run():
+        with ProcessPoolExecutor(WORKERS) as executor:
+            latencies.extend(
+                run_concurrently(executor, access_in_process, secrets.db_file)
+            )
+
+    benchmark.pedantic(run, iterations=1, rounds=3)
+    record_tail_latency(benchmark, latencies)
@@ -0,0 +1,27 @@
+import threading
+
+import pytest
+
+
+def open_connection_in_new_thread(secrets):
+    def access_secret_store():
+        secrets.get("key")
+        secrets.close()
+
+    thread = threading.Thread(target=access_secret_store)
+    thread.start()
+    thread.join()
+
+
+@pytest.mark.parametrize("raw_key", [True, False], ids=["raw_key", "master_password"])
+def test_first_access_per_thread(secrets, benchmark, raw_key):
+    """
+    Compares the latency of the first access from a new thread when using
+    the raw key derived once per instance vs. deriving the key from the
+    master password for each connection.
+    """
+    if not raw_key:
+        secrets._raw_key = None
+    benchmark.pedantic(
+        open_connection_in_new_thread, args=(secrets,), iterations=1, rounds=15
+    )
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import pytest
+
+MODULES = [
+    "exasol.nb_connector",
+    "exasol.nb_connector.connections",
+    # Module of the ai-lab and scs CLI entry points
+    "exasol.nb_connector.cli.groups",
+]
+
+# Backends which should only be imported when actually used
+HEAVY_MODULES = [
+    "ibis",
+    "sqlalchemy",
+    "pyexasol",
+    "exasol.bucketfs",
+    "exasol.saas.client",
+]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports the module in a new interpreter and returns the cumulative import
+    time in microseconds of each module, as reported by python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_cold_import(benchmark, module):
+    """
+    Measures the time for importing the module in a new interpreter. The
+    extra_info contains the cumulative import time of the module itself.
+    """
+    times = benchmark.pedantic(import_times, args=(module,), iterations=1, rounds=5)
+    benchmark.extra_info["import_time_us"] = times[module]
+    heavy = [m for m in HEAVY_MODULES if m in times]
+    assert not heavy, f"Importing {module} imports {heavy}"
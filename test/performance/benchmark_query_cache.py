@@ -0,0 +1,73 @@
+import io
+from unittest import mock
+
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import MemoryStore
+from exasol.nb_connector.query_cache import QueryCache
+
+ROWS = 1_000_000
+
+COLUMNS = {
+    "ID": {"type": "DECIMAL", "precision": 18, "scale": 0},
+    "NAME": {"type": "VARCHAR", "size": 100},
+    "PRICE": {"type": "DOUBLE"},
+}
+
+QUERY = "SELECT * FROM T"
+
+
+class FakeTransport:
+    exa_address = "10.0.0.1:8563"
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.http_thread = mock.Mock()
+
+    def export_to_callback(self, callback, dst):
+        return callback(io.BytesIO(self.data), dst)
+
+
+@pytest.fixture
+def conf() -> MemoryStore:
+    return MemoryStore(
+        {
+            CKey.db_host_name: "localhost",
+            CKey.db_port: "8563",
+            CKey.db_user: "sys",
+            CKey.db_password: "exasol",
+        }
+    )
+
+
+@pytest.fixture
+def cache(tmp_path, conf) -> QueryCache:
+    """
+    Returns a cache with the result of a query with 1 million rows, provided
+    by a simulated database.
+    """
+    data = b"".join(b'%d,"name %d",%d.5\n' % (i, i, i) for i in range(ROWS))
+    conn = mock.MagicMock()
+    conn.__enter__.return_value = conn
+    conn.options = {"compression": False, "encryption": True}
+    conn.meta.sql_columns.return_value = COLUMNS
+    conn.get_nodes.return_value = [{"ipaddr": "10.0.0.1", "port": 8563, "idx": 0}]
+    cache = QueryCache(tmp_path)
+    with (
+        mock.patch("pyexasol.connect", return_value=conn),
+        mock.patch("pyexasol.http_transport", return_value=FakeTransport(data)),
+    ):
+        cache.query(conf, QUERY)
+    return cache
+
+
+def test_cached_query(benchmark, cache, conf):
+    """
+    Measures replaying a cached result with 1 million rows, which is
+    memory-mapped without a round trip to the database.
+    """
+    with mock.patch("pyexasol.connect") as connect:
+        table = benchmark(cache.query, conf, QUERY)
+    connect.assert_not_called()
+    assert table.num_rows == ROWS
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from exasol.nb_connector.secret_store import Secrets
+
+PASSWORD = "abc"
+WRITES = 200
+
+
+@pytest.fixture
+def new_db_files(tmp_path):
+    files = (tmp_path / f"new-{i}.db" for i in range(1000))
+    return lambda: ((next(files),), {})
+
+
+def open_store(db_file: Path) -> Secrets:
+    secrets = Secrets(db_file, PASSWORD)
+    secrets.close_all()
+    return secrets
+
+
+def test_open_new_store(benchmark, new_db_files):
+    benchmark.pedantic(open_store, setup=new_db_files, rounds=10)
+
+
+def test_open_existing_store(benchmark, secrets):
+    secrets.save("key", "value").close_all()
+    benchmark.pedantic(open_store, args=(secrets.db_file,), iterations=1, rounds=10)
+
+
+@pytest.mark.parametrize("size", [10, 1000, 100_000])
+def test_items(benchmark, secrets, size):
+    secrets.save_many({f"key-{i:06d}": f"value {i}" for i in range(size)})
+
+    def read_all():
+        assert len(list(secrets.items())) == size
+
+    benchmark.pedantic(read_all, iterations=1, rounds=10)
+    benchmark.extra_info["keys"] = size
+
+
+def save_each(secrets: Secrets, entries: dict[str, str]) -> None:
+    for key, value in entries.items():
+        secrets.save(key, value)
+
+
+@pytest.mark.parametrize(
+    "save", [save_each, Secrets.save_many], ids=["unbatched", "batched"]
+)
+def test_write_throughput(benchmark, secrets, save):
+    entries = {f"key-{i}": f"value {i}" for i in range(WRITES)}
+    benchmark.pedantic(save, args=(secrets, entries), iterations=1, rounds=5)
+    benchmark.extra_info["operations"] = WRITES
+    # Without measurements, e.g. with --benchmark-disable, there are no stats.
+    if not benchmark.disabled:
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info["operations_per_second"] = WRITES / mean
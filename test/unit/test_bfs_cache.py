@@ -0,0 +1,150 @@
+import time
+from unittest import mock
+
+import exasol.bucketfs as bfs
+import pytest
+
+from exasol.nb_connector import bfs_cache
+from exasol.nb_connector.bfs_cache import BucketFSCache
+from exasol.nb_connector.bfs_utils import upload_file
+
+
+@pytest.fixture
+def bucket_dir(tmp_path):
+    path = tmp_path / "bucket"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def location(bucket_dir):
+    return bfs.path.build_path(
+        backend=bfs.path.StorageBackend.mounted, base_path=str(bucket_dir)
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BucketFSCache(tmp_path / "cache")
+
+
+def upload(location, name: str, data: bytes, tmp_path) -> bfs.path.PathLike:
+    local = tmp_path / "upload"
+    local.write_bytes(data)
+    bfs_path = location / name
+    upload_file(bfs_path, local, skip_if_identical=False)
+    return bfs_path
+
+
+def count_reads(bfs_path):
+    return mock.patch.object(bfs_path, "read", wraps=bfs_path.read)
+
+
+def test_get_cached(cache, location, tmp_path):
+    bfs_path = upload(location, "models/model.bin", b"model", tmp_path)
+    path = cache.get(bfs_path)
+    assert path.read_bytes() == b"model"
+    with count_reads(bfs_path) as read:
+        assert cache.get(bfs_path) == path
+    read.assert_not_called()
+
+
+def test_get_changed(cache, location, tmp_path):
+    bfs_path = upload(location, "model.bin", b"model", tmp_path)
+    cache.get(bfs_path)
+    upload(location, "model.bin", b"new model", tmp_path)
+    assert cache.get(bfs_path).read_bytes() == b"new model"
+
+
+def test_get_replaced_without_manifest(cache, location, bucket_dir, tmp_path):
+    bfs_path = upload(location, "model.bin", b"model", tmp_path)
+    cache.get(bfs_path)
+    (bucket_dir / "model.bin").write_bytes(b"new model")
+    assert cache.get(bfs_path).read_bytes() == b"new model"
+
+
+def test_get_refresh(cache, location, tmp_path):
+    bfs_path = upload(location, "model.bin", b"model", tmp_path)
+    cache.get(bfs_path)
+    with count_reads(bfs_path) as read:
+        cache.get(bfs_path, refresh=True)
+    read.assert_called_once()
+
+
+def test_get_without_manifest(cache, location, bucket_dir):
+    (bucket_dir / "data.csv").write_bytes(b"a,b")
+    bfs_path = location / "data.csv"
+    path = cache.get(bfs_path)
+    with count_reads(bfs_path) as read:
+        assert cache.get(bfs_path) == path
+    read.assert_not_called()
+    (bucket_dir / "data.csv").write_bytes(b"a,b,c")
+    assert cache.get(bfs_path).read_bytes() == b"a,b,c"
+
+
+def test_get_without_size(cache, location, bucket_dir, monkeypatch):
+    monkeypatch.setattr(bfs_cache, "_remote_status", lambda bfs_path: None)
+    (bucket_dir / "data.csv").write_bytes(b"a,b")
+    bfs_path = location / "data.csv"
+    path = cache.get(bfs_path)
+    (bucket_dir / "data.csv").write_bytes(b"a,b,c")
+    assert cache.get(bfs_path).read_bytes() == b"a,b"
+    cache.ttl = 0
+    assert cache.get(bfs_path) == path
+    assert path.read_bytes() == b"a,b,c"
+
+
+def test_remote_status_onprem():
+    bucket = bfs.Bucket("default", "http://localhost:2580", "w", "secret")
+    bfs_path = bfs.path.BucketPath("models/model.bin", bucket)
+    assert bfs_cache._remote_status(bfs_path) is None
+
+
+def test_buckets_not_mixed(cache, tmp_path):
+    paths = []
+    for name in ["bucket1", "bucket2"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file").write_bytes(name.encode())
+        location = bfs.path.build_path(
+            backend=bfs.path.StorageBackend.mounted, base_path=str(tmp_path / name)
+        )
+        paths.append(location / "file")
+    local = [cache.get(path).read_bytes() for path in paths]
+    assert local == [b"bucket1", b"bucket2"]
+
+
+def test_eviction(tmp_path, location):
+    cache = BucketFSCache(tmp_path / "cache", max_size=25)
+    paths = [upload(location, f"file{i}", bytes(10), tmp_path) for i in range(3)]
+    first = cache.get(paths[0])
+    second = cache.get(paths[1])
+    time.sleep(0.01)
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert first.exists()
+    assert not second.exists()
+
+
+def test_download_many(cache, location, tmp_path):
+    paths = [
+        upload(location, f"part-{i}.parquet", b"part %d" % i, tmp_path)
+        for i in range(10)
+    ]
+    local = cache.download_many(paths, workers=4)
+    assert [path.read_bytes() for path in local] == [b"part %d" % i for i in range(10)]
+
+
+def test_download_many_error(cache, location, tmp_path):
+    paths = [upload(location, "file", b"data", tmp_path), location / "missing"]
+    with pytest.raises(FileNotFoundError):
+        cache.download_many(paths)
+
+
+def test_invalidate_and_clear(cache, location, tmp_path):
+    bfs_path = upload(location, "model.bin", b"model", tmp_path)
+    path = cache.get(bfs_path)
+    assert cache.invalidate(bfs_path)
+    assert not path.exists()
+    assert not cache.invalidate(bfs_path)
+    cache.get(bfs_path)
+    assert cache.clear() == 1
@@ -1,8 +1,11 @@
+import hashlib
 import pathlib
 from collections.abc import Generator
 from unittest import mock
 
+import exasol.bucketfs as bfs
 import pytest
+import requests
 
 from exasol.nb_connector import bfs_utils
 
@@ -16,15 +19,6 @@ def test_put_file_basic(bfs_bucket: mock.MagicMock):
         bfs_utils.put_file(bfs_bucket, pathlib.Path("non/existent/local.file"))
 
 
-@pytest.fixture
-@mock.patch("exasol.bucketfs.Bucket")
-def bucket_with_file(bfs_bucket: mock.MagicMock):
-    bfs_bucket.name = MOCKED_BUCKET
-    bfs_bucket.__iter__.return_value = iter([MOCKED_FILE_NAME])
-    bfs_bucket.upload.return_value = None
-    return bfs_bucket
-
-
 @pytest.fixture
 def temp_file(tmp_path) -> Generator[pathlib.Path, None, None]:
     path = pathlib.Path(tmp_path) / MOCKED_FILE_NAME
@@ -33,15 +27,175 @@ def temp_file(tmp_path) -> Generator[pathlib.Path, None, None]:
     path.unlink()
 
 
-def test_put_file_exists(caplog, bucket_with_file, temp_file):
-    caplog.set_level("INFO")
-    path = bfs_utils.put_file(bucket_with_file, temp_file)
+@pytest.fixture
+def mounted_bucket(tmp_path) -> bfs.MountedBucket:
+    base_path = tmp_path / MOCKED_BUCKET
+    base_path.mkdir()
+    return bfs.MountedBucket(base_path=str(base_path))
+
+
+def bucket_content(bucket: bfs.MountedBucket) -> dict[str, bytes]:
+    return {name: b"".join(bucket.download(name, 8192)) for name in bucket.files}
+
+
+def test_put_file_writes_manifest(mounted_bucket, temp_file):
+    path = bfs_utils.put_file(mounted_bucket, temp_file)
     assert isinstance(path, bfs_utils.bfs.path.BucketPath)
+    assert bucket_content(mounted_bucket)[MOCKED_FILE_NAME] == b"data"
+    manifest = bfs_utils.read_manifest(path)
+    assert manifest == bfs_utils.file_manifest(temp_file)
+    assert manifest["sha256"] == hashlib.sha256(b"data").hexdigest()
+
+
+def test_put_file_identical(caplog, mounted_bucket, temp_file):
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    caplog.set_level("INFO")
+    with mock.patch.object(mounted_bucket, "upload") as upload:
+        bfs_utils.put_file(mounted_bucket, temp_file)
     assert "already present in the bucketfs" in caplog.text
-    assert not bucket_with_file.upload.called
+    upload.assert_not_called()
 
-    caplog.clear()
-    path = bfs_utils.put_file(bucket_with_file, temp_file, skip_if_exists=False)
-    assert isinstance(path, bfs_utils.bfs.path.BucketPath)
-    assert bucket_with_file.upload.called
+
+def test_put_file_changed(caplog, mounted_bucket, temp_file):
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    temp_file.write_text("new data")
+    caplog.set_level("INFO")
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    assert "Uploading file" in caplog.text
+    assert bucket_content(mounted_bucket)[MOCKED_FILE_NAME] == b"new data"
+
+
+def test_put_file_without_manifest(mounted_bucket, temp_file):
+    """A file uploaded without manifest is uploaded once more."""
+    mounted_bucket.upload(MOCKED_FILE_NAME, b"data")
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    manifest_name = MOCKED_FILE_NAME + bfs_utils.MANIFEST_SUFFIX
+    assert manifest_name in bucket_content(mounted_bucket)
+
+
+def test_put_file_invalid_manifest(mounted_bucket, temp_file):
+    mounted_bucket.upload(MOCKED_FILE_NAME + bfs_utils.MANIFEST_SUFFIX, b"{")
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    path = bfs.path.BucketPath(MOCKED_FILE_NAME, mounted_bucket)
+    assert bfs_utils.read_manifest(path) == bfs_utils.file_manifest(temp_file)
+
+
+def test_put_file_no_skip(caplog, mounted_bucket, temp_file):
+    bfs_utils.put_file(mounted_bucket, temp_file)
+    caplog.set_level("INFO")
+    with mock.patch.object(mounted_bucket, "upload") as upload:
+        bfs_utils.put_file(mounted_bucket, temp_file, skip_if_exists=False)
     assert "Uploading file" in caplog.text
+    assert upload.call_count == 2
+
+
+def test_file_manifest_cached(temp_file):
+    bfs_utils.file_manifest(temp_file)
+    with mock.patch("hashlib.sha256") as sha256:
+        bfs_utils.file_manifest(temp_file)
+    sha256.assert_not_called()
+
+
+def http_error(status_code: int) -> bfs.BucketFsError:
+    response = requests.Response()
+    response.status_code = status_code
+    error = bfs.BucketFsError("Couldn't download")
+    error.__cause__ = requests.HTTPError(response=response)
+    return error
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        http_error(404),
+        bfs.BucketFsError("The file doesn't exist in the SaaS BucketFs."),
+        FileNotFoundError(),
+    ],
+    ids=["onprem", "saas", "mounted"],
+)
+def test_put_file_missing(error, temp_file):
+    bucket = mock.MagicMock()
+    bucket.download.side_effect = error
+    bfs_utils.put_file(bucket, temp_file)
+    bucket.download.assert_called_once_with(
+        MOCKED_FILE_NAME + bfs_utils.MANIFEST_SUFFIX, 8192
+    )
+    assert bucket.upload.call_count == 2
+
+
+def connection_error() -> bfs.BucketFsError:
+    error = bfs.BucketFsError("Couldn't download")
+    error.__cause__ = requests.ConnectionError("connection refused")
+    return error
+
+
+@pytest.mark.parametrize(
+    "error", [http_error(401), connection_error()], ids=["http", "connection"]
+)
+def test_put_file_probe_error(error, temp_file):
+    bucket = mock.MagicMock()
+    bucket.download.side_effect = error
+    with pytest.raises(bfs.BucketFsError):
+        bfs_utils.put_file(bucket, temp_file)
+    assert not bucket.upload.called
+
+
+@pytest.fixture
+def local_dir(tmp_path) -> pathlib.Path:
+    root = tmp_path / "local"
+    (root / "sub" / "deeper").mkdir(parents=True)
+    (root / "a.txt").write_text("a")
+    (root / "sub" / "b.txt").write_text("bb")
+    (root / "sub" / "deeper" / "c.txt").write_text("ccc")
+    return root
+
+
+@pytest.fixture
+def mounted_location(tmp_path) -> bfs.path.PathLike:
+    base_path = tmp_path / MOCKED_BUCKET
+    base_path.mkdir()
+    return bfs.path.build_path(
+        backend=bfs.path.StorageBackend.mounted, base_path=str(base_path)
+    )
+
+
+def test_sync_dir(local_dir, mounted_location, tmp_path):
+    stats = bfs_utils.sync_dir(local_dir, mounted_location / "data", workers=2)
+    assert sorted(stats.uploaded) == ["a.txt", "sub/b.txt", "sub/deeper/c.txt"]
+    assert stats.skipped == []
+    assert stats.bytes == 6
+    target = tmp_path / MOCKED_BUCKET / "data" / "sub" / "deeper" / "c.txt"
+    assert target.read_text() == "ccc"
+
+
+def test_sync_dir_changed(local_dir, mounted_location):
+    bfs_utils.sync_dir(local_dir, mounted_location)
+    (local_dir / "sub" / "b.txt").write_text("changed")
+    (local_dir / "d.txt").write_text("new")
+    stats = bfs_utils.sync_dir(local_dir, mounted_location)
+    assert sorted(stats.uploaded) == ["d.txt", "sub/b.txt"]
+    assert sorted(stats.skipped) == ["a.txt", "sub/deeper/c.txt"]
+    assert stats.bytes == 10
+
+
+def test_sync_dir_progress(local_dir, mounted_location):
+    reported = []
+    stats = bfs_utils.sync_dir(local_dir, mounted_location, progress=reported.append)
+    assert [p.done for p in reported] == [1, 2, 3]
+    assert all(p.files == 3 for p in reported)
+    assert reported[-1].uploaded == stats.uploaded
+
+
+def test_sync_dir_error(local_dir):
+    location = mock.MagicMock()
+    location.__truediv__.return_value.write.side_effect = bfs.BucketFsError("failed")
+    location.__truediv__.return_value.parent.__truediv__.return_value.read.side_effect = (
+        FileNotFoundError()
+    )
+    with pytest.raises(bfs.BucketFsError, match="failed"):
+        bfs_utils.sync_dir(local_dir, location, workers=1)
+
+
+def test_sync_dir_missing(tmp_path, mounted_location):
+    with pytest.raises(ValueError, match="Local directory doesn't exist"):
+        bfs_utils.sync_dir(tmp_path / "missing", mounted_location)
@@ -0,0 +1,266 @@
+import gzip
+from unittest import mock
+
+import exasol.bucketfs as bfs
+import pyarrow as pa
+import pytest
+import requests
+
+from exasol.nb_connector import chunked_transfer
+from exasol.nb_connector.chunked_transfer import (
+    download_url,
+    upload_to_bucketfs,
+    url_version,
+)
+
+URL = "https://example.com/slc.tar.gz"
+
+DATA = bytes(range(256)) * 40
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: bytes, headers: dict, fail_after=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(response=self)
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+            yield self.body[i : i + chunk_size]
+
+
+class FakeServer:
+    """
+    Serves the data with the given ETag, supporting range requests if
+    enabled. The connection of the first responses breaks after the given
+    numbers of bytes.
+    """
+
+    def __init__(self, failures=(), ranges=True, data=DATA, etag='"v1"'):
+        self.failures = list(failures)
+        self.ranges = ranges
+        self.data = data
+        self.etag = etag
+        self.requests: list[dict] = []
+
+    def __call__(self, url, stream, timeout, headers):
+        self.requests.append(headers)
+        fail_after = self.failures.pop(0) if self.failures else None
+        data = self.data
+        etag = {"ETag": self.etag} if self.etag else {}
+        if (
+            self.ranges
+            and "Range" in headers
+            and headers.get("If-Range", self.etag) == self.etag
+        ):
+            first = int(headers["Range"][len("bytes=") : -1])
+            if first >= len(data):
+                return FakeResponse(416, b"", {"Content-Range": f"bytes */{len(data)}"})
+            content_range = f"bytes {first}-{len(data) - 1}/{len(data)}"
+            return FakeResponse(
+                206, data[first:], {"Content-Range": content_range, **etag}, fail_after
+            )
+        headers = {"Content-Length": str(len(data)), **etag}
+        return FakeResponse(200, data, headers, fail_after)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(chunked_transfer.time, "sleep", lambda _: None)
+
+
+@pytest.fixture
+def server(request, monkeypatch):
+    server = FakeServer(**getattr(request, "param", {}))
+    monkeypatch.setattr(requests, "get", server)
+    return server
+
+
+def test_download(server, tmp_path):
+    reported = []
+    target = tmp_path / "slc.tar.gz"
+    size = download_url(
+        URL, target, chunk_size=1000, progress=lambda *p: reported.append(p)
+    )
+    assert size == len(DATA)
+    assert target.read_bytes() == DATA
+    assert reported[0] == (1000, len(DATA))
+    assert reported[-1] == (len(DATA), len(DATA))
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@pytest.mark.parametrize("server", [{"failures": [3000, 4000]}], indirect=True)
+def test_download_resumes(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    download_url(URL, target, chunk_size=1000, retries=1)
+    assert target.read_bytes() == DATA
+    ranges = [headers.get("Range") for headers in server.requests]
+    assert ranges == [None, "bytes=3000-", "bytes=7000-"]
+    assert server.requests[1]["If-Range"] == '"v1"'
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@pytest.mark.parametrize("server", [{"failures": [3000], "etag": None}], indirect=True)
+def test_download_without_validator(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    download_url(URL, target, chunk_size=1000, retries=1)
+    assert target.read_bytes() == DATA
+    # Without ETag, a range request could append data of a changed file.
+    assert [headers.get("Range") for headers in server.requests] == [None, None]
+
+
+@pytest.mark.parametrize(
+    "server", [{"failures": [3000], "ranges": False}], indirect=True
+)
+def test_download_without_ranges(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    download_url(URL, target, chunk_size=1000)
+    assert target.read_bytes() == DATA
+    assert len(server.requests) == 2
+
+
+def write_staging_file(target, data, validator):
+    staging = chunked_transfer._staging_path(URL, target)
+    staging.write_bytes(data)
+    if validator:
+        staging.with_name(staging.name + ".validator").write_text(validator)
+
+
+def test_download_staging_file_complete(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    write_staging_file(target, DATA, '"v1"')
+    download_url(URL, target)
+    assert target.read_bytes() == DATA
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_download_staging_file_resumed(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    write_staging_file(target, DATA[:3000], '"v1"')
+    download_url(URL, target)
+    assert target.read_bytes() == DATA
+    assert server.requests[0]["Range"] == "bytes=3000-"
+
+
+@pytest.mark.parametrize(
+    "server", [{"data": b"x" * 3000 + DATA, "etag": '"v2"'}], indirect=True
+)
+def test_download_staging_file_changed(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    write_staging_file(target, DATA[:3000], '"v1"')
+    download_url(URL, target)
+    assert target.read_bytes() == server.data
+    assert server.requests[0]["If-Range"] == '"v1"'
+
+
+def test_download_staging_file_without_validator(server, tmp_path):
+    target = tmp_path / "slc.tar.gz"
+    write_staging_file(target, b"x" * 3000, None)
+    download_url(URL, target)
+    assert target.read_bytes() == DATA
+    assert "Range" not in server.requests[0]
+
+
+@pytest.mark.parametrize("server", [{"failures": [0, 0, 0]}], indirect=True)
+def test_download_gives_up(server, tmp_path):
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        download_url(URL, tmp_path / "slc.tar.gz", retries=2)
+    assert len(server.requests) == 3
+
+
+def test_download_not_found(monkeypatch, tmp_path):
+    get = mock.Mock(return_value=FakeResponse(404, b"", {}))
+    monkeypatch.setattr(requests, "get", get)
+    with pytest.raises(requests.HTTPError):
+        download_url(URL, tmp_path / "slc.tar.gz")
+    get.assert_called_once()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "status_code, headers, expected",
+    [
+        (200, {"ETag": '"abc"', "Last-Modified": "Mon"}, '"abc"'),
+        (200, {"Last-Modified": "Mon", "Content-Length": "42"}, "Mon; 42"),
+        (200, {}, None),
+        (405, {"ETag": '"abc"'}, None),
+    ],
+)
+def test_url_version(monkeypatch, status_code, headers, expected):
+    head = mock.Mock(return_value=FakeResponse(status_code, b"", headers))
+    monkeypatch.setattr(requests, "head", head)
+    assert url_version(URL) == expected
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "slc.tar"
+    path.write_bytes(DATA)
+    return path
+
+
+@pytest.fixture
+def location(tmp_path):
+    (tmp_path / "bucket").mkdir()
+    return bfs.path.build_path(
+        backend=bfs.path.StorageBackend.mounted, base_path=str(tmp_path / "bucket")
+    )
+
+
+def test_upload(location, local_file, tmp_path):
+    reported = []
+    size = upload_to_bucketfs(
+        location / "slc.tar",
+        local_file,
+        chunk_size=1000,
+        progress=lambda *p: reported.append(p),
+    )
+    assert size == len(DATA)
+    assert (tmp_path / "bucket" / "slc.tar").read_bytes() == DATA
+    assert reported[-1] == (len(DATA), len(DATA))
+
+
+@pytest.mark.parametrize(
+    "compression, decompress",
+    [
+        ("gzip", gzip.decompress),
+        ("zstd", lambda data: pa.decompress(data, len(DATA), codec="zstd")),
+    ],
+)
+def test_upload_compressed(compression, decompress, location, local_file, tmp_path):
+    size = upload_to_bucketfs(location / "slc.tar.x", local_file, compression)
+    uploaded = (tmp_path / "bucket" / "slc.tar.x").read_bytes()
+    assert size == len(uploaded)
+    assert decompress(uploaded) == DATA
+
+
+def test_upload_retries(local_file):
+    bfs_path = mock.Mock()
+    bfs_path.write.side_effect = [requests.ConnectionError("reset"), None]
+    upload_to_bucketfs(bfs_path, local_file)
+    assert bfs_path.write.call_count == 2
+
+
+def test_upload_client_error(local_file):
+    response = requests.Response()
+    response.status_code = 403
+    error = bfs.BucketFsError("Couldn't upload")
+    error.__cause__ = requests.HTTPError(response=response)
+    bfs_path = mock.Mock()
+    bfs_path.write.side_effect = error
+    with pytest.raises(bfs.BucketFsError):
+        upload_to_bucketfs(bfs_path, local_file)
+    bfs_path.write.assert_called_once()
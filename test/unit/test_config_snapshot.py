@@ -0,0 +1,84 @@
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.ai_lab_config import StorageBackend
+from exasol.nb_connector.config_snapshot import (
+    ConfigSnapshot,
+    optional_bool,
+)
+
+
+@pytest.fixture
+def snapshot() -> ConfigSnapshot:
+    return ConfigSnapshot(
+        {
+            CKey.db_host_name.name: "localhost",
+            CKey.db_port.name: "8563",
+            CKey.db_encryption.name: "Yes",
+            CKey.cert_vld.name: "false",
+            CKey.storage_backend.name: "saas",
+            "custom_key": "custom value",
+        }
+    )
+
+
+def test_parsed_values(snapshot):
+    assert snapshot.db_host_name == "localhost"
+    assert snapshot.db_port == 8563
+    assert snapshot.db_encryption is True
+    assert snapshot.cert_vld is False
+    assert snapshot.storage_backend == StorageBackend.saas
+
+
+def test_missing_values():
+    snapshot = ConfigSnapshot([])
+    assert snapshot.bfs_port is None
+    assert snapshot.bfs_encryption is None
+    assert snapshot.db_user is None
+    assert snapshot.storage_backend == StorageBackend.onprem
+
+
+def test_string_values(snapshot):
+    assert snapshot.get(CKey.db_port) == "8563"
+    assert snapshot.get("custom_key") == "custom value"
+    assert snapshot.get(CKey.db_user, "default") == "default"
+    assert snapshot[CKey.db_encryption] == "Yes"
+    with pytest.raises(AttributeError, match="Unknown key"):
+        snapshot[CKey.db_user]
+
+
+def test_items_with_prefix(snapshot):
+    assert dict(snapshot.items("db_")) == {
+        "db_host_name": "localhost",
+        "db_port": "8563",
+        "db_encryption": "Yes",
+    }
+    assert list(snapshot.keys("custom")) == ["custom_key"]
+    assert list(snapshot.values("custom")) == ["custom value"]
+
+
+def test_immutable(snapshot):
+    with pytest.raises(AttributeError, match="immutable"):
+        snapshot.db_port = 1234
+    with pytest.raises(AttributeError, match="immutable"):
+        del snapshot.db_port
+    with pytest.raises(AttributeError):
+        snapshot.__dict__
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        (CKey.cert_vld, "maybe"),
+        (CKey.bfs_port, "port"),
+        (CKey.storage_backend, "cloud"),
+    ],
+)
+def test_invalid_value(key, value):
+    with pytest.raises((ValueError, KeyError)):
+        ConfigSnapshot({key.name: value})
+
+
+def test_optional_bool(snapshot):
+    assert optional_bool(snapshot, CKey.db_encryption) is True
+    assert optional_bool(snapshot, CKey.bfs_encryption) is None
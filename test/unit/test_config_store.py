@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import (
+    EnvironmentStore,
+    JsonFileStore,
+    MemoryStore,
+)
+
+PREFIX = "NB_CONNECTOR_TEST_"
+
+
+@pytest.fixture
+def env_store(monkeypatch):
+    for name in list(os.environ):
+        if name.startswith(PREFIX):
+            monkeypatch.delenv(name)
+    yield EnvironmentStore(prefix=PREFIX)
+    for name in list(os.environ):
+        if name.startswith(PREFIX):
+            del os.environ[name]
+
+
+@pytest.fixture(params=["memory", "environment", "json"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    if request.param == "environment":
+        return request.getfixturevalue("env_store")
+    return JsonFileStore(tmp_path / "config.json")
+
+
+def test_save_get(store):
+    store.save(CKey.db_host_name, "localhost").save("db_port", "8563")
+    assert store.get("db_host_name") == "localhost"
+    assert store.get(CKey.db_port) == "8563"
+    assert store[CKey.db_port] == "8563"
+
+
+def test_default_value(store):
+    assert store.get(CKey.db_user) is None
+    assert store.get(CKey.db_user, "sys") == "sys"
+    with pytest.raises(AttributeError, match="Unknown key"):
+        store[CKey.db_user]
+
+
+def test_items_with_prefix(store):
+    store.save_many({CKey.db_host_name: "localhost", CKey.bfs_port: "2580"})
+    assert dict(store.items("db_")) == {"db_host_name": "localhost"}
+    assert set(store.keys()) == {"db_host_name", "bfs_port"}
+    assert list(store.values("bfs")) == ["2580"]
+
+
+def test_remove(store):
+    store.save_many({CKey.db_user: "sys", CKey.db_password: "exasol"})
+    store.remove(CKey.db_user)
+    store.remove("non_existing_key")
+    assert store.get(CKey.db_user) is None
+    store.remove_many([CKey.db_password])
+    assert list(store.items()) == []
+
+
+def test_memory_store_initial_entries():
+    store = MemoryStore({CKey.db_user: "sys", "other": "value"})
+    assert dict(store.items()) == {"db_user": "sys", "other": "value"}
+
+
+def test_environment_variable_names(env_store):
+    env_store.save(CKey.db_user, "sys")
+    assert os.environ[f"{PREFIX}DB_USER"] == "sys"
+    os.environ[f"{PREFIX}DB_SCHEMA"] = "MY_SCHEMA"
+    assert env_store.get(CKey.db_schema) == "MY_SCHEMA"
+
+
+def test_json_file_persisted(tmp_path):
+    path = tmp_path / "config.json"
+    JsonFileStore(path).save(CKey.db_user, "sys")
+    assert json.loads(path.read_text()) == {"db_user": "sys"}
+    assert JsonFileStore(path).get(CKey.db_user) == "sys"
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
@@ -1,21 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import shutil
 import ssl
 import tempfile
+import time
 import types
 import unittest.mock
 from contextlib import ExitStack
+from pathlib import Path
 from typing import (
     Any,
 )
 from unittest.mock import create_autospec
 
+import certifi
 import exasol.bucketfs as bfs
+import pyexasol
 import pytest
 from sqlalchemy.engine import make_url
 
+from exasol.nb_connector import warm_connections
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_snapshot import ConfigSnapshot
+from exasol.nb_connector.config_store import MemoryStore
+from exasol.nb_connector.connection_pool import (
+    PyexasolConnectionPool,
+    pooled_pyexasol_connection,
+    pyexasol_connection_pool,
+)
+from exasol.nb_connector.connection_tls import tls_options
+from exasol.nb_connector.connection_warmup import (
+    open_bucketfs_location_async,
+    open_pyexasol_connection_async,
+    warm_up,
+)
 from exasol.nb_connector.connections import (
+    dispose_sqlalchemy_engines,
     get_external_host,
     open_bucketfs_bucket,
     open_bucketfs_connection,
@@ -25,6 +47,8 @@ from exasol.nb_connector.connections import (
     open_sqlalchemy_connection,
 )
 from exasol.nb_connector.secret_store import Secrets
+from exasol.nb_connector.ui.common import jupysql
+from exasol.nb_connector.warm_connections import close_warm_connections
 
 
 @pytest.fixture
@@ -43,6 +67,10 @@ def mock_conf() -> Secrets:
     return mock_conf
 
 
+def snapshot_of(mock_conf) -> ConfigSnapshot:
+    return ConfigSnapshot({key.name: val for key, val in mock_conf._params.items()})
+
+
 @pytest.fixture
 def conf(mock_conf) -> Secrets:
 
@@ -76,7 +104,7 @@ def saas_connection_params() -> dict[str, Any]:
     return {
         "dsn": "xyz.fake_saas.exasol.com:1234",
         "user": "fake_saas_user",
-        "password": "fake_saas_password",
+        "password": "xmfi58302lfj0ojf64ndk3ls",
     }
 
 
@@ -136,6 +164,70 @@ def test_open_pyexasol_connection_ssl(mock_connect, conf):
         )
 
 
+@pytest.fixture
+def ca_bundle(tmp_path) -> Path:
+    path = tmp_path / "ca_bundle.pem"
+    shutil.copy(certifi.where(), path)
+    return path
+
+
+def websocket_sslopt(mock_connect) -> dict[str, Any]:
+    return mock_connect.call_args.kwargs["websocket_sslopt"]
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_open_pyexasol_connection_ssl_context(mock_connect, conf, ca_bundle):
+    conf.save(CKey.cert_vld, "Yes")
+    conf.save(CKey.trusted_ca, str(ca_bundle))
+    open_pyexasol_connection(conf)
+    sslopt = websocket_sslopt(mock_connect)
+    assert isinstance(sslopt["context"], ssl.SSLContext)
+    assert sslopt["context"].verify_mode == ssl.CERT_REQUIRED
+    assert sslopt["ca_certs"] == str(ca_bundle)
+    open_pyexasol_connection(conf)
+    assert websocket_sslopt(mock_connect)["context"] is sslopt["context"]
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_open_pyexasol_connection_ssl_context_modified(mock_connect, conf, ca_bundle):
+    conf.save(CKey.cert_vld, "Yes")
+    conf.save(CKey.trusted_ca, str(ca_bundle))
+    open_pyexasol_connection(conf)
+    context = websocket_sslopt(mock_connect)["context"]
+    mtime = ca_bundle.stat().st_mtime_ns + 1_000_000_000
+    os.utime(ca_bundle, ns=(mtime, mtime))
+    open_pyexasol_connection(conf)
+    assert websocket_sslopt(mock_connect)["context"] is not context
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_open_pyexasol_connection_ssl_context_ca_bundle_env(
+    mock_connect, conf, tmp_path, monkeypatch
+):
+    monkeypatch.delenv("WEBSOCKET_CLIENT_CA_BUNDLE", raising=False)
+    conf.save(CKey.cert_vld, "Yes")
+    open_pyexasol_connection(conf)
+    context = websocket_sslopt(mock_connect)["context"]
+    bundle = tmp_path / "websocket_ca.pem"
+    first_cert = certifi.contents().split("-----END CERTIFICATE-----")[0]
+    bundle.write_text(first_cert + "-----END CERTIFICATE-----\n")
+    monkeypatch.setenv("WEBSOCKET_CLIENT_CA_BUNDLE", str(bundle))
+    open_pyexasol_connection(conf)
+    env_context = websocket_sslopt(mock_connect)["context"]
+    assert env_context is not context
+    assert len(env_context.get_ca_certs()) == 1
+
+
+@unittest.mock.patch("exasol.bucketfs.path.build_path")
+def test_open_bucketfs_location_trusted_ca(mock_build_path, conf, ca_bundle):
+    conf.save(CKey.bfs_encryption, "True")
+    conf.save(CKey.cert_vld, "Yes")
+    conf.save(CKey.trusted_ca, str(ca_bundle))
+    assert tls_options(conf) is tls_options(conf)
+    open_bucketfs_location(conf)
+    assert mock_build_path.call_args.kwargs["verify"] == str(ca_bundle)
+
+
 @unittest.mock.patch("pyexasol.connect")
 def test_open_pyexasol_connection_error(mock_connect, conf):
     conf.save(CKey.db_encryption, "True")
@@ -163,6 +255,61 @@ def test_open_pyexasol_connection_saas(
     )
 
 
+@unittest.mock.patch("pyexasol.connect")
+@unittest.mock.patch("exasol.saas.client.api_access.get_connection_params")
+def test_open_pyexasol_connection_saas_cached(
+    mock_connection_params,
+    mock_connect,
+    conf_saas,
+    saas_connection_params,
+):
+    mock_connection_params.return_value = saas_connection_params
+    open_pyexasol_connection(conf_saas)
+    open_pyexasol_connection(conf_saas)
+    mock_connection_params.assert_called_once()
+    assert mock_connect.call_count == 2
+
+
+@unittest.mock.patch("pyexasol.connect")
+@unittest.mock.patch("exasol.saas.client.api_access.get_connection_params")
+def test_open_pyexasol_connection_saas_auth_error(
+    mock_connection_params,
+    mock_connect,
+    conf_saas,
+    saas_connection_params,
+):
+    mock_connection_params.return_value = saas_connection_params
+    open_pyexasol_connection(conf_saas)
+    mock_connect.side_effect = [
+        pyexasol.ExaAuthError(unittest.mock.MagicMock(), "08004", "denied"),
+        unittest.mock.DEFAULT,
+    ]
+    mock_connection_params.return_value = {
+        **saas_connection_params,
+        "dsn": "new.fake_saas.exasol.com:1234",
+    }
+    open_pyexasol_connection(conf_saas)
+    assert mock_connection_params.call_count == 2
+    assert mock_connect.call_count == 3
+
+
+@unittest.mock.patch("pyexasol.connect")
+@unittest.mock.patch("exasol.saas.client.api_access.get_connection_params")
+def test_open_pyexasol_connection_saas_auth_error_unchanged(
+    mock_connection_params,
+    mock_connect,
+    conf_saas,
+    saas_connection_params,
+):
+    mock_connection_params.return_value = saas_connection_params
+    mock_connect.side_effect = pyexasol.ExaAuthError(
+        unittest.mock.MagicMock(), "08004", "denied"
+    )
+    with pytest.raises(pyexasol.ExaAuthError):
+        open_pyexasol_connection(conf_saas)
+    mock_connect.assert_called_once()
+
+
 @unittest.mock.patch("sqlalchemy.create_engine")
 def test_open_sqlalchemy_connection(mock_create_engine, conf):
     setattr(conf, CKey.db_port.name, conf.get(CKey.db_port))
@@ -174,6 +321,79 @@ def test_open_sqlalchemy_connection(mock_create_engine, conf):
     )
 
 
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_open_sqlalchemy_connection_cached(mock_create_engine, conf):
+    engine = open_sqlalchemy_connection(conf)
+    assert open_sqlalchemy_connection(conf) is engine
+    mock_create_engine.assert_called_once()
+
+
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_open_sqlalchemy_connection_pool_options(mock_create_engine, conf):
+    mock_create_engine.side_effect = lambda *args, **kwargs: unittest.mock.Mock()
+    engine = open_sqlalchemy_connection(conf, pool_size=3, pool_pre_ping=True)
+    assert mock_create_engine.call_args.kwargs == {
+        "pool_size": 3,
+        "pool_pre_ping": True,
+    }
+    assert open_sqlalchemy_connection(conf, pool_size=5) is not engine
+    conf.save(CKey.db_user, "other")
+    assert (
+        open_sqlalchemy_connection(conf, pool_size=3, pool_pre_ping=True) is not engine
+    )
+
+
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_open_sqlalchemy_connection_not_cached(mock_create_engine, conf):
+    mock_create_engine.side_effect = lambda *args, **kwargs: unittest.mock.Mock()
+    engine = open_sqlalchemy_connection(conf)
+    assert open_sqlalchemy_connection(conf, cached=False) is not engine
+    assert open_sqlalchemy_connection(conf) is engine
+
+
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_dispose_sqlalchemy_engines(mock_create_engine, conf):
+    mock_create_engine.side_effect = lambda *args, **kwargs: unittest.mock.Mock()
+    engine = open_sqlalchemy_connection(conf)
+    dispose_sqlalchemy_engines()
+    engine.dispose.assert_called_once()
+    assert open_sqlalchemy_connection(conf) is not engine
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_open_pyexasol_connection_snapshot(mock_connect, conf):
+    conf.save(CKey.db_encryption, "True")
+    conf.save(CKey.cert_vld, "No")
+    open_pyexasol_connection(snapshot_of(conf))
+    mock_connect.assert_called_once_with(
+        dsn=get_external_host(conf),
+        user=conf.get(CKey.db_user),
+        password=conf.get(CKey.db_password),
+        encryption=True,
+        websocket_sslopt={"cert_reqs": ssl.CERT_NONE},
+    )
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_open_pyexasol_connection_memory_store(mock_connect, conf):
+    open_pyexasol_connection(MemoryStore(conf._params))
+    mock_connect.assert_called_once_with(
+        dsn=get_external_host(conf),
+        user=conf.get(CKey.db_user),
+        password=conf.get(CKey.db_password),
+    )
+
+
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_open_sqlalchemy_connection_snapshot(mock_create_engine, conf):
+    open_sqlalchemy_connection(snapshot_of(conf))
+    mock_create_engine.assert_called_once_with(
+        make_url(
+            f"exa+websocket://{conf.get(CKey.db_user)}:{conf.get(CKey.db_password)}@{get_external_host(conf)}"
+        )
+    )
+
+
 @unittest.mock.patch("sqlalchemy.create_engine")
 def test_open_sqlalchemy_connection_ssl(mock_create_engine, conf):
     conf.save(CKey.db_encryption, "True")
@@ -332,3 +552,209 @@ def test_open_bucketfs_connection_deprecated(mock_bfs_service, conf):
     ):
         result = open_bucketfs_connection(conf)
         assert result
+
+
+@pytest.fixture
+def mock_pyexasol_connect(monkeypatch):
+    def connect(**kwargs):
+        return unittest.mock.MagicMock(is_closed=False)
+
+    mock = unittest.mock.Mock(side_effect=connect)
+    monkeypatch.setattr("pyexasol.connect", mock)
+    return mock
+
+
+def test_pool_reuses_connection(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool()
+    conn = pool.checkout(conf, compression=True)
+    pool.checkin(conn)
+    assert pool.checkout(conf, compression=True) is conn
+    assert mock_pyexasol_connect.call_count == 1
+    conn.execute.assert_called_once_with("SELECT 1")
+
+
+def test_pool_different_parameters(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool()
+    conn = pool.checkout(conf, compression=True)
+    pool.checkin(conn)
+    assert pool.checkout(conf) is not conn
+    assert pool.checkout(conf, compression=True) is conn
+
+
+def test_pool_concurrent_checkout(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool()
+    assert pool.checkout(conf) is not pool.checkout(conf)
+    assert mock_pyexasol_connect.call_count == 2
+
+
+def test_pool_idle_timeout(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool(idle_timeout=-1)
+    conn = pool.checkout(conf)
+    pool.checkin(conn)
+    assert pool.checkout(conf) is not conn
+    conn.close.assert_called_once()
+
+
+def test_pool_max_size(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool(max_size=1)
+    first, second = pool.checkout(conf), pool.checkout(conf)
+    pool.checkin(first)
+    pool.checkin(second)
+    assert pool.idle_connections == 1
+    first.close.assert_called_once()
+    assert pool.checkout(conf) is second
+
+
+def test_pool_health_check(mock_pyexasol_connect, conf):
+    pool = PyexasolConnectionPool()
+    conn = pool.checkout(conf)
+    conn.execute.side_effect = RuntimeError("connection lost")
+    pool.checkin(conn)
+    assert pool.checkout(conf) is not conn
+    conn.close.assert_called_once()
+
+
+def test_pool_checkin_unknown_connection(mock_pyexasol_connect, conf):
+    with pytest.raises(ValueError, match="not been checked out"):
+        PyexasolConnectionPool().checkin(unittest.mock.MagicMock())
+
+
+@unittest.mock.patch("pyexasol.connect")
+def test_pooled_connection_without_pool(mock_connect, conf):
+    with pooled_pyexasol_connection(conf):
+        pass
+    mock_connect.return_value.__exit__.assert_called_once()
+
+
+def test_pooled_connection_with_pool(mock_pyexasol_connect, conf):
+    with pyexasol_connection_pool() as pool:
+        with pooled_pyexasol_connection(conf, compression=True) as first:
+            pass
+        with pyexasol_connection_pool() as nested:
+            assert nested is pool
+            with pooled_pyexasol_connection(conf, compression=True) as second:
+                pass
+    assert first is second
+    assert mock_pyexasol_connect.call_count == 1
+    first.close.assert_called_once()
+    with pooled_pyexasol_connection(conf) as third:
+        pass
+    assert third is not first
+
+
+def warm_connection(mock_pyexasol_connect, conf, **kwargs):
+    """Runs warm_up() for pyexasol only and returns the opened connection."""
+    connect = mock_pyexasol_connect.side_effect
+    mock_pyexasol_connect.side_effect = None
+    mock_pyexasol_connect.return_value = unittest.mock.MagicMock(is_closed=False)
+    warm_up(conf, sqlalchemy_engine=False, bucketfs_location=False, **kwargs).join()
+    mock_pyexasol_connect.side_effect = connect
+    return mock_pyexasol_connect.return_value
+
+
+@unittest.mock.patch("exasol.bucketfs.path.build_path")
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_warm_up(mock_create_engine, mock_build_path, mock_pyexasol_connect, conf):
+    warm_up(conf).join()
+    mock_pyexasol_connect.assert_called_once()
+    mock_create_engine.return_value.connect.assert_called_once()
+    mock_build_path.assert_called_once()
+
+
+@unittest.mock.patch("exasol.bucketfs.path.build_path")
+@unittest.mock.patch("sqlalchemy.create_engine")
+def test_warm_up_jupysql_engine(
+    mock_create_engine, mock_build_path, mock_pyexasol_connect, conf, monkeypatch
+):
+    mock_ipy = unittest.mock.MagicMock()
+    monkeypatch.setattr(jupysql, "get_ipython", lambda: mock_ipy)
+    monkeypatch.setattr(jupysql, "get_activation_sql", lambda *_: "MOCK_SQL")
+    conf.db_schema = "MY_SCHEMA"
+    warm_up(conf).join()
+    jupysql.init(conf)
+    mock_create_engine.assert_called_once()
+    mock_ipy.push.assert_called_once_with(
+        {"engine": mock_create_engine.return_value}, interactive=True
+    )
+
+
+def test_warm_up_hand_off(mock_pyexasol_connect, conf):
+    warm = warm_connection(mock_pyexasol_connect, conf, compression=True)
+    assert open_pyexasol_connection(conf) is not warm
+    assert open_pyexasol_connection(conf, compression=True) is warm
+    assert open_pyexasol_connection(conf, compression=True) is not warm
+    assert mock_pyexasol_connect.call_count == 3
+
+
+def test_warm_up_pool(mock_pyexasol_connect, conf):
+    warm = warm_connection(mock_pyexasol_connect, conf)
+    with pyexasol_connection_pool():
+        with pooled_pyexasol_connection(conf) as conn:
+            assert conn is warm
+    assert mock_pyexasol_connect.call_count == 1
+    warm.close.assert_called_once()
+
+
+def test_warm_up_closed(mock_pyexasol_connect, conf):
+    warm = warm_connection(mock_pyexasol_connect, conf)
+    warm.is_closed = True
+    assert open_pyexasol_connection(conf) is not warm
+    assert mock_pyexasol_connect.call_count == 2
+
+
+def test_warm_up_failure(mock_pyexasol_connect, conf):
+    mock_pyexasol_connect.side_effect = pyexasol.ExaConnectionFailedError(
+        None, "no route to host"
+    )
+    warm_up(conf, sqlalchemy_engine=False, bucketfs_location=False).join()
+    with pytest.raises(pyexasol.ExaConnectionFailedError):
+        open_pyexasol_connection(conf)
+    assert mock_pyexasol_connect.call_count == 2
+
+
+def test_warm_up_not_configured(mock_pyexasol_connect):
+    assert warm_up(MemoryStore()) is None
+    mock_pyexasol_connect.assert_not_called()
+
+
+def test_close_warm_connections(mock_pyexasol_connect, conf):
+    warm = warm_connection(mock_pyexasol_connect, conf)
+    close_warm_connections()
+    warm.close.assert_called_once()
+    assert open_pyexasol_connection(conf) is not warm
+
+
+def test_warm_up_expires(mock_pyexasol_connect, conf, monkeypatch):
+    monkeypatch.setattr(warm_connections, "WARM_CONNECTION_TIMEOUT", 0.01)
+    warm = warm_connection(mock_pyexasol_connect, conf)
+    deadline = time.monotonic() + 5
+    while not warm.close.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    warm.close.assert_called_once()
+    assert open_pyexasol_connection(conf) is not warm
+
+
+def test_warm_up_taken_not_expired(mock_pyexasol_connect, conf, monkeypatch):
+    monkeypatch.setattr(warm_connections, "WARM_CONNECTION_TIMEOUT", 0.05)
+    warm = warm_connection(mock_pyexasol_connect, conf)
+    assert open_pyexasol_connection(conf) is warm
+    time.sleep(0.1)
+    warm.close.assert_not_called()
+
+
+def test_open_pyexasol_connection_async(mock_pyexasol_connect, conf):
+    async def open_two():
+        return await asyncio.gather(
+            open_pyexasol_connection_async(conf),
+            open_pyexasol_connection_async(conf, compression=True),
+        )
+
+    first, second = asyncio.run(open_two())
+    assert first is not second
+    assert mock_pyexasol_connect.call_args_list[1].kwargs["compression"] is True
+
+
+@unittest.mock.patch("exasol.bucketfs.path.build_path")
+def test_open_bucketfs_location_async(mock_build_path, conf):
+    location = asyncio.run(open_bucketfs_location_async(conf))
+    assert location is mock_build_path.return_value
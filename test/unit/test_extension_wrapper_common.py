@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import re
 import tempfile
+import types
 import unittest.mock
+from pathlib import Path
 from typing import Any
 
+import exasol.bucketfs as bfs
 import pytest
 
+from exasol.nb_connector import chunked_transfer
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.connection_pool import (
+    pooled_pyexasol_connection,
+    pyexasol_connection_pool,
+)
 from exasol.nb_connector.extension_wrapper_common import (
+    deploy_language_container,
+    deploy_language_container_async,
     encapsulate_bucketfs_credentials,
 )
 from exasol.nb_connector.secret_store import Secrets
@@ -198,3 +209,241 @@ def test_bucketfs_credentials_saas(
         query_params["BUCKETFS_PASSWORD"],
         (["pat"], [filled_saas_secrets.get(CKey.saas_token)]),
     )
+
+
+@pytest.fixture
+def container_file(tmp_path) -> Path:
+    path = tmp_path / "slc.tar.gz"
+    path.write_bytes(b"container")
+    return path
+
+
+@pytest.fixture
+def mock_deployment(monkeypatch, tmp_path):
+    """
+    Replaces the BucketFS by a local directory and mocks the deployer and
+    the database connections. Returns the mocked deployer.
+    """
+    bucket_dir = tmp_path / "bucket"
+    bucket_dir.mkdir()
+    location = bfs.path.build_path(
+        backend=bfs.path.StorageBackend.mounted, base_path=str(bucket_dir)
+    )
+    monkeypatch.setattr(
+        "exasol.nb_connector.extension_wrapper_common.open_bucketfs_location",
+        lambda conf: location,
+    )
+    monkeypatch.setattr(
+        "pyexasol.connect",
+        lambda **kwargs: unittest.mock.MagicMock(is_closed=False),
+    )
+    mock_deployer = unittest.mock.MagicMock()
+    mock_deployer.return_value.get_language_definition.return_value = "PYTHON3=..."
+
+    def run(container_file, container_name, **kwargs):
+        if container_file:
+            uploaded = bucket_dir / "slc" / container_name
+            uploaded.parent.mkdir(exist_ok=True)
+            uploaded.write_bytes(container_file.read_bytes())
+
+    mock_deployer.return_value.run.side_effect = run
+    monkeypatch.setattr(
+        "exasol.nb_connector.extension_wrapper_common.LanguageContainerDeployer",
+        mock_deployer,
+    )
+    return mock_deployer.return_value
+
+
+def deploy(conf, **kwargs) -> None:
+    deploy_language_container(
+        conf,
+        path_in_bucket="slc",
+        language_alias="PYTHON3_TEST",
+        activation_key="activation",
+        **kwargs,
+    )
+
+
+def test_deploy_language_container_skips_identical(
+    mock_deployment, filled_secrets, container_file
+):
+    deploy(filled_secrets, container_file=container_file)
+    deploy(filled_secrets, container_file=container_file)
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded == [container_file, None]
+    assert filled_secrets.get("activation") == "PYTHON3=..."
+
+
+def test_deploy_language_container_removed(
+    mock_deployment, filled_secrets, container_file, tmp_path
+):
+    deploy(filled_secrets, container_file=container_file)
+    (tmp_path / "bucket" / "slc" / "slc.tar.gz").unlink()
+    deploy(filled_secrets, container_file=container_file)
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded == [container_file, container_file]
+
+
+def test_deploy_language_container_changed(
+    mock_deployment, filled_secrets, container_file
+):
+    deploy(filled_secrets, container_file=container_file)
+    container_file.write_bytes(b"new container")
+    deploy(filled_secrets, container_file=container_file)
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded == [container_file, container_file]
+
+
+class FakeHeadResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def container_server(monkeypatch, tmp_path):
+    """
+    Serves the container, reporting its ETag in the response to a HEAD
+    request. Returns the headers of this response and the mocked function
+    requests.get().
+    """
+    monkeypatch.setattr(
+        "exasol.nb_connector.extension_wrapper_common.CONTAINER_DOWNLOAD_DIR",
+        tmp_path / "downloads",
+    )
+    headers = {"ETag": '"v1"'}
+    monkeypatch.setattr(
+        "requests.head", unittest.mock.Mock(return_value=FakeHeadResponse(headers))
+    )
+    mock_get = unittest.mock.MagicMock()
+    response = mock_get.return_value.__enter__.return_value
+    response.status_code = 200
+    response.headers = {}
+    response.iter_content.side_effect = lambda chunk_size: [b"contai", b"ner"]
+    monkeypatch.setattr("requests.get", mock_get)
+    return types.SimpleNamespace(headers=headers, get=mock_get)
+
+
+CONTAINER_URL = "https://example.com/v1/slc.tar.gz"
+
+
+def test_deploy_language_container_url(
+    container_server, mock_deployment, filled_secrets
+):
+    def run(container_file, container_name, **kwargs):
+        assert container_file.read_bytes() == b"container"
+        assert container_name == "slc.tar.gz"
+
+    mock_deployment.run.side_effect = run
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    mock_deployment.run.assert_called_once()
+
+
+def test_deploy_language_container_url_resumed(
+    container_server, mock_deployment, filled_secrets, tmp_path
+):
+    download_dir = tmp_path / "downloads"
+    download_dir.mkdir()
+    staging = chunked_transfer._staging_path(CONTAINER_URL, download_dir / "slc.tar.gz")
+    staging.write_bytes(b"contai")
+    staging.with_name(staging.name + ".validator").write_text('"v1"')
+    response = container_server.get.return_value.__enter__.return_value
+    response.status_code = 206
+    response.headers = {"Content-Range": "bytes 6-8/9", "ETag": '"v1"'}
+    response.iter_content.side_effect = lambda chunk_size: [b"ner"]
+
+    def run(container_file, container_name, **kwargs):
+        assert container_file.read_bytes() == b"container"
+
+    mock_deployment.run.side_effect = run
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    mock_deployment.run.assert_called_once()
+    headers = container_server.get.call_args.kwargs["headers"]
+    assert headers["Range"] == "bytes=6-"
+    assert list(download_dir.iterdir()) == []
+
+
+def test_deploy_language_container_url_unchanged(
+    container_server, mock_deployment, filled_secrets
+):
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    container_server.get.assert_called_once()
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded[1] is None
+    assert filled_secrets.get("activation") == "PYTHON3=..."
+
+
+def test_deploy_language_container_url_removed(
+    container_server, mock_deployment, filled_secrets, tmp_path
+):
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    (tmp_path / "bucket" / "slc" / "slc.tar.gz").unlink()
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    assert container_server.get.call_count == 2
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded[1] is not None
+
+
+def test_deploy_language_container_url_changed(
+    container_server, mock_deployment, filled_secrets
+):
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    container_server.headers["ETag"] = '"v2"'
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    assert container_server.get.call_count == 2
+    # The content is identical, so the container isn't uploaded again.
+    uploaded = [c.args[0] for c in mock_deployment.run.call_args_list]
+    assert uploaded[1] is None
+
+
+def test_deploy_language_container_url_without_version(
+    container_server, mock_deployment, filled_secrets
+):
+    container_server.headers.clear()
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    deploy(filled_secrets, container_url=CONTAINER_URL)
+    assert container_server.get.call_count == 2
+
+
+def test_deploy_language_container_not_pooled(
+    mock_deployment, filled_secrets, container_file, monkeypatch
+):
+    connections = []
+
+    def connect(**kwargs):
+        connections.append(unittest.mock.MagicMock(is_closed=False))
+        return connections[-1]
+
+    monkeypatch.setattr("pyexasol.connect", connect)
+    with pyexasol_connection_pool():
+        deploy(filled_secrets, container_file=container_file)
+        # The session of the deployment has activated the container.
+        with pooled_pyexasol_connection(filled_secrets, compression=True) as conn:
+            assert conn is not connections[0]
+    assert len(connections) == 2
+
+
+def test_deploy_language_container_async(
+    mock_deployment, filled_secrets, container_file
+):
+    async def deploy_twice():
+        await asyncio.gather(
+            *(
+                deploy_language_container_async(
+                    filled_secrets,
+                    path_in_bucket="slc",
+                    language_alias=f"PYTHON3_{i}",
+                    activation_key=f"activation_{i}",
+                    container_file=container_file,
+                    container_name=f"slc_{i}.tar.gz",
+                )
+                for i in range(2)
+            )
+        )
+
+    asyncio.run(deploy_twice())
+    assert mock_deployment.run.call_count == 2
+    assert filled_secrets.get("activation_1") == "PYTHON3=..."
@@ -37,7 +37,9 @@ def mocked_requests_get(*args, **_):
             res.status_code = 500
     elif url == CSE_MOCK_URL:
         res.status_code = 200
-        res.content = b"binary data"
+        res.headers = {}
+        res.iter_content.return_value = [b"binary ", b"data"]
+        res.__enter__.return_value = res
     return res
 
 
@@ -0,0 +1,263 @@
+import gc
+import io
+import threading
+from unittest import mock
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import MemoryStore
+from exasol.nb_connector.parallel_transfer import (
+    THREAD_NAME,
+    export_arrow_batches,
+    export_parallel,
+    import_parallel,
+)
+
+COLUMNS = {
+    "ID": {"type": "DECIMAL", "precision": 18, "scale": 0},
+    "NAME": {"type": "VARCHAR", "size": 100},
+    "PRICE": {"type": "DECIMAL", "precision": 10, "scale": 2},
+    "ACTIVE": {"type": "BOOLEAN"},
+    "CREATED": {"type": "TIMESTAMP"},
+}
+
+CSV_DATA = [
+    b'1,"a, b",1.50,1,2024-01-01 10:00:00.000\n2,,,0,\n',
+    b'3,"multi\nline",2.00,1,2024-01-02 11:30:00.500\n',
+]
+
+
+class FakeTransport:
+    def __init__(self, data: bytes | Exception):
+        self.data = data
+        self.exa_address = f"10.0.0.1:{id(self)}"
+        self.http_thread = mock.Mock()
+
+    def export_to_callback(self, callback, dst):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return callback(io.BytesIO(self.data), dst)
+
+    def import_from_callback(self, callback, src):
+        if isinstance(self.data, Exception):
+            raise self.data
+        pipe = io.BytesIO()
+        result = callback(pipe, src)
+        self.data = pipe.getvalue()
+        return result
+
+
+@pytest.fixture
+def conf() -> MemoryStore:
+    return MemoryStore(
+        {
+            CKey.db_host_name: "localhost",
+            CKey.db_port: "8563",
+            CKey.db_user: "sys",
+            CKey.db_password: "exasol",
+        }
+    )
+
+
+@pytest.fixture
+def mock_conn(monkeypatch):
+    conn = mock.MagicMock()
+    conn.__enter__.return_value = conn
+    conn.options = {"compression": False, "encryption": True}
+    conn.meta.sql_columns.return_value = COLUMNS
+    conn.get_nodes.side_effect = lambda n: [
+        {"ipaddr": "10.0.0.1", "port": 8563, "idx": i} for i in range(n or 2)
+    ]
+    monkeypatch.setattr("pyexasol.connect", mock.Mock(return_value=conn))
+    return conn
+
+
+def mock_transports(monkeypatch, *data) -> list[FakeTransport]:
+    transports = [FakeTransport(d) for d in data]
+    monkeypatch.setattr("pyexasol.http_transport", mock.Mock(side_effect=transports))
+    return transports
+
+
+def test_export_arrow(monkeypatch, conf, mock_conn):
+    transports = mock_transports(monkeypatch, *CSV_DATA)
+    table = export_parallel(conf, "SELECT * FROM T")
+    mock_conn.export_parallel.assert_called_once_with(
+        [t.exa_address for t in transports], "SELECT * FROM T", None
+    )
+    assert table.schema.types == [
+        pa.int64(),
+        pa.string(),
+        pa.decimal128(10, 2),
+        pa.bool_(),
+        pa.timestamp("us"),
+    ]
+    rows = sorted(table.to_pylist(), key=lambda row: row["ID"])
+    assert [row["NAME"] for row in rows] == ["a, b", None, "multi\nline"]
+    assert rows[1] == {
+        "ID": 2,
+        "NAME": None,
+        "PRICE": None,
+        "ACTIVE": False,
+        "CREATED": None,
+    }
+
+
+def test_export_pandas(monkeypatch, conf, mock_conn):
+    mock_transports(monkeypatch, *CSV_DATA)
+    df = export_parallel(conf, "SELECT * FROM T", format="pandas")
+    assert isinstance(df, pd.DataFrame)
+    assert sorted(df["ID"]) == [1, 2, 3]
+
+
+def test_export_polars(monkeypatch, conf, mock_conn):
+    mock_transports(monkeypatch, *CSV_DATA)
+    df = export_parallel(conf, "SELECT * FROM T", format="polars")
+    assert isinstance(df, pl.DataFrame)
+    assert df.height == 3
+
+
+def test_export_workers(monkeypatch, conf, mock_conn):
+    mock_transports(monkeypatch, CSV_DATA[0], b"", b"")
+    table = export_parallel(conf, "SELECT * FROM T", workers=3)
+    mock_conn.get_nodes.assert_called_once_with(3)
+    assert table.num_rows == 2
+
+
+def test_export_batches_bounded(monkeypatch, conf, mock_conn):
+    rows = b"".join(b"%d,x,1.00,1,\n" % i for i in range(1000))
+    mock_transports(monkeypatch, rows, rows)
+    reader = export_arrow_batches(
+        conf, "SELECT * FROM T", block_size=1024, max_queued_batches=1
+    )
+    assert sum(batch.num_rows for batch in reader) == 2000
+
+
+def test_export_batches_closed(monkeypatch, conf, mock_conn):
+    rows = b"".join(b"%d,x,1.00,1,\n" % i for i in range(5000))
+    mock_transports(monkeypatch, rows, rows)
+    reader = export_arrow_batches(
+        conf, "SELECT * FROM T", block_size=1024, max_queued_batches=1
+    )
+    reader.read_next_batch()
+    reader.close()
+    del reader
+    gc.collect()
+    assert not any(t.name.startswith(THREAD_NAME) for t in threading.enumerate())
+
+
+def test_export_worker_error(monkeypatch, conf, mock_conn):
+    mock_transports(monkeypatch, CSV_DATA[0], RuntimeError("worker failed"))
+    with pytest.raises(RuntimeError, match="worker failed"):
+        export_parallel(conf, "SELECT * FROM T")
+
+
+def test_export_sql_error(monkeypatch, conf, mock_conn):
+    transports = mock_transports(monkeypatch, b"", b"")
+    mock_conn.export_parallel.side_effect = RuntimeError("SQL failed")
+    with pytest.raises(RuntimeError, match="SQL failed"):
+        export_parallel(conf, "SELECT * FROM T")
+    for transport in transports:
+        transport.http_thread.terminate.assert_called_once()
+
+
+def test_export_unsupported_format(conf, mock_conn):
+    with pytest.raises(ValueError, match="Unsupported format"):
+        export_parallel(conf, "SELECT * FROM T", format="csv")
+    mock_conn.export_parallel.assert_not_called()
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": range(10),
+            "name": [f"name {i}" for i in range(10)],
+            "created": pd.date_range("2024-01-01", periods=10, freq="h", tz="UTC"),
+        }
+    )
+
+
+def imported_rows(transports) -> list[bytes]:
+    return [row for t in transports for row in t.data.splitlines()]
+
+
+def test_import_pandas(monkeypatch, conf, mock_conn, frame):
+    transports = mock_transports(monkeypatch, b"", b"")
+    stats = import_parallel(conf, frame, "T", batch_size=3)
+    mock_conn.import_parallel.assert_called_once_with(
+        [t.exa_address for t in transports],
+        "T",
+        {"columns": ["id", "name", "created"]},
+    )
+    rows = imported_rows(transports)
+    assert stats.rows == len(rows) == 10
+    assert stats.bytes == sum(len(t.data) for t in transports)
+    assert b'0,"name 0",2024-01-01 00:00:00.000000' in rows
+
+
+def test_import_timestamp_format(monkeypatch, conf, mock_conn, frame):
+    mock_transports(monkeypatch, b"", b"")
+    mock_conn.execute.return_value.fetchval.return_value = "YYYY-MM-DD HH24:MI:SS.FF3"
+    import_parallel(conf, frame, "T")
+    statements = [c.args[0] for c in mock_conn.execute.call_args_list]
+    assert statements[1:] == [
+        "ALTER SESSION SET NLS_TIMESTAMP_FORMAT='YYYY-MM-DD HH24:MI:SS.FF6'",
+        "ALTER SESSION SET NLS_TIMESTAMP_FORMAT='YYYY-MM-DD HH24:MI:SS.FF3'",
+    ]
+
+
+def test_import_parquet(monkeypatch, conf, mock_conn, frame, tmp_path):
+    path = tmp_path / "data.parquet"
+    frame.drop(columns="created").to_parquet(path)
+    transports = mock_transports(monkeypatch, b"", b"", b"")
+    stats = import_parallel(conf, path, ("S", "T"), workers=3, batch_size=2)
+    mock_conn.get_nodes.assert_called_once_with(3)
+    mock_conn.execute.assert_not_called()
+    assert stats.rows == 10
+    assert sorted(imported_rows(transports)) == sorted(
+        f'{i},"name {i}"'.encode() for i in range(10)
+    )
+
+
+def test_import_polars(monkeypatch, conf, mock_conn):
+    transports = mock_transports(monkeypatch, b"", b"")
+    stats = import_parallel(conf, pl.DataFrame({"ID": [1, 2, 3]}), "T")
+    assert stats.rows == 3
+    assert sorted(imported_rows(transports)) == [b"1", b"2", b"3"]
+
+
+def test_import_empty(monkeypatch, conf, mock_conn):
+    stats = import_parallel(conf, pa.table({"ID": pa.array([], pa.int64())}), "T")
+    assert stats.rows == 0
+    mock_conn.import_parallel.assert_not_called()
+
+
+def test_import_unsupported_source(conf, mock_conn):
+    with pytest.raises(TypeError, match="Unsupported source"):
+        import_parallel(conf, [1, 2, 3], "T")
+
+
+def test_import_source_error(monkeypatch, conf, mock_conn):
+    schema = pa.schema([("ID", pa.int64())])
+
+    def batches():
+        yield pa.record_batch([pa.array([1])], schema=schema)
+        raise OSError("read failed")
+
+    mock_transports(monkeypatch, b"", b"")
+    reader = pa.RecordBatchReader.from_batches(schema, batches())
+    with pytest.raises(OSError, match="read failed"):
+        import_parallel(conf, reader, "T")
+
+
+def test_import_sql_error(monkeypatch, conf, mock_conn, frame):
+    transports = mock_transports(monkeypatch, b"", b"")
+    mock_conn.import_parallel.side_effect = RuntimeError("SQL failed")
+    with pytest.raises(RuntimeError, match="SQL failed"):
+        import_parallel(conf, frame, "T")
+    for transport in transports:
+        transport.http_thread.terminate.assert_called_once()
@@ -0,0 +1,194 @@
+import io
+import os
+import time
+from unittest import mock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import MemoryStore
+from exasol.nb_connector.query_cache import (
+    QueryCache,
+    last_commit_probe,
+    normalize_sql,
+)
+
+COLUMNS = {
+    "ID": {"type": "DECIMAL", "precision": 18, "scale": 0},
+    "NAME": {"type": "VARCHAR", "size": 100},
+}
+
+CSV_DATA = b'3,"c"\n1,"a"\n2,"b"\n'
+
+
+class FakeTransport:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.exa_address = "10.0.0.1:8563"
+        self.http_thread = mock.Mock()
+
+    def export_to_callback(self, callback, dst):
+        return callback(io.BytesIO(self.data), dst)
+
+
+@pytest.fixture
+def conf() -> MemoryStore:
+    return MemoryStore(
+        {
+            CKey.db_host_name: "localhost",
+            CKey.db_port: "8563",
+            CKey.db_user: "sys",
+            CKey.db_password: "exasol",
+        }
+    )
+
+
+@pytest.fixture
+def mock_conn(monkeypatch):
+    conn = mock.MagicMock()
+    conn.__enter__.return_value = conn
+    conn.options = {"compression": False, "encryption": True}
+    conn.meta.sql_columns.return_value = COLUMNS
+    conn.get_nodes.return_value = [{"ipaddr": "10.0.0.1", "port": 8563, "idx": 0}]
+    monkeypatch.setattr("pyexasol.connect", mock.Mock(return_value=conn))
+    monkeypatch.setattr(
+        "pyexasol.http_transport",
+        mock.Mock(side_effect=lambda *args, **kwargs: FakeTransport(CSV_DATA)),
+    )
+    return conn
+
+
+@pytest.fixture
+def cache(tmp_path) -> QueryCache:
+    return QueryCache(tmp_path)
+
+
+def cached_files(cache: QueryCache) -> list:
+    return list(cache.cache_dir.glob("*.arrow"))
+
+
+def test_normalize_sql():
+    sql = "SELECT  'a  b',\n\t\"X  Y\"\n FROM T ;  "
+    assert normalize_sql(sql) == "SELECT 'a  b', \"X  Y\" FROM T"
+
+
+def test_query_miss(cache, conf, mock_conn):
+    table = cache.query(conf, "SELECT * FROM T", schema="S")
+    mock_conn.get_nodes.assert_called_once_with(1)
+    assert table.column("ID").to_pylist() == [3, 1, 2]
+    assert table.schema.metadata is None
+    assert len(cached_files(cache)) == 1
+
+
+def test_query_hit(cache, conf, mock_conn):
+    expected = cache.query(conf, "SELECT * FROM T")
+    mock_connect = mock.Mock()
+    with mock.patch("pyexasol.connect", mock_connect):
+        actual = cache.query(conf, "SELECT *\n  FROM T;")
+    mock_connect.assert_not_called()
+    assert actual.equals(expected)
+
+
+def test_query_pandas(cache, conf, mock_conn):
+    df = cache.query(conf, "SELECT * FROM T", format="pandas")
+    assert isinstance(df, pd.DataFrame)
+    assert list(df["NAME"]) == ["c", "a", "b"]
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        {"sql": "SELECT * FROM T2"},
+        {"query_params": {"x": 1}},
+        {"schema": "OTHER"},
+    ],
+)
+def test_query_key(cache, conf, mock_conn, other):
+    kwargs = {"sql": "SELECT * FROM T", "schema": "S"}
+    cache.query(conf, **kwargs)
+    cache.query(conf, **(kwargs | other))
+    assert mock_conn.meta.sql_columns.call_count == 2
+    assert len(cached_files(cache)) == 2
+
+
+def test_query_other_database(cache, conf, mock_conn):
+    cache.query(conf, "SELECT * FROM T")
+    conf.save(CKey.db_host_name, "otherhost")
+    cache.query(conf, "SELECT * FROM T")
+    assert mock_conn.meta.sql_columns.call_count == 2
+
+
+def test_query_refresh(cache, conf, mock_conn):
+    cache.query(conf, "SELECT * FROM T")
+    cache.query(conf, "SELECT * FROM T", refresh=True)
+    assert mock_conn.meta.sql_columns.call_count == 2
+    assert len(cached_files(cache)) == 1
+
+
+def test_query_expired(cache, conf, mock_conn):
+    cache.query(conf, "SELECT * FROM T")
+    (path,) = cached_files(cache)
+    modified = time.time() - cache.ttl - 1
+    os.utime(path, (modified, modified))
+    cache.query(conf, "SELECT * FROM T")
+    assert mock_conn.meta.sql_columns.call_count == 2
+
+
+def test_query_version_probe(cache, conf, mock_conn):
+    versions = iter(["v1", "v1", "v2"])
+    cache.version_probe = lambda conn: next(versions)
+    for _ in range(3):
+        cache.query(conf, "SELECT * FROM T")
+    assert mock_conn.meta.sql_columns.call_count == 2
+
+
+def test_evict_lru(cache, conf, mock_conn):
+    cache.query(conf, "SELECT 1")
+    (first,) = cached_files(cache)
+    cache.max_size = 2 * first.stat().st_size
+    cache.query(conf, "SELECT 2")
+    (second,) = set(cached_files(cache)) - {first}
+    past = time.time() - 100
+    os.utime(second, (past, second.stat().st_mtime))
+    cache.query(conf, "SELECT 3")
+    assert first.exists()
+    assert not second.exists()
+    assert len(cached_files(cache)) == 2
+
+
+def test_invalidate(cache, conf, mock_conn):
+    cache.query(conf, "SELECT * FROM T")
+    assert cache.invalidate(conf, "SELECT * FROM T")
+    assert not cache.invalidate(conf, "SELECT * FROM T")
+    assert not cached_files(cache)
+
+
+def test_clear(cache, conf, mock_conn):
+    cache.query(conf, "SELECT 1")
+    cache.query(conf, "SELECT 2")
+    assert cache.clear() == 2
+    assert not cached_files(cache)
+
+
+def test_last_commit_probe():
+    conn = mock.Mock()
+    conn.execute.return_value.fetchval.return_value = "2024-01-01 10:00:00.000"
+    probe = last_commit_probe("S", ["T1", "T2"])
+    assert probe(conn) == "2024-01-01 10:00:00.000"
+    query, params = conn.execute.call_args.args
+    assert query.endswith("AND OBJECT_NAME IN ({tables})")
+    assert params == {"schema": "S", "tables": ["T1", "T2"]}
+
+
+def test_unsupported_format(cache, conf, mock_conn):
+    with pytest.raises(ValueError, match="Unsupported format"):
+        cache.query(conf, "SELECT * FROM T", format="csv")
+
+
+def test_arrow_file(cache, conf, mock_conn):
+    cache.query(conf, "SELECT * FROM T")
+    (path,) = cached_files(cache)
+    with pa.memory_map(str(path)) as source:
+        assert pa.ipc.open_file(source).schema.metadata == {b"version": b""}
@@ -0,0 +1,78 @@
+import json
+from unittest import mock
+
+import pytest
+
+from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
+from exasol.nb_connector.config_store import MemoryStore
+from exasol.nb_connector.saas_cache import (
+    PERSISTED_KEY_PREFIX,
+    SaasLookupCache,
+)
+
+
+@pytest.fixture
+def conf() -> MemoryStore:
+    return MemoryStore(
+        {
+            CKey.saas_url: "https://mock_saas.exasol.com",
+            CKey.saas_account_id: "w53lhsoifid794ms",
+            CKey.saas_database_name: "my_database",
+            CKey.saas_token: "xmfi58302lfj0ojf64ndk3ls",
+        }
+    )
+
+
+def test_lookup_cached(conf):
+    cache = SaasLookupCache()
+    resolve = mock.Mock(return_value="db-id")
+    assert cache.lookup(conf, "database_id", resolve) == "db-id"
+    assert cache.lookup(conf, "database_id", resolve) == "db-id"
+    resolve.assert_called_once()
+
+
+def test_lookup_changed_config(conf):
+    cache = SaasLookupCache()
+    cache.lookup(conf, "database_id", lambda: "db-1")
+    conf.save(CKey.saas_database_name, "other_database")
+    assert cache.lookup(conf, "database_id", lambda: "db-2") == "db-2"
+
+
+def test_lookup_expired(conf):
+    cache = SaasLookupCache(ttl=10)
+    with mock.patch("time.time", return_value=1000.0):
+        cache.lookup(conf, "database_id", lambda: "db-1")
+    with mock.patch("time.time", return_value=1011.0):
+        assert cache.lookup(conf, "database_id", lambda: "db-2") == "db-2"
+
+
+def test_invalidate(conf):
+    cache = SaasLookupCache()
+    cache.lookup(conf, "database_id", lambda: "db-1")
+    assert cache.invalidate(conf)
+    assert not cache.invalidate(conf)
+    assert cache.lookup(conf, "database_id", lambda: "db-2") == "db-2"
+
+
+def test_persisted(conf):
+    SaasLookupCache(persist=True).lookup(conf, "connection", lambda: {"user": "u"})
+    entry = json.loads(conf[PERSISTED_KEY_PREFIX + "connection"])
+    assert entry["value"] == {"user": "u"}
+    resolve = mock.Mock()
+    assert SaasLookupCache(persist=True).lookup(conf, "connection", resolve) == {
+        "user": "u"
+    }
+    resolve.assert_not_called()
+
+
+def test_persisted_invalidate(conf):
+    SaasLookupCache(persist=True).lookup(conf, "database_id", lambda: "db-1")
+    assert SaasLookupCache(persist=True).invalidate(conf)
+    assert conf.get(PERSISTED_KEY_PREFIX + "database_id") is None
+
+
+def test_persisted_other_config(conf):
+    SaasLookupCache(persist=True).lookup(conf, "database_id", lambda: "db-1")
+    conf.save(CKey.saas_token, "new_token")
+    cache = SaasLookupCache(persist=True)
+    assert cache.lookup(conf, "database_id", lambda: "db-2") == "db-2"
@@ -1,16 +1,21 @@
 import contextlib
 import logging
 import sqlite3
+import sys
 import threading
 from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
 import sqlcipher3.dbapi2 as sqlcipher
-import tenacity
 
+from exasol.nb_connector import (
+    secret_store,
+    secret_store_watcher,
+)
 from exasol.nb_connector.ai_lab_config import AILabConfig as CKey
 from exasol.nb_connector.secret_store import (
+    ConnectionStats,
     InvalidPassword,
     Secrets,
 )
@@ -69,6 +74,25 @@ def test_wrong_password(sample_file):
         Secrets(sample_file, "wrong password")
 
 
+def test_raw_key_in_new_thread(sample_file):
+    Secrets(sample_file, "correct password").save("key", "my value").close()
+    secrets = Secrets(sample_file, "correct password")
+    assert secrets._raw_key is not None
+    result = []
+    thread = threading.Thread(target=lambda: result.append(secrets.get("key")))
+    thread.start()
+    thread.join()
+    assert result == ["my value"]
+
+
+def test_raw_key_fallback(sample_file, monkeypatch):
+    Secrets(sample_file, "correct password").save("key", "my value").close()
+    monkeypatch.setattr(secret_store, "KDF_ITERATIONS", 1000)
+    secrets = Secrets(sample_file, "correct password")
+    assert secrets._raw_key is None
+    assert secrets.get("key") == "my value"
+
+
 def test_plain_access_fails(sample_file):
     """
     This test sets up a secret store, secured by a master password and
@@ -123,6 +147,71 @@ def test_items_iterator(secrets_with_names):
     ]
 
 
+@pytest.fixture
+def secrets_with_prefixes(secrets):
+    secrets.save_many(
+        {
+            "slc_a": "1",
+            "slc_b": "2",
+            "slc": "3",
+            "slcx": "4",
+            "other": "5",
+        }
+    )
+    return secrets
+
+
+def test_items_with_prefix(secrets_with_prefixes):
+    assert list(secrets_with_prefixes.items(prefix="slc_")) == [
+        ("slc_a", "1"),
+        ("slc_b", "2"),
+    ]
+
+
+def test_keys_with_prefix(secrets_with_prefixes):
+    assert list(secrets_with_prefixes.keys(prefix="slc")) == [
+        "slc",
+        "slc_a",
+        "slc_b",
+        "slcx",
+    ]
+
+
+def test_values_with_prefix(secrets_with_prefixes):
+    assert list(secrets_with_prefixes.values(prefix="oth")) == ["5"]
+    assert list(secrets_with_prefixes.values(prefix="none")) == []
+
+
+def test_prefix_range_scan(secrets_with_prefixes):
+    with secrets_with_prefixes._cursor() as cur:
+        cur.execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM secrets WHERE key >= ? AND key < ?",
+            ["slc_", "slc`"],
+        )
+        plan = " ".join(row[-1] for row in cur.fetchall())
+    assert "(key>? AND key<?)" in plan
+
+
+@pytest.mark.parametrize(
+    "prefix, expected",
+    [
+        ("abc", "abd"),
+        ("a" + chr(sys.maxunicode), "b"),
+        (chr(sys.maxunicode), None),
+    ],
+)
+def test_prefix_upper_bound(prefix, expected):
+    assert secret_store._prefix_upper_bound(prefix) == expected
+
+
+def test_snapshot(secrets):
+    secrets.save(CKey.db_port, "8563").save("custom_key", "value")
+    snapshot = secrets.snapshot()
+    secrets.save(CKey.db_port, "1234")
+    assert snapshot.db_port == 8563
+    assert snapshot.get("custom_key") == "value"
+
+
 def test_remove_key(secrets):
     secrets.save("key", "value")
     secrets.remove("key")
@@ -135,6 +224,181 @@ def test_remove_db_schema(secrets):
     assert secrets.get(CKey.db_schema) is None
 
 
+def test_save_many_get_many(secrets):
+    secrets.save_many({"key1": "value1", CKey.db_user: "user"})
+    assert secrets.get_many(["key1", CKey.db_user, "unknown"], "default") == {
+        "key1": "value1",
+        "db_user": "user",
+        "unknown": "default",
+    }
+
+
+def test_remove_many(secrets):
+    secrets.save_many({"key1": "value1", "key2": "value2", "key3": "value3"})
+    secrets.remove_many(["key1", "key2"])
+    assert list(secrets.keys()) == ["key3"]
+
+
+def test_transaction_single_commit(secrets):
+    secrets.connection()
+    pooled = secrets._pool._connections[threading.get_ident()]
+    pooled.con = spy = Mock(wraps=pooled.con)
+    with secrets.transaction():
+        secrets.save("key1", "value1")
+        secrets.save("key2", "value2")
+        assert secrets.get("key1") == "value1"
+    assert spy.commit.call_count == 1
+
+
+def test_transaction_rollback(secrets):
+    secrets.save("key", "initial")
+    with pytest.raises(RuntimeError):
+        with secrets.transaction():
+            secrets.save("key", "changed")
+            secrets.save("other", "value")
+            raise RuntimeError("failure")
+    assert secrets.get("key") == "initial"
+    assert secrets.get("other") is None
+
+
+def test_transaction_nested(secrets):
+    with secrets.transaction():
+        secrets.save_many({"key1": "value1"})
+        secrets.save("key2", "value2")
+    assert dict(secrets.items()) == {"key1": "value1", "key2": "value2"}
+
+
+@pytest.fixture
+def cached_secrets(sample_file) -> Secrets:
+    return Secrets(sample_file, "abc", cache=True)
+
+
+def test_cached_value(cached_secrets):
+    cached_secrets.save("key", "value")
+    assert cached_secrets.get("key") == "value"
+    assert cached_secrets.get("other", "default") == "default"
+
+
+def test_cache_hit_without_select(cached_secrets, mocker):
+    cached_secrets.save("key", "value")
+    cached_secrets.get("key")
+    cached_secrets.get("unknown")
+    spy = mocker.spy(cached_secrets, "_execute")
+    assert cached_secrets.get("key") == "value"
+    assert cached_secrets.get("unknown") is None
+    assert spy.call_count == 0
+
+
+def test_cache_remove(cached_secrets):
+    cached_secrets.save("key", "value")
+    cached_secrets.remove("key")
+    assert cached_secrets.get("key") is None
+
+
+def test_cache_invalidated_by_other_instance(cached_secrets, sample_file):
+    cached_secrets.save("key", "initial")
+    assert cached_secrets.get("key") == "initial"
+    other = Secrets(sample_file, "abc")
+    other.save("key", "changed")
+    other.save("new", "value")
+    assert cached_secrets.get("key") == "changed"
+    assert cached_secrets.get("new") == "value"
+
+
+def test_cache_invalidated_by_other_thread(cached_secrets):
+    cached_secrets.save("key", "initial")
+    assert cached_secrets.get("key") == "initial"
+    thread = threading.Thread(target=lambda: cached_secrets.save("key", "changed"))
+    thread.start()
+    thread.join()
+    assert cached_secrets.get("key") == "changed"
+
+
+def test_cache_transaction_rollback(cached_secrets):
+    cached_secrets.save("key", "initial")
+    assert cached_secrets.get("key") == "initial"
+    with pytest.raises(RuntimeError):
+        with cached_secrets.transaction():
+            cached_secrets.save("key", "changed")
+            raise RuntimeError("failure")
+    assert cached_secrets.get("key") == "initial"
+
+
+def test_cache_get_many(cached_secrets, mocker):
+    cached_secrets.save_many({"key1": "value1", "key2": "value2"})
+    expected = {"key1": "value1", "key2": "value2", "key3": None}
+    assert cached_secrets.get_many(["key1", "key2", "key3"]) == expected
+    spy = mocker.spy(cached_secrets, "_execute")
+    assert cached_secrets.get_many(["key1", "key2", "key3"]) == expected
+    assert spy.call_count == 0
+
+
+@pytest.fixture
+def fast_watcher(monkeypatch):
+    monkeypatch.setattr(secret_store_watcher, "WATCH_INTERVAL", 0.01)
+
+
+class ChangeRecorder:
+    def __init__(self):
+        self.changes = []
+        self.event = threading.Event()
+
+    def __call__(self, changed):
+        self.changes.append(changed)
+        self.event.set()
+
+    def wait(self):
+        assert self.event.wait(timeout=5)
+        self.event.clear()
+
+
+def test_subscribe_change_by_other_instance(secrets, fast_watcher):
+    secrets.save("key", "initial").save("other", "value")
+    recorder = ChangeRecorder()
+    subscription = secrets.subscribe(["key", CKey.db_user], recorder)
+    other = Secrets(secrets.db_file, "abc")
+    other.save("other", "changed")
+    other.save_many({"key": "changed", CKey.db_user: "sys"})
+    recorder.wait()
+    other.remove("key")
+    recorder.wait()
+    subscription.cancel()
+    assert recorder.changes == [
+        {"key": "changed", "db_user": "sys"},
+        {"key": None},
+    ]
+
+
+def test_subscribe_change_by_same_instance(secrets, fast_watcher):
+    recorder = ChangeRecorder()
+    secrets.subscribe(["key"], recorder)
+    secrets.save("key", "value")
+    recorder.wait()
+    assert recorder.changes == [{"key": "value"}]
+
+
+def test_cancel_subscription(secrets, fast_watcher):
+    recorder = ChangeRecorder()
+    subscription = secrets.subscribe(["key"], recorder)
+    assert subscription.active
+    subscription.cancel()
+    assert not subscription.active
+    secrets.save("key", "value")
+    assert not recorder.event.wait(timeout=0.1)
+
+
+def test_failing_callback(secrets, fast_watcher):
+    def fail(changed):
+        raise RuntimeError("failed")
+
+    recorder = ChangeRecorder()
+    secrets.subscribe(["key"], fail)
+    secrets.subscribe(["key"], recorder)
+    secrets.save("key", "value")
+    recorder.wait()
+    assert recorder.changes == [{"key": "value"}]
+
+
 class AccessThread(threading.Thread):
     def __init__(self, id: int, secrets: Secrets):
         super().__init__(target=self.access_scs)
@@ -168,36 +432,147 @@ def test_multithreads(secrets):
             t.join()
 
 
+def run_in_thread(func) -> None:
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+def test_connection_of_dead_thread_reaped(secrets):
+    secrets.save("key", "value")
+    run_in_thread(lambda: secrets.get("key"))
+    assert secrets.connection_stats().open_connections == 2
+    run_in_thread(lambda: secrets.get("key"))
+    stats = secrets.connection_stats()
+    assert (stats.open_connections, stats.reaped_connections) == (2, 1)
+
+
+def test_reap_connections(secrets):
+    secrets.save("key", "value")
+    run_in_thread(lambda: secrets.get("key"))
+    secrets.reap_connections()
+    assert secrets.connection_stats() == ConnectionStats(
+        open_connections=1, reaped_connections=1, evicted_connections=0
+    )
+
+
+def test_close_all_from_other_thread(secrets):
+    secrets.save("key", "value")
+    run_in_thread(secrets.close_all)
+    assert secrets.connection_stats().open_connections == 0
+    assert secrets.get("key") == "value"
+
+
+def test_max_connections_evicts_idle(sample_file):
+    secrets = Secrets(sample_file, "abc", max_connections=2)
+    secrets.save("key", "value")
+    started = threading.Barrier(3)
+    finish = threading.Event()
+
+    def access():
+        secrets.get("key")
+        started.wait()
+        finish.wait()
+
+    threads = [threading.Thread(target=access) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    finish.set()
+    for thread in threads:
+        thread.join()
+    stats = secrets.connection_stats()
+    assert (stats.open_connections, stats.evicted_connections) == (2, 1)
+
+
+def test_connection_in_use_not_evicted(sample_file):
+    secrets = Secrets(sample_file, "abc", max_connections=1)
+    secrets.save("key", "value")
+    with secrets.transaction():
+        secrets.save("key", "changed")
+        result = []
+        run_in_thread(lambda: result.append(secrets.get("key")))
+        secrets.save("other", "value")
+    assert result == ["value"]
+    assert secrets.connection_stats().evicted_connections == 0
+    assert secrets.get("other") == "value"
+
+
+def test_connection_not_evicted_while_held(sample_file):
+    secrets = Secrets(sample_file, "abc", max_connections=1)
+    con = secrets.connection()
+    run_in_thread(lambda: secrets.get("key"))
+    assert secrets.connection_stats().evicted_connections == 0
+    assert con.execute("SELECT 1").fetchone() == (1,)
+
+
 def cursor_mock(side_effect):
     mock = Mock()
     mock.execute.side_effect = side_effect
     return mock
 
 
+DATABASE_LOCKED = sqlcipher.OperationalError("database is locked")
+
+
 @pytest.mark.parametrize(
     "side_effect, expected",
     [
         (Exception("message"), Exception),
         (sqlcipher.OperationalError("any"), sqlcipher.OperationalError),
+        (DATABASE_LOCKED, sqlcipher.OperationalError),
     ],
 )
 def test_execute_no_retry(secrets, side_effect, expected):
     cursor = cursor_mock(side_effect)
     with pytest.raises(expected):
         secrets._execute("statement", cur=cursor)
+    assert cursor.execute.call_count == 1
 
 
-DATABASE_LOCKED = sqlcipher.OperationalError("database is locked")
+def pragma(secrets: Secrets, name: str):
+    with secrets._cursor() as cur:
+        cur.execute(f"PRAGMA {name}")
+        return cur.fetchone()[0]
 
 
-def test_execute_retry_once(secrets):
-    cursor = cursor_mock([DATABASE_LOCKED, None])
-    secrets._execute("statement", cur=cursor)
-    assert cursor.execute.call_count == 2
+def test_default_pragmas(secrets):
+    assert pragma(secrets, "journal_mode") == "wal"
+    assert pragma(secrets, "busy_timeout") == 5000
 
 
-def test_execute_retry_timeout(secrets):
-    cursor = cursor_mock(DATABASE_LOCKED)
-    with pytest.raises(tenacity.RetryError):
-        secrets._execute("statement", cur=cursor)
-    assert cursor.execute.call_count == 5
+def test_custom_pragmas(sample_file):
+    secrets = Secrets(sample_file, "abc", pragmas={"busy_timeout": 200})
+    assert pragma(secrets, "journal_mode") == "wal"
+    assert pragma(secrets, "busy_timeout") == 200
+
+
+@pytest.mark.parametrize(
+    "pragmas",
+    [
+        {"busy_timeout": "1; DROP TABLE secrets"},
+        {"busy_timeout = 1; --": 1},
+    ],
+)
+def test_invalid_pragmas(sample_file, pragmas):
+    with pytest.raises(ValueError, match="Invalid pragma"):
+        Secrets(sample_file, "abc", pragmas=pragmas)
+
+
+def test_concurrent_write_waits_for_lock(sample_file):
+    """
+    While one connection holds the write lock, another connection waits
+    for the lock instead of failing, and readers are not blocked.
+    """
+    secrets = Secrets(sample_file, "abc")
+    secrets.save("key", "initial")
+    other = Secrets(sample_file, "abc")
+    with secrets.transaction():
+        secrets.save("key", "first")
+        assert other.get("key") == "initial"
+        thread = threading.Thread(target=lambda: other.save("key", "second"))
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive()
+    thread.join()
+    assert secrets.get("key") == "second"
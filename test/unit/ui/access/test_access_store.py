@@ -2,6 +2,8 @@
 Unit tests for access store read and write functions.
 """
 
+from unittest import mock
+
 import exasol.nb_connector.ui.access.access_store as access_ui
 
 TEST_CONFIG_SQLITE = "test_config.sqlite"
@@ -212,3 +214,24 @@ def test_access_store_relative_input_is_resolved_against_notebook_dir(
     assert file_name_field.value == relative_file_path
     assert test_scs_file.read_text().strip() == expected_absolute_path
     assert access_ui.get_sb_store_file() == expected_absolute_path
+
+
+def test_access_store_warms_up_connections(tmp_path, monkeypatch):
+    """
+    Test that opening the store starts warming up the connections.
+    """
+    monkeypatch.chdir(tmp_path)
+    test_scs_file = tmp_path / "scs_file"
+    monkeypatch.setattr(access_ui, "get_scs_location_file_path", lambda: test_scs_file)
+    monkeypatch.setattr(access_ui, "get_ipython", mock.Mock())
+    mock_warm_up = mock.Mock()
+    monkeypatch.setattr(access_ui, "warm_up", mock_warm_up)
+
+    ui = access_ui.get_access_store()
+    password_field = ui.children[0].children[2].children[1]
+    password_field.value = "password"
+    open_button = ui.children[1]
+    open_button.click()
+
+    mock_warm_up.assert_called_once()
+    assert mock_warm_up.call_args.kwargs == {"compression": True}
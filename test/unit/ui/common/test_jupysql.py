@@ -11,7 +11,7 @@ from exasol.nb_connector.ui.common import jupysql
 def test_init_jupysql_ipython_none(monkeypatch):
     """This test is checking if proper error is coming when IPython is not there, like in normal python only."""
     monkeypatch.setattr(jupysql, "get_ipython", lambda: None)
-    monkeypatch.setattr(jupysql, "open_sqlalchemy_connection", lambda *_: None)
+    monkeypatch.setattr(jupysql, "open_sqlalchemy_connection", lambda *_, **__: None)
     with pytest.raises(
         RuntimeError,
         match="Not running inside IPython. Magic commands will not execute.",
@@ -23,7 +23,7 @@ def test_init_jupysql_ipython_magics(monkeypatch):
     """This test is checking if all magic commands are running properly when IPython is there, like in notebook."""
     mock_ipy = MagicMock()
     monkeypatch.setattr(jupysql, "get_ipython", lambda: mock_ipy)
-    monkeypatch.setattr(jupysql, "open_sqlalchemy_connection", lambda *_: None)
+    monkeypatch.setattr(jupysql, "open_sqlalchemy_connection", lambda *_, **__: None)
     monkeypatch.setattr(jupysql, "get_activation_sql", lambda *_: "MOCK_SQL")
     mock_config = MagicMock()
     mock_config.db_schema = "MOCK_SCHEMA"
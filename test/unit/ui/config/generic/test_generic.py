@@ -70,11 +70,14 @@ def test_save_button_saves_values(
     save_btn = ui.children[-1]
     # Simulate button click
     save_btn.click()
-    # Should call save for each input
-    assert secrets_store.save.call_count == sum(len(g) for g in input_definitions)
-    for group in input_definitions:
-        for _, widget, key in group:
-            secrets_store.save.assert_any_call(key, str(widget.value))
+    # Should save all inputs at once
+    secrets_store.save_many.assert_called_once_with(
+        {
+            key: str(widget.value)
+            for group in input_definitions
+            for _, widget, key in group
+        }
+    )
 
 
 def test_on_value_change_sets_icon(
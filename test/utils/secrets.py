@@ -38,3 +38,10 @@ class SecretsMock(Secrets):
         key = _ensure_str(key)
         self._mock[key] = value
         return self
+
+    def remove(self, key: str | CKey) -> None:
+        self._mock.pop(_ensure_str(key), None)
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[Secrets]:
+        yield self